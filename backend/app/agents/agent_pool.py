@@ -0,0 +1,90 @@
+"""Size- and idle-time-bounded pool of per-user agents.
+
+Agents are kept in least-recently-used order, so both limits are enforced by
+popping from the cold end: the pool never holds more than ``max_size``
+agents, and agents unused for ``idle_seconds`` are dropped on the next access.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class AgentPool(Generic[T]):
+    def __init__(
+        self,
+        factory: Callable[[str], T],
+        max_size: int = 1000,
+        idle_seconds: float = 1800,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._agents: "OrderedDict[str, Tuple[float, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions: Dict[str, int] = {"size": 0, "idle": 0}
+        self.build_seconds = 0.0
+
+    def get(self, key: str) -> T:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._agents.get(key)
+            if entry is not None:
+                self._agents[key] = (now, entry[1])
+                self._agents.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        started = time.perf_counter()
+        agent = self.factory(key)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.build_seconds += elapsed
+            self._agents[key] = (time.monotonic(), agent)
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.max_size:
+                self._agents.popitem(last=False)
+                self.evictions["size"] += 1
+        return agent
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._agents.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._agents
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "live": len(self._agents),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": dict(self.evictions),
+            "builds": self.misses,
+            "build_seconds_total": round(self.build_seconds, 6),
+            "build_seconds_avg": self.build_seconds / self.misses
+            if self.misses
+            else 0.0,
+        }
+
+    def _evict_idle(self, now: float) -> None:
+        cutoff = now - self.idle_seconds
+        while self._agents:
+            key, (last_used, _) = next(iter(self._agents.items()))
+            if last_used >= cutoff:
+                break
+            del self._agents[key]
+            self.evictions["idle"] += 1
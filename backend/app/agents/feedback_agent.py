@@ -1,9 +1,14 @@
-from typing import List, Dict
-from langchain_groq import ChatGroq
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from langgraph.prebuilt import create_react_agent
-from langchain_core.messages import HumanMessage, AIMessage
-from app.core.config import settings
-from app.agents.tools.feedback_tools import create_feedback_tools
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    ToolMessage,
+)
+from app.agents.tools.feedback_tools import FEEDBACK_TOOLS, scope_config
+from app.core.metrics import LLM_FALLBACKS
+from app.services.llm_gateway import llm_gateway
 
 
 SYSTEM_PROMPT = """You are a Senior Product Analyst AI Assistant.
@@ -33,36 +38,35 @@ FORMAT:
 """
 
 
+_feedback_graph = None
+
+
+def get_feedback_graph():
+    """The ReAct graph, compiled once per process and shared by all agents.
+
+    Tools read the user/conversation scope from each call's RunnableConfig,
+    so nothing user-specific is baked into the graph.
+    """
+    global _feedback_graph
+    if _feedback_graph is None:
+        _feedback_graph = create_react_agent(
+            model=llm_gateway.chat_model(temperature=0.0, max_tokens=4000),
+            tools=FEEDBACK_TOOLS,
+            prompt=SYSTEM_PROMPT,
+        )
+    return _feedback_graph
+
+
 class FeedbackAgent:
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self._current_conversation_id: str = None
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            api_key=settings.GROQ_API_KEY,
-            temperature=0.0,
-            max_tokens=4000,
-        )
-        self._agent = None
-
-    def _get_agent(self, conversation_id: str):
-        if self._agent is None or self._current_conversation_id != conversation_id:
-            self._current_conversation_id = conversation_id
-            tools = create_feedback_tools(self.user_id, conversation_id)
-            self._agent = create_react_agent(
-                model=self.llm, tools=tools, prompt=SYSTEM_PROMPT
-            )
-        return self._agent
+        self._agent = get_feedback_graph()
 
-    def set_conversation_id(self, conversation_id: str):
-        self._current_conversation_id = conversation_id
-        self._agent = None
-
-    def chat(
-        self, message: str, history: List[Dict] = [], conversation_id: str = None
-    ) -> Dict:
-        agent = self._get_agent(conversation_id or self._current_conversation_id)
+    def _config(self, conversation_id: Optional[str]):
+        # Scope comes from each call, never from state on the (pooled) agent
+        return scope_config(self.user_id, conversation_id)
 
+    def _build_inputs(self, message: str, history: List[Dict]) -> Dict:
         chat_history = []
         for msg in history[-10:]:
             role = msg.get("role")
@@ -71,11 +75,24 @@ class FeedbackAgent:
                 chat_history.append(HumanMessage(content=content))
             elif role in ["assistant", "agent"]:
                 chat_history.append(AIMessage(content=content))
+        return {"messages": chat_history + [HumanMessage(content=message)]}
 
+    async def chat(
+        self,
+        message: str,
+        conversation_id: Optional[str],
+        history: List[Dict] = [],
+    ) -> Dict:
         try:
             # We add a hidden nudge to ensure it doesn't just look at memory
-            inputs = {"messages": chat_history + [HumanMessage(content=message)]}
-            result = agent.invoke(inputs)
+            inputs = self._build_inputs(message, history)
+            result = await llm_gateway.ainvoke(
+                self._agent,
+                inputs,
+                call_site="agent_chat",
+                estimated_tokens=llm_gateway.estimate(SYSTEM_PROMPT + str(inputs)),
+                config=self._config(conversation_id),
+            )
 
             if isinstance(result, dict) and "messages" in result:
                 messages = result["messages"]
@@ -108,9 +125,67 @@ class FeedbackAgent:
             }
 
         except Exception as e:
+            LLM_FALLBACKS.labels("agent_chat").inc()
             return {
                 "response": "I had trouble scanning the database. Please try again.",
                 "tools_used": [],
                 "success": False,
                 "error": str(e),
             }
+
+    async def stream_chat(
+        self,
+        message: str,
+        conversation_id: Optional[str],
+        history: List[Dict] = [],
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming chat: yields ``("token", text)`` and ``("tool", name)``
+        as the agent works, then ``("done", result)`` shaped like ``chat()``.
+
+        Tokens from a turn that ends in tool calls are superseded by the next
+        turn; the ``done`` result holds only the final answer.
+        """
+        inputs = self._build_inputs(message, history)
+        answer = ""
+        tools_used = []
+        try:
+            async for chunk, metadata in llm_gateway.astream(
+                self._agent,
+                inputs,
+                call_site="agent_chat",
+                estimated_tokens=llm_gateway.estimate(SYSTEM_PROMPT + str(inputs)),
+                config=self._config(conversation_id),
+                stream_mode="messages",
+            ):
+                if isinstance(chunk, ToolMessage):
+                    answer = ""
+                    continue
+                if isinstance(chunk, AIMessageChunk):
+                    calls = chunk.tool_call_chunks
+                elif isinstance(chunk, AIMessage):
+                    # Models that do not stream emit each turn whole
+                    calls = chunk.tool_calls
+                else:
+                    continue
+                for call in calls or []:
+                    if call.get("name"):
+                        tools_used.append(call["name"])
+                        yield "tool", call["name"]
+                if isinstance(chunk.content, str) and chunk.content:
+                    answer += chunk.content
+                    yield "token", chunk.content
+        except Exception as e:
+            LLM_FALLBACKS.labels("agent_chat").inc()
+            yield "done", {
+                "response": "I had trouble scanning the database. Please try again.",
+                "tools_used": [],
+                "success": False,
+                "error": str(e),
+            }
+            return
+
+        yield "done", {
+            "response": answer,
+            "tools_used": list(set(tools_used)),
+            "success": True,
+        }
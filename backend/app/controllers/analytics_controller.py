@@ -1,54 +1,121 @@
-from fastapi import APIRouter, Depends
-from app.dependencies.auth import get_current_user
+import hashlib
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, Request, Response
+from app.dependencies.auth import get_read_principal
 from app.dependencies.services import get_analytics_service, get_chat_service
 from app.services.analytics_service import AnalyticsService
 from app.services.chat_service import ChatService
-from app.models.user import UserInDB
+from app.models.user import UserInDB, TokenPrincipal
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+# Bump when a response shape changes so clients drop bodies cached under
+# the old one even though the data version did not move.
+ETAG_SCHEMA = "1"
+
+
+def _etag(user_id: str, resource: str, version: int) -> str:
+    # Weak: bodies for one version are equivalent, not byte-identical (the
+    # summary's last_updated is the time it was built)
+    tag = f"{ETAG_SCHEMA}:{user_id}:{resource}:{version}"
+    return 'W/"' + hashlib.sha256(tag.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _conditional(
+    request: Request, response: Response, etag: str
+) -> Optional[Response]:
+    """304 if the client already holds ``etag``; otherwise tag ``response``.
+
+    Every analytics response depends only on the user's data version, so
+    this runs before any computation.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if_none_match = request.headers.get("if-none-match", "")
+    # If-None-Match uses the weak comparison
+    candidates = {c.strip().removeprefix("W/") for c in if_none_match.split(",")}
+    if etag.removeprefix("W/") in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 
 @router.get("/summary")
 def get_analytics_summary(
-    current_user: UserInDB = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Union[UserInDB, TokenPrincipal] = Depends(get_read_principal),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ):
     user_id = str(current_user.id)
-    return analytics_service.get_analytics_summary(user_id)
+    version = analytics_service.data_version(user_id)
+    not_modified = _conditional(request, response, _etag(user_id, "summary", version))
+    if not_modified:
+        return not_modified
+    return analytics_service.get_analytics_summary(user_id, version=version)
 
 
 @router.get("/history")
 def get_analytics_history(
+    request: Request,
+    response: Response,
     limit: int = 10,
-    current_user: UserInDB = Depends(get_current_user),
+    current_user: Union[UserInDB, TokenPrincipal] = Depends(get_read_principal),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ):
     user_id = str(current_user.id)
-    return analytics_service.get_historical_analytics(user_id, limit=limit)
+    version = analytics_service.data_version(user_id)
+    not_modified = _conditional(
+        request, response, _etag(user_id, f"history:{limit}", version)
+    )
+    if not_modified:
+        return not_modified
+    return analytics_service.get_historical_analytics(
+        user_id, limit=limit, version=version
+    )
 
 
 @router.get("/themes")
 def get_theme_breakdown(
-    current_user: UserInDB = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Union[UserInDB, TokenPrincipal] = Depends(get_read_principal),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ):
     user_id = str(current_user.id)
-    return analytics_service.get_theme_breakdown(user_id)
+    version = analytics_service.data_version(user_id)
+    not_modified = _conditional(request, response, _etag(user_id, "themes", version))
+    if not_modified:
+        return not_modified
+    return analytics_service.get_theme_breakdown(user_id, version=version)
 
 
 @router.get("/recommendations")
 def get_recommendations(
-    current_user: UserInDB = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: Union[UserInDB, TokenPrincipal] = Depends(get_read_principal),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ):
     user_id = str(current_user.id)
-    return analytics_service.get_recommendations(user_id)
+    version = analytics_service.data_version(user_id)
+    not_modified = _conditional(
+        request, response, _etag(user_id, "recommendations", version)
+    )
+    if not_modified:
+        return not_modified
+    return analytics_service.get_recommendations(user_id, version=version)
 
 
 @router.get("/stats")
-def get_user_stats(
-    current_user: UserInDB = Depends(get_current_user),
+async def get_user_stats(
+    request: Request,
+    response: Response,
+    current_user: Union[UserInDB, TokenPrincipal] = Depends(get_read_principal),
     chat_service: ChatService = Depends(get_chat_service),
 ):
     user_id = str(current_user.id)
-    return chat_service.get_user_stats(user_id)
+    version = await chat_service.get_data_version(user_id)
+    not_modified = _conditional(request, response, _etag(user_id, "stats", version))
+    if not_modified:
+        return not_modified
+    return await chat_service.get_user_stats(user_id, version=version)
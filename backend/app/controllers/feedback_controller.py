@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
 from pydantic import BaseModel
-import csv
-import io
+import json
+import tempfile
+from app.core.config import settings
 from app.dependencies.auth import get_current_user
-from app.dependencies.services import get_chat_service
+from app.dependencies.services import get_chat_service, get_job_queue
 from app.services.chat_service import ChatService
+from app.services import sentiment
+from app.services.csv_ingest import CsvBudgetExceeded, spool_upload
+from app.services.job_service import JobQueue, is_finished, serialize_job
+from app.services.json_stream import JsonStreamError, iter_json_array, iter_ndjson
 from app.models.user import UserInDB
 import traceback
 
 router = APIRouter(prefix="/analyze", tags=["Feedback Analysis"])
 
+QUICK_SENTIMENT_CHUNK_SIZE = 1000
+# Bodies up to this size are spooled in memory, larger ones to a temp file
+QUICK_SENTIMENT_SPOOL_MEMORY_BYTES = 1024 * 1024
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -55,66 +66,146 @@ async def chat_analyze(
         }
 
 
-@router.post("/upload")
+@router.post("/chat/stream")
+async def chat_analyze_stream(
+    request: ChatRequest,
+    current_user: UserInDB = Depends(get_current_user),
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    """Server-sent-events variant of /chat.
+
+    Emits ``start``, then ``token``/``field``/``tool`` events while the model
+    is generating, and ``done`` with the /chat response body once the reply
+    has been saved. Failures end the stream with an ``error`` event.
+    """
+    if not request.message or not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+    async def events():
+        try:
+            async for event, data in chat_service.stream_message(
+                user_id=str(current_user.id),
+                message=request.message,
+                conversation_id=request.conversation_id,
+            ):
+                if event == "done":
+                    data = {
+                        "conversation_id": data["conversation_id"],
+                        "response": data["response"],
+                        "analysis": data.get("analysis"),
+                        "is_question": data.get("is_question", False),
+                    }
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception:
+            traceback.print_exc()
+            data = {
+                "detail": "I had trouble processing that request. "
+                "Please try rephrasing your question."
+            }
+            yield f"event: error\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/upload", status_code=202)
 async def upload_csv(
     file: UploadFile = File(...),
     conversation_id: Optional[str] = Form(None),
     current_user: UserInDB = Depends(get_current_user),
     chat_service: ChatService = Depends(get_chat_service),
+    job_queue: JobQueue = Depends(get_job_queue),
 ):
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
-    try:
-        content = await file.read()
-        decoded = content.decode("utf-8")
-        reader = csv.DictReader(io.StringIO(decoded))
-        feedback_columns = [
-            "review",
-            "feedback",
-            "text",
-            "comment",
-            "description",
-            "content",
-            "message",
-        ]
-        reviews = []
-        for row in reader:
-            for col in feedback_columns:
-                for key in row.keys():
-                    if col.lower() in key.lower():
-                        text = row[key].strip()
-                        if text and len(text) > 10:
-                            reviews.append(text)
-                        break
-        if not reviews:
-            reader = csv.DictReader(io.StringIO(decoded))
-            for row in reader:
-                for value in row.values():
-                    if isinstance(value, str) and len(value) > 20:
-                        reviews.append(value.strip())
-                        break
-        if not reviews:
-            raise HTTPException(
-                status_code=400,
-                detail="No valid feedback found in CSV. Ensure it has a column like 'review', 'feedback', or 'text'.",
-            )
-
-        analysis = await chat_service.process_csv_upload(
-            user_id=str(current_user.id),
-            feedbacks=reviews,
-            filename=file.filename,
-            conversation_id=conversation_id,
-        )
-        return analysis
-    except UnicodeDecodeError:
+    if file.size is not None and file.size > settings.CSV_MAX_BYTES:
         raise HTTPException(
-            status_code=400, detail="Invalid file encoding. Please use UTF-8."
+            status_code=413,
+            detail=f"CSV exceeds the {settings.CSV_MAX_BYTES} byte limit",
+        )
+    try:
+        path = await spool_upload(
+            file,
+            directory=settings.JOB_SPOOL_DIR or None,
+            max_bytes=settings.CSV_MAX_BYTES,
         )
-    except csv.Error as e:
-        raise HTTPException(status_code=400, detail=f"CSV parsing error: {str(e)}")
+    except CsvBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception:
         raise HTTPException(status_code=500, detail="Upload processing failed")
 
+    user_id = str(current_user.id)
+    if not conversation_id:
+        conversation_id = await chat_service.create_dataset_conversation(
+            user_id, file.filename
+        )
+    job = await job_queue.submit(
+        "csv_analysis",
+        user_id=user_id,
+        payload={
+            "path": path,
+            "filename": file.filename,
+            "conversation_id": conversation_id,
+        },
+    )
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "conversation_id": conversation_id,
+    }
+
+
+async def _get_user_job(job_id: str, user_id: str, job_queue: JobQueue) -> Dict:
+    job = await job_queue.get(job_id)
+    if not job or job.get("user_id") != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    current_user: UserInDB = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue),
+):
+    job = await _get_user_job(job_id, str(current_user.id), job_queue)
+    return serialize_job(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user: UserInDB = Depends(get_current_user),
+    job_queue: JobQueue = Depends(get_job_queue),
+):
+    user_id = str(current_user.id)
+    await _get_user_job(job_id, user_id, job_queue)
+
+    async def events():
+        last = None
+        while True:
+            job = await _get_user_job(job_id, user_id, job_queue)
+            data = serialize_job(job)
+            snapshot = (data["status"], data["stage"], data["progress"])
+            if snapshot != last:
+                last = snapshot
+                event = "progress"
+                if is_finished(job):
+                    event = "done" if job["status"] == "completed" else "error"
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+            if is_finished(job):
+                return
+            await job_queue.wait_for_update(job_id, timeout=1.0)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.get("/quick-sentiment")
 async def quick_sentiment(
@@ -123,52 +214,125 @@ async def quick_sentiment(
 
     if not text or not text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
-    text_lower = text.lower()
-    positive_words = [
-        "good",
-        "great",
-        "excellent",
-        "love",
-        "amazing",
-        "best",
-        "perfect",
-        "wonderful",
-        "clean",
-        "easy",
-        "smooth",
-        "fast",
-        "speed",
-        "smoothly",
-    ]
-    negative_words = [
-        "bad",
-        "terrible",
-        "slow",
-        "worst",
-        "hate",
-        "poor",
-        "broken",
-        "crash",
-        "disappointed",
-        "issue",
-        "bug",
-        "problem",
-        "expensive",
-        "battery",
-    ]
-    pos_count = sum(1 for word in positive_words if word in text_lower)
-    neg_count = sum(1 for word in negative_words if word in text_lower)
-    if pos_count > neg_count:
-        sentiment = "positive"
-        confidence = min(0.9, 0.5 + (pos_count * 0.1))
-    elif neg_count > pos_count:
-        sentiment = "negative"
-        confidence = min(0.9, 0.5 + (neg_count * 0.1))
+    result = sentiment.score(text)
+    # This endpoint has always answered positive/negative/neutral; "mixed"
+    # texts resolve to whichever side has more hits, as they did before.
+    if result.positive > result.negative:
+        label = "positive"
+    elif result.negative > result.positive:
+        label = "negative"
     else:
-        sentiment = "neutral"
-        confidence = 0.5
+        label = "neutral"
     return {
         "text": text[:100] + "..." if len(text) > 100 else text,
-        "sentiment": sentiment,
-        "confidence": confidence,
+        "sentiment": label,
+        "confidence": sentiment.confidence(result.positive, result.negative),
     }
+
+
+def _batch_item(index: int, item) -> Dict:
+    if isinstance(item, str):
+        return {"index": index, "text": item}
+    if isinstance(item, dict) and isinstance(item.get("text"), str):
+        entry = {"index": index, "text": item["text"]}
+        if "id" in item:
+            entry["id"] = item["id"]
+        return entry
+    return {"index": index, "error": "Expected a string or an object with 'text'"}
+
+
+async def _score_chunk(entries: List[Dict]) -> str:
+    valid = [e for e in entries if "error" not in e and e["text"].strip()]
+    scores = await run_in_threadpool(
+        sentiment.score_batch, [e["text"] for e in valid]
+    )
+    results = {}
+    for i, entry in enumerate(valid):
+        result = scores[i]
+        results[entry["index"]] = {
+            "sentiment": result.label,
+            "score": round(result.score, 4),
+            "confidence": sentiment.confidence(result.positive, result.negative),
+        }
+    lines = []
+    for entry in entries:
+        line = {"index": entry["index"]}
+        if "id" in entry:
+            line["id"] = entry["id"]
+        if entry["index"] in results:
+            line.update(results[entry["index"]])
+        else:
+            line["error"] = entry.get("error", "Text cannot be empty")
+        lines.append(json.dumps(line) + "\n")
+    return "".join(lines)
+
+
+async def _spool_body(request: Request, max_bytes: int):
+    """Read the whole request body into a temp file before responding.
+
+    The body must be consumed before the StreamingResponse starts: once it
+    runs, the server's disconnect listener reads from the same channel.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=QUICK_SENTIMENT_SPOOL_MEMORY_BYTES)
+    written = 0
+    try:
+        async for chunk in request.stream():
+            written += len(chunk)
+            if written > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Request body exceeds the {max_bytes} byte limit",
+                )
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def _read_spool(spool, chunk_size: int = 64 * 1024):
+    while True:
+        chunk = await run_in_threadpool(spool.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+@router.post("/quick-sentiment/batch")
+async def quick_sentiment_batch(
+    request: Request, current_user: UserInDB = Depends(get_current_user)
+):
+    """Score many texts in one request, streaming NDJSON results back.
+
+    The body is either a JSON array or NDJSON (``application/x-ndjson``),
+    one string or ``{"id": ..., "text": ...}`` object per item. It is
+    spooled (to disk past a small size) before the response starts, then
+    parsed incrementally and scored in chunks, so neither side is held in
+    memory whole. Each output line carries the item's ``index`` (and ``id``
+    if given).
+    """
+    content_type = request.headers.get("content-type", "")
+    parse = iter_ndjson if "ndjson" in content_type else iter_json_array
+    spool = await _spool_body(request, settings.QUICK_SENTIMENT_MAX_BYTES)
+
+    async def results():
+        chunk: List[Dict] = []
+        index = 0
+        try:
+            async for item in parse(_read_spool(spool)):
+                chunk.append(_batch_item(index, item))
+                index += 1
+                if len(chunk) >= QUICK_SENTIMENT_CHUNK_SIZE:
+                    yield await _score_chunk(chunk)
+                    chunk = []
+            if chunk:
+                yield await _score_chunk(chunk)
+        except JsonStreamError as e:
+            if chunk:
+                yield await _score_chunk(chunk)
+            yield json.dumps({"error": str(e), "items_read": index}) + "\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
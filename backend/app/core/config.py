@@ -7,8 +7,53 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_TTL_SECONDS: float = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
     GROQ_API_KEY: str
     FRONTEND_URL: str = "http://localhost:3000"
+    RUN_MIGRATIONS_ON_STARTUP: bool = True
+    CSV_MAX_BYTES: int = 200 * 1024 * 1024
+    CSV_MAX_ROWS: int = 1_000_000
+    CSV_BATCH_SIZE: int = 1000
+    QUICK_SENTIMENT_MAX_BYTES: int = 50 * 1024 * 1024
+    CSV_ANALYSIS_SAMPLE_SIZE: int = 5000
+    ANALYSIS_MODE: str = "sampled"
+    ANALYSIS_CHUNKED_MIN_ROWS: int = 80
+    ANALYSIS_CHUNK_TOKENS: int = 6000
+    ANALYSIS_CONCURRENCY: int = 4
+    ANALYSIS_INPUT_TOKEN_BUDGET: int = 4000
+    ANALYSIS_MAX_REVIEW_TOKENS: int = 250
+    THEME_TAGGING_ENABLED: bool = True
+    THEME_CLUSTERS: int = 12
+    THEME_VOCABULARY_SIZE: int = 2000
+    THEME_MIN_SIMILARITY: float = 0.2
+    ROW_CLASSIFY_BATCH_ROWS: int = 40
+    ROW_CLASSIFY_BATCH_TOKENS: int = 3000
+    ROW_CLASSIFY_RETRIES: int = 2
+    CSV_LLM_CLASSIFICATION: bool = False
+    ANALYTICS_CACHE_TTL_SECONDS: float = 30
+    ANALYTICS_CACHE_STALE_SECONDS: float = 300
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 10000
+    JOB_BACKEND: str = "mongo"
+    JOB_WORKERS: int = 2
+    JOB_LEASE_SECONDS: int = 300
+    JOB_SPOOL_DIR: str = ""
+    LLM_MODEL: str = "llama-3.3-70b-versatile"
+    LLM_PROVIDER: str = "groq"
+    LLM_CASSETTE_PATH: str = "llm_cassette.jsonl"
+    LLM_SIMULATED_LATENCY_SECONDS: float = 0.0
+    LLM_SIMULATED_SECONDS_PER_TOKEN: float = 0.0
+    LLM_REQUESTS_PER_MINUTE: int = 30
+    LLM_TOKENS_PER_MINUTE: int = 60000
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    LLM_CACHE_PATH: str = ""
+    AGENT_POOL_MAX_SIZE: int = 1000
+    AGENT_POOL_IDLE_SECONDS: int = 30 * 60
 
     class Config:
         env_file = ".env"
@@ -1,7 +1,17 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
-client = MongoClient(settings.MONGODB_URL)
+from app.core.metrics import mongo_command_listener
+client = MongoClient(settings.MONGODB_URL, event_listeners=[mongo_command_listener])
 database = client[settings.DATABASE_NAME]
 
+async_client = AsyncIOMotorClient(
+    settings.MONGODB_URL, event_listeners=[mongo_command_listener]
+)
+async_database = async_client[settings.DATABASE_NAME]
+
 def get_database():
     return database
+
+def get_async_database():
+    return async_database
@@ -0,0 +1,183 @@
+"""Prometheus metrics, exposed at ``/metrics`` in the text exposition format.
+
+- ``http_request_duration_seconds``, by route template, and
+  ``http_requests_in_progress`` (``MetricsMiddleware``);
+- ``llm_call_duration_seconds``, ``llm_prompt_tokens_total``,
+  ``llm_completion_tokens_total`` and ``llm_fallbacks_total``, by the
+  ``call_site`` passed to ``llm_gateway`` (``analyze_feedback``,
+  ``answer_question``, ``agent_chat``, ...);
+- ``mongo_command_duration_seconds``, by command name
+  (``MongoCommandListener``, given to both Mongo clients);
+- ``cache_hit_ratio`` and ``cache_entries``, read from each registered
+  cache's ``stats()`` at scrape time.
+
+Metrics are per process; with several workers, scrape each one.
+"""
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+)
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Model call latency through llm_gateway, including agent tool steps",
+    ["call_site", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, float("inf")),
+)
+LLM_PROMPT_TOKENS = Counter(
+    "llm_prompt_tokens_total", "Prompt tokens reported by the provider", ["call_site"]
+)
+LLM_COMPLETION_TOKENS = Counter(
+    "llm_completion_tokens_total",
+    "Completion tokens reported by the provider",
+    ["call_site"],
+)
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "Model failures answered with a locally built fallback",
+    ["call_site"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency as reported by the driver",
+    ["command", "outcome"],
+    buckets=(
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, float("inf")
+    ),
+)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request, labelled with its route template so path
+    parameters do not explode the label set."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Streaming responses are timed until their last chunk. The router
+            # records the matched route in the scope, which is only known once
+            # the request has been dispatched.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+            in_progress.dec()
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """Counts provider-reported tokens for every model call in a run."""
+
+    run_inline = True
+
+    def __init__(self, call_site: str):
+        self.call_site = call_site
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        prompt = completion = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    prompt += usage.get("input_tokens", 0)
+                    completion += usage.get("output_tokens", 0)
+        if prompt:
+            LLM_PROMPT_TOKENS.labels(self.call_site).inc(prompt)
+        if completion:
+            LLM_COMPLETION_TOKENS.labels(self.call_site).inc(completion)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "ok").observe(
+            event.duration_micros / 1e6
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "error").observe(
+            event.duration_micros / 1e6
+        )
+
+
+class CacheStatsCollector:
+    """Reads ``stats()`` of every registered cache when scraped."""
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        hit_ratio = GaugeMetricFamily(
+            "cache_hit_ratio", "Share of lookups answered from cache", labels=["cache"]
+        )
+        entries = GaugeMetricFamily(
+            "cache_entries", "Entries currently held", labels=["cache"]
+        )
+        for name, stats in self.sources.items():
+            try:
+                values = stats()
+            except Exception:
+                continue
+            hit_ratio.add_metric([name], values.get("hit_ratio", 0.0))
+            size = values.get("entries", values.get("live"))
+            if size is not None:
+                entries.add_metric([name], size)
+        yield hit_ratio
+        yield entries
+
+
+_cache_stats = CacheStatsCollector()
+REGISTRY.register(_cache_stats)
+
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    _cache_stats.sources[name] = stats
+
+
+def render() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+mongo_command_listener = MongoCommandListener()
@@ -0,0 +1,400 @@
+"""Versioned index bootstrap and data migrations.
+
+Run at startup (see ``RUN_MIGRATIONS_ON_STARTUP``) or from the command line:
+
+    python -m app.core.migrations migrate
+    python -m app.core.migrations status
+    python -m app.core.migrations report
+    python -m app.core.migrations check-plans
+    python -m app.core.migrations backfill-is-question
+    python -m app.core.migrations rebuild-rollups [--user-id ID]
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.database import Database
+from app.repositories.feedback_repository import is_question_like
+from app.repositories.data_versions import DATA_VERSION_COLLECTION
+from app.repositories.rollups import (
+    ROLLUP_COLLECTION,
+    ROLLUP_INDEXES,
+    rebuild_rollups,
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+
+# Compound indexes matching the access paths in FeedbackRepository,
+# AsyncFeedbackRepository, UserRepository and the agent feedback tools,
+# grouped by the migration that creates them. A migration's indexes never
+# change once released: new indexes go in a new group and a new migration.
+CORE_INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "feedbacks": [
+        # get_*_stats, get_feedback_count
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        # feedback tools: get_all_feedbacks / get_analytics_summary
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("conversation_id", ASCENDING),
+                ("created_at", DESCENDING),
+            ]
+        ),
+        # feedback tools: get_negative_feedbacks / get_positive_feedbacks
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("conversation_id", ASCENDING),
+                ("sentiment", ASCENDING),
+                ("created_at", DESCENDING),
+            ]
+        ),
+        # get_feedbacks_by_conversation
+        IndexModel([("conversation_id", ASCENDING)]),
+    ],
+    "analyses": [
+        # get_latest_analysis(user_id), get_user_analyses
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        # get_latest_analysis(user_id, conversation_id)
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("conversation_id", ASCENDING),
+                ("created_at", DESCENDING),
+            ]
+        ),
+    ],
+    "conversations": [
+        # get_user_conversations
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING)]),
+    ],
+    "messages": [
+        # get_conversation_messages
+        IndexModel([("conversation_id", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+}
+IS_QUESTION_INDEXES: Dict[str, List[IndexModel]] = {
+    "feedbacks": [
+        # get_user_feedbacks (question-like rows filtered server-side)
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("is_question", ASCENDING),
+                ("created_at", DESCENDING),
+            ]
+        ),
+    ],
+}
+JOB_INDEXES: Dict[str, List[IndexModel]] = {
+    "jobs": [
+        # JobRepository.list_resumable_jobs / claim_job
+        IndexModel([("status", ASCENDING), ("heartbeat_at", ASCENDING)]),
+    ],
+}
+DATA_VERSION_INDEXES: Dict[str, List[IndexModel]] = {
+    DATA_VERSION_COLLECTION: [
+        # get_data_version / version bumps
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+}
+
+# Every declared index, for the report command.
+INDEXES: Dict[str, List[IndexModel]] = {}
+for _group in (
+    CORE_INDEXES,
+    IS_QUESTION_INDEXES,
+    {ROLLUP_COLLECTION: ROLLUP_INDEXES},
+    JOB_INDEXES,
+    DATA_VERSION_INDEXES,
+):
+    for _collection, _indexes in _group.items():
+        INDEXES.setdefault(_collection, []).extend(_indexes)
+
+
+class HotQuery(NamedTuple):
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[tuple]] = None
+
+
+_SAMPLE_ID = ObjectId("000000000000000000000000")
+
+# Queries that must never fall back to a collection scan.
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery(
+        "get_user_feedbacks",
+        "feedbacks",
+        {"user_id": _SAMPLE_ID, "is_question": {"$ne": True}},
+        [("created_at", DESCENDING)],
+    ),
+    HotQuery(
+        "feedback_tools.get_all_feedbacks",
+        "feedbacks",
+        {"user_id": _SAMPLE_ID, "conversation_id": _SAMPLE_ID},
+        [("created_at", DESCENDING)],
+    ),
+    HotQuery(
+        "feedback_tools.get_negative_feedbacks",
+        "feedbacks",
+        {"user_id": _SAMPLE_ID, "conversation_id": _SAMPLE_ID, "sentiment": "negative"},
+        [("created_at", DESCENDING)],
+    ),
+    HotQuery(
+        "get_latest_analysis",
+        "analyses",
+        {"user_id": _SAMPLE_ID, "conversation_id": _SAMPLE_ID},
+        [("created_at", DESCENDING)],
+    ),
+    HotQuery(
+        "get_user_analyses",
+        "analyses",
+        {"user_id": _SAMPLE_ID},
+        [("created_at", DESCENDING)],
+    ),
+    HotQuery(
+        "get_user_conversations",
+        "conversations",
+        {"user_id": _SAMPLE_ID},
+        [("updated_at", DESCENDING)],
+    ),
+    HotQuery(
+        "get_conversation_messages",
+        "messages",
+        {"conversation_id": _SAMPLE_ID},
+        [("created_at", ASCENDING)],
+    ),
+]
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Database], None]
+
+
+def _create_indexes(db: Database, indexes: Dict[str, List[IndexModel]]) -> None:
+    for collection_name, models in indexes.items():
+        db[collection_name].create_indexes(models)
+
+
+def core_indexes(db: Database) -> None:
+    _create_indexes(db, CORE_INDEXES)
+
+
+def jobs_indexes(db: Database) -> None:
+    _create_indexes(db, JOB_INDEXES)
+
+
+def data_versions_index(db: Database) -> None:
+    _create_indexes(db, DATA_VERSION_INDEXES)
+
+
+def backfill_is_question(db: Database, batch_size: int = 1000) -> int:
+    """Tag feedback written before is_question existed. Returns rows updated.
+
+    Rows tagged as questions drop out of reads and rollups, so the rollups
+    of every user who had one are rebuilt, which also bumps their data
+    version.
+    """
+    collection = db["feedbacks"]
+    updated = 0
+    affected = set()
+    batch = []
+    cursor = collection.find(
+        {"is_question": {"$exists": False}}, {"content": 1, "user_id": 1}
+    )
+    for doc in cursor:
+        is_question = is_question_like(doc.get("content", ""))
+        if is_question:
+            affected.add(doc.get("user_id"))
+        batch.append(
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"is_question": is_question}})
+        )
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+
+    affected.discard(None)
+    if affected:
+        logger.info(f"Rebuilding rollups for {len(affected)} users with questions")
+    for user_id in affected:
+        rebuild_rollups(db, user_id=user_id, batch_size=batch_size)
+    return updated
+
+
+def _add_is_question(db: Database) -> None:
+    _create_indexes(db, IS_QUESTION_INDEXES)
+    backfill_is_question(db)
+
+
+def _add_rollups(db: Database) -> None:
+    db[ROLLUP_COLLECTION].create_indexes(ROLLUP_INDEXES)
+    rebuild_rollups(db)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create_core_indexes", core_indexes),
+    Migration(2, "feedbacks_is_question", _add_is_question),
+    Migration(3, "feedback_rollups", _add_rollups),
+    Migration(4, "jobs_indexes", jobs_indexes),
+    Migration(5, "data_versions_index", data_versions_index),
+]
+
+
+def get_applied_versions(db: Database) -> List[int]:
+    return sorted(doc["_id"] for doc in db[MIGRATIONS_COLLECTION].find({}, {"_id": 1}))
+
+
+def run_migrations(db: Database, target: Optional[int] = None) -> List[int]:
+    """Apply every pending migration up to ``target`` and return the versions run."""
+    applied = set(get_applied_versions(db))
+    ran = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if target is not None and migration.version > target:
+            break
+        if migration.version in applied:
+            continue
+        logger.info(f"Applying migration {migration.version}: {migration.name}")
+        migration.apply(db)
+        db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": migration.version},
+            {"$set": {"name": migration.name, "applied_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        ran.append(migration.version)
+    return ran
+
+
+def _index_key(keys) -> tuple:
+    return tuple((field, int(direction)) for field, direction in keys)
+
+
+def report_indexes(db: Database) -> Dict[str, Dict[str, List[str]]]:
+    """Compare declared indexes with what exists, and list indexes nobody uses."""
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        existing_keys = {_index_key(info["key"]): name for name, info in existing.items()}
+        declared_keys = {
+            _index_key(index.document["key"].items()): index.document["name"]
+            for index in indexes
+        }
+
+        missing = [
+            name for key, name in declared_keys.items() if key not in existing_keys
+        ]
+        undeclared = [
+            name
+            for key, name in existing_keys.items()
+            if key not in declared_keys and name != "_id_"
+        ]
+
+        unused = []
+        try:
+            for stat in collection.aggregate([{"$indexStats": {}}]):
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0:
+                    unused.append(stat["name"])
+        except Exception as e:
+            logger.warning(f"$indexStats unavailable for {collection_name}: {e}")
+
+        report[collection_name] = {
+            "missing": missing,
+            "undeclared": undeclared,
+            "unused": sorted(unused),
+        }
+    return report
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage")] if plan.get("stage") else []
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages.extend(_plan_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def check_query_plans(db: Database) -> Dict[str, List[str]]:
+    """Explain every hot query and return the winning-plan stages of each one."""
+    plans = {}
+    for query in HOT_QUERIES:
+        cursor = db[query.collection].find(query.filter)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+        explain = cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        plans[query.name] = _plan_stages(winning_plan)
+    return plans
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.database import get_database
+
+    parser = argparse.ArgumentParser(prog="python -m app.core.migrations")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    migrate = subcommands.add_parser("migrate", help="apply pending migrations")
+    migrate.add_argument("--target", type=int, default=None)
+    subcommands.add_parser("status", help="list applied and pending migrations")
+    subcommands.add_parser("report", help="report missing, undeclared and unused indexes")
+    subcommands.add_parser(
+        "check-plans", help="fail if a hot query falls back to COLLSCAN"
+    )
+    subcommands.add_parser(
+        "backfill-is-question", help="tag feedback rows missing is_question"
+    )
+    rebuild = subcommands.add_parser(
+        "rebuild-rollups",
+        help="re-derive analytics rollups from raw feedback; run with writes "
+        "quiesced, rows written meanwhile may be missed",
+    )
+    rebuild.add_argument("--user-id", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_database()
+
+    if args.command == "migrate":
+        ran = run_migrations(db, target=args.target)
+        print(json.dumps({"applied": ran}))
+        return 0
+    if args.command == "status":
+        applied = get_applied_versions(db)
+        pending = [m.version for m in MIGRATIONS if m.version not in applied]
+        print(json.dumps({"applied": applied, "pending": pending}))
+        return 0
+    if args.command == "report":
+        report = report_indexes(db)
+        print(json.dumps(report, indent=2))
+        return 1 if any(r["missing"] for r in report.values()) else 0
+    if args.command == "check-plans":
+        plans = check_query_plans(db)
+        scans = [name for name, stages in plans.items() if "COLLSCAN" in stages]
+        print(json.dumps({"plans": plans, "collscans": scans}, indent=2))
+        return 1 if scans else 0
+    if args.command == "backfill-is-question":
+        print(json.dumps({"updated": backfill_is_question(db)}))
+        return 0
+    if args.command == "rebuild-rollups":
+        print(json.dumps({"folded": rebuild_rollups(db, user_id=args.user_id)}))
+        return 0
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""TTL-bounded cache of authenticated users for ``get_current_user``.
+
+Entries are keyed by ``(user_id, token exp)`` and never outlive either
+``ttl_seconds`` or the token itself, so a request with a valid token is
+served without a users lookup. Writes to a user must call ``invalidate``
+(``UserRepository.update_user`` and its async twin do); a lookup that started
+before an invalidation is not stored. The cache is per process: another
+worker's copy goes stale for at most ``ttl_seconds``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from app.core.config import settings
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (user_id, exp) -> (expires_at, user)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._keys_by_user: Dict[str, Set[Tuple[str, Hashable]]] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; see put().
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, exp: Hashable) -> Optional[Any]:
+        key = (user_id, exp)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(
+        self, user_id: str, exp: Hashable, user: Any, generation: int
+    ) -> None:
+        """Store ``user`` unless an invalidation happened since ``generation``
+        was read, i.e. while the caller was loading it."""
+        lifetime = self.ttl_seconds
+        if isinstance(exp, (int, float)):
+            lifetime = min(lifetime, exp - time.time())
+        if lifetime <= 0:
+            return
+        key = (user_id, exp)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + lifetime, user)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: Tuple[str, Hashable]) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+)
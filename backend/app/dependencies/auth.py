@@ -1,18 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from bson import ObjectId
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.core.security import verify_token
-from app.repositories.user_repository import UserRepository
-from app.dependencies.services import get_user_repository
-from app.models.user import UserInDB
-from typing import Optional
+from app.repositories.async_user_repository import AsyncUserRepository
+from app.dependencies.services import get_async_user_repository
+from app.models.user import UserInDB, TokenPrincipal
+from typing import Optional, Union
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    user_repository: UserRepository = Depends(get_user_repository)
-) -> UserInDB:
-    token = credentials.credentials
-    payload = verify_token(token)
+def _token_claims(credentials: HTTPAuthorizationCredentials) -> dict:
+    payload = verify_token(credentials.credentials)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,10 +23,43 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
-    user = user_repository.find_by_id(user_id)
+    return payload
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_repository: AsyncUserRepository = Depends(get_async_user_repository)
+) -> UserInDB:
+    payload = _token_claims(credentials)
+    user_id = payload["user_id"]
+    exp = payload.get("exp")
+    user = principal_cache.get(user_id, exp)
+    if user is not None:
+        return user
+    generation = principal_cache.generation
+    user = await user_repository.find_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    principal_cache.put(user_id, exp, user, generation)
     return user
+
+async def get_read_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_repository: AsyncUserRepository = Depends(get_async_user_repository)
+) -> Union[UserInDB, TokenPrincipal]:
+    """For read-only routes that only need the caller's id.
+
+    With AUTH_TRUST_TOKEN_CLAIMS the signed claims are trusted as is, so a
+    deleted user keeps read access to their own data until the token expires.
+    """
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return await get_current_user(credentials, user_repository)
+    payload = _token_claims(credentials)
+    if not ObjectId.is_valid(payload["user_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+    return TokenPrincipal(id=payload["user_id"], email=payload.get("sub", ""))
@@ -1,4 +1,7 @@
-from app.core.database import get_database
+from app.core.database import get_database, get_async_database
 
 def get_db():
     return get_database()
+
+def get_async_db():
+    return get_async_database()
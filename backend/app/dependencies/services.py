@@ -1,15 +1,23 @@
-from app.core.database import get_database
+from app.core.database import get_database, get_async_database
 from app.repositories.feedback_repository import FeedbackRepository
 from app.repositories.user_repository import UserRepository
+from app.repositories.async_feedback_repository import AsyncFeedbackRepository
+from app.repositories.async_user_repository import AsyncUserRepository
+from app.repositories.job_repository import JobRepository, InMemoryJobRepository
+from app.core.config import settings
 from app.services.chat_service import ChatService
 from app.services.analytics_service import AnalyticsService
 from app.services.auth_service import AuthService
+from app.services.job_service import JobQueue
 
 _feedback_repo: FeedbackRepository = None
 _user_repo: UserRepository = None
+_async_feedback_repo: AsyncFeedbackRepository = None
+_async_user_repo: AsyncUserRepository = None
 _chat_service: ChatService = None
 _analytics_service: AnalyticsService = None
 _auth_service: AuthService = None
+_job_queue: JobQueue = None
 
 
 def get_feedback_repository() -> FeedbackRepository:
@@ -28,10 +36,26 @@ def get_user_repository() -> UserRepository:
     return _user_repo
 
 
+def get_async_feedback_repository() -> AsyncFeedbackRepository:
+    global _async_feedback_repo
+    if _async_feedback_repo is None:
+        db = get_async_database()
+        _async_feedback_repo = AsyncFeedbackRepository(db)
+    return _async_feedback_repo
+
+
+def get_async_user_repository() -> AsyncUserRepository:
+    global _async_user_repo
+    if _async_user_repo is None:
+        db = get_async_database()
+        _async_user_repo = AsyncUserRepository(db)
+    return _async_user_repo
+
+
 def get_chat_service() -> ChatService:
     global _chat_service
     if _chat_service is None:
-        feedback_repo = get_feedback_repository()
+        feedback_repo = get_async_feedback_repository()
         _chat_service = ChatService(feedback_repo)
     return _chat_service
 
@@ -52,5 +76,21 @@ def get_auth_service() -> AuthService:
     return _auth_service
 
 
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        if settings.JOB_BACKEND == "memory":
+            repository = InMemoryJobRepository()
+        else:
+            repository = JobRepository(get_async_database())
+        _job_queue = JobQueue(
+            repository,
+            workers=settings.JOB_WORKERS,
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+        )
+        _job_queue.register("csv_analysis", get_chat_service().run_csv_job)
+    return _job_queue
+
+
 def get_feedback_service() -> ChatService:
     return get_chat_service()
@@ -53,6 +53,13 @@ class FeedbackAnalysis(BaseModel):
     analyzed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+class RowClassification(BaseModel):
+    id: int = Field()
+    sentiment: str = Field()
+    score: float = Field(ge=0.0, le=1.0)
+    themes: List[str] = Field(default_factory=list)
+
+
 class QuestionResponse(BaseModel):
     answer: str = Field()
     supporting_data: Optional[Dict] = Field(default=None)
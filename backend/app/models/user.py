@@ -35,3 +35,9 @@ class UserInDB(BaseModel):
         arbitrary_types_allowed=True,
         json_encoders={ObjectId: str}
     )
+
+class TokenPrincipal(BaseModel):
+    """The caller as described by the signed token alone, without a users lookup."""
+    id: PyObjectId
+    email: str
+    model_config = ConfigDict(arbitrary_types_allowed=True)
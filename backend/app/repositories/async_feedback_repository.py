@@ -0,0 +1,426 @@
+from typing import Iterable, AsyncIterator, List, Optional, Dict, Any
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.models.feedback import FeedbackAnalysis
+from app.repositories.feedback_repository import is_question_like
+from app.repositories.data_versions import (
+    DATA_VERSION_COLLECTION,
+    build_version_bumps,
+    parse_version,
+    version_filter,
+)
+from app.repositories.rollups import (
+    ROLLUP_COLLECTION,
+    ROLLUP_FIELDS,
+    build_rollup_updates,
+    rollup_filter,
+)
+from app.repositories.pipelines import (
+    parse_rollup,
+    parse_user_stats,
+    rollup_pipeline,
+    user_stats_pipeline,
+)
+
+
+class AsyncFeedbackRepository:
+    """Motor-backed counterpart of FeedbackRepository for use inside async handlers."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.feedback_collection = db["feedbacks"]
+        self.analysis_collection = db["analyses"]
+        self.conversation_collection = db["conversations"]
+        self.message_collection = db["messages"]
+        self.rollup_collection = db[ROLLUP_COLLECTION]
+        self.version_collection = db[DATA_VERSION_COLLECTION]
+
+    async def create_feedback(
+        self,
+        user_id: str,
+        content: str,
+        sentiment: str = "neutral",
+        sentiment_score: float = 0.5,
+        themes: List[str] = None,
+        conversation_id: str = None,
+    ) -> Dict[str, Any]:
+        feedback_doc = {
+            "user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id,
+            "conversation_id": ObjectId(conversation_id)
+            if isinstance(conversation_id, str)
+            else conversation_id,
+            "content": content,
+            "sentiment": sentiment,
+            "sentiment_score": sentiment_score,
+            "themes": themes or [],
+            "is_question": is_question_like(content),
+            "created_at": datetime.utcnow(),
+        }
+        result = await self.feedback_collection.insert_one(feedback_doc)
+        feedback_doc["_id"] = result.inserted_id
+        await self._apply_rollups([feedback_doc])
+        await self._bump_data_version([feedback_doc["user_id"]])
+        return feedback_doc
+
+    async def bulk_create_feedbacks(self, feedbacks: List[Dict[str, Any]]) -> bool:
+        if not feedbacks:
+            return False
+
+        # Ensure ObjectIds and timestamps are added if missing
+        now = datetime.utcnow()
+        for fb in feedbacks:
+            if "user_id" in fb and isinstance(fb["user_id"], str):
+                fb["user_id"] = ObjectId(fb["user_id"])
+            if "conversation_id" in fb and isinstance(fb["conversation_id"], str):
+                fb["conversation_id"] = ObjectId(fb["conversation_id"])
+            if "created_at" not in fb:
+                fb["created_at"] = now
+            if "themes" not in fb:
+                fb["themes"] = []
+            if "sentiment" not in fb:
+                fb["sentiment"] = "neutral"
+            if "sentiment_score" not in fb:
+                fb["sentiment_score"] = 0.5
+            if "is_question" not in fb:
+                fb["is_question"] = is_question_like(fb.get("content", ""))
+
+        result = await self.feedback_collection.insert_many(feedbacks)
+        await self._apply_rollups(feedbacks)
+        await self._bump_data_version(fb.get("user_id") for fb in feedbacks)
+        return len(result.inserted_ids) > 0
+
+    async def _apply_rollups(self, feedback_docs: List[Dict[str, Any]]) -> None:
+        updates = build_rollup_updates(feedback_docs)
+        if updates:
+            await self.rollup_collection.bulk_write(updates, ordered=False)
+
+    async def _bump_data_version(self, user_ids: Iterable[Any]) -> None:
+        bumps = build_version_bumps(user_ids)
+        if bumps:
+            await self.version_collection.bulk_write(bumps, ordered=False)
+
+    async def get_data_version(self, user_id: str) -> int:
+        return parse_version(
+            await self.version_collection.find_one(version_filter(user_id))
+        )
+
+    async def get_rollup(
+        self, user_id: str, conversation_id: str = None
+    ) -> Optional[Dict[str, Any]]:
+        return await self.rollup_collection.find_one(
+            rollup_filter(user_id, conversation_id)
+        )
+
+    async def aggregate_rollup(
+        self, user_id: str, conversation_id: str = None
+    ) -> Dict[str, Any]:
+        cursor = self.feedback_collection.aggregate(
+            rollup_pipeline(user_id, conversation_id)
+        )
+        return parse_rollup(await cursor.to_list(length=None))
+
+    async def get_user_feedbacks(self, user_id: str, limit: int = None) -> List[Dict]:
+        query = {
+            "user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id,
+            "is_question": {"$ne": True},
+        }
+        cursor = self.feedback_collection.find(query).sort("created_at", -1)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def iter_upload_contents(
+        self, conversation_id: str, upload_id: str, batch_size: int = 1000
+    ) -> AsyncIterator[str]:
+        cursor = self.feedback_collection.find(
+            {
+                "conversation_id": ObjectId(conversation_id)
+                if isinstance(conversation_id, str)
+                else conversation_id,
+                "upload_id": upload_id,
+            },
+            {"content": 1, "_id": 0},
+        ).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc.get("content", "")
+
+    async def iter_upload_rows(
+        self, conversation_id: str, upload_id: str, batch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Like iter_upload_contents, but yields ``{"_id", "content"}`` docs."""
+        cursor = self.feedback_collection.find(
+            {
+                "conversation_id": ObjectId(conversation_id)
+                if isinstance(conversation_id, str)
+                else conversation_id,
+                "upload_id": upload_id,
+            },
+            {"content": 1},
+        ).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+
+    async def update_feedback_classifications(
+        self, updates: List[Dict[str, Any]]
+    ) -> int:
+        """Overwrite sentiment, score and themes of existing rows in bulk.
+
+        Each update carries ``_id``, ``sentiment``, ``sentiment_score`` and
+        ``themes``. Rollups are moved by the difference: the stored versions
+        are subtracted and the new ones added. Returns the rows modified.
+        """
+        if not updates:
+            return 0
+        fields = ("sentiment", "sentiment_score", "themes")
+        by_id = {update["_id"]: update for update in updates}
+        projection = dict.fromkeys(
+            ("user_id", "conversation_id", "content", "is_question") + fields, 1
+        )
+        old_docs = await self.feedback_collection.find(
+            {"_id": {"$in": list(by_id)}}, projection
+        ).to_list(length=None)
+        if not old_docs:
+            return 0
+
+        new_docs = []
+        writes = []
+        for old in old_docs:
+            values = {field: by_id[old["_id"]][field] for field in fields}
+            new_docs.append({**old, **values})
+            writes.append(UpdateOne({"_id": old["_id"]}, {"$set": values}))
+        result = await self.feedback_collection.bulk_write(writes, ordered=False)
+
+        rollup_updates = build_rollup_updates(
+            old_docs, sign=-1
+        ) + build_rollup_updates(new_docs)
+        if rollup_updates:
+            await self.rollup_collection.bulk_write(rollup_updates, ordered=True)
+        await self._bump_data_version(doc.get("user_id") for doc in old_docs)
+        return result.modified_count
+
+    async def get_feedback_by_id(self, feedback_id: str) -> Optional[Dict[str, Any]]:
+        return await self.feedback_collection.find_one({"_id": ObjectId(feedback_id)})
+
+    async def get_feedbacks_by_conversation(
+        self, conversation_id: str
+    ) -> List[Dict[str, Any]]:
+        cursor = self.feedback_collection.find({"conversation_id": conversation_id})
+        return await cursor.to_list(length=None)
+
+    async def delete_feedback(self, feedback_id: str) -> bool:
+        deleted = await self.feedback_collection.find_one_and_delete(
+            {"_id": ObjectId(feedback_id)},
+            dict.fromkeys(ROLLUP_FIELDS, 1),
+        )
+        if deleted is None:
+            return False
+        updates = build_rollup_updates([deleted], sign=-1, drop_examples=True)
+        if updates:
+            await self.rollup_collection.bulk_write(updates, ordered=False)
+        await self._bump_data_version([deleted.get("user_id")])
+        return True
+
+    async def save_analysis(
+        self,
+        user_id: str,
+        analysis: FeedbackAnalysis,
+        feedback_count: int,
+        conversation_id: str = None,
+    ) -> Dict[str, Any]:
+        analysis_doc = {
+            "user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id,
+            "conversation_id": ObjectId(conversation_id)
+            if isinstance(conversation_id, str)
+            else conversation_id,
+            "analysis": analysis.model_dump(),
+            "feedback_count": feedback_count,
+            "created_at": datetime.utcnow(),
+        }
+        result = await self.analysis_collection.insert_one(analysis_doc)
+        analysis_doc["_id"] = result.inserted_id
+        await self._bump_data_version([analysis_doc["user_id"]])
+        return analysis_doc
+
+    async def get_latest_analysis(
+        self, user_id: str, conversation_id: str = None
+    ) -> Optional[Dict[str, Any]]:
+        query = {"user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id}
+        if conversation_id:
+            query["conversation_id"] = (
+                ObjectId(conversation_id)
+                if isinstance(conversation_id, str)
+                else conversation_id
+            )
+        return await self.analysis_collection.find_one(
+            query, sort=[("created_at", -1)]
+        )
+
+    async def get_user_analyses(
+        self, user_id: str, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        cursor = (
+            self.analysis_collection.find(
+                {"user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id}
+            )
+            .sort("created_at", -1)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=None)
+
+    async def create_conversation(
+        self, user_id: str, title: str = "Feedback Analysis"
+    ) -> Dict[str, Any]:
+        conversation_doc = {
+            "user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id,
+            "title": title,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+        result = await self.conversation_collection.insert_one(conversation_doc)
+        conversation_doc["_id"] = result.inserted_id
+        return conversation_doc
+
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.conversation_collection.find_one(
+                {"_id": ObjectId(conversation_id)}
+            )
+        except Exception:
+            return None
+
+    async def get_user_conversations(
+        self, user_id: str, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        cursor = (
+            self.conversation_collection.find(
+                {"user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id}
+            )
+            .sort("updated_at", -1)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=None)
+
+    async def update_conversation(
+        self, conversation_id: str, title: str = None
+    ) -> bool:
+        update_doc = {"updated_at": datetime.utcnow()}
+        if title:
+            update_doc["title"] = title
+        try:
+            result = await self.conversation_collection.update_one(
+                {"_id": ObjectId(conversation_id)}, {"$set": update_doc}
+            )
+            return result.modified_count > 0
+        except Exception:
+            return False
+
+    async def create_message(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        metadata: Dict[str, Any] = None,
+    ) -> Dict[str, Any]:
+        message_doc = {
+            "conversation_id": ObjectId(conversation_id)
+            if isinstance(conversation_id, str)
+            else conversation_id,
+            "role": role,
+            "content": content,
+            "metadata": metadata,
+            "created_at": datetime.utcnow(),
+        }
+        result = await self.message_collection.insert_one(message_doc)
+        message_doc["_id"] = result.inserted_id
+
+        try:
+            await self.conversation_collection.update_one(
+                {"_id": ObjectId(conversation_id)},
+                {"$set": {"updated_at": datetime.utcnow()}},
+            )
+        except Exception:
+            pass
+
+        return message_doc
+
+    async def get_conversation_messages(
+        self, conversation_id: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        try:
+            cursor = (
+                self.message_collection.find(
+                    {
+                        "conversation_id": ObjectId(conversation_id)
+                        if isinstance(conversation_id, str)
+                        else conversation_id
+                    }
+                )
+                .sort("created_at", 1)
+                .limit(limit)
+            )
+            return await cursor.to_list(length=None)
+        except Exception:
+            return []
+
+    async def get_sentiment_stats(self, user_id: str) -> Dict[str, int]:
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": ObjectId(user_id)
+                    if isinstance(user_id, str)
+                    else user_id
+                }
+            },
+            {"$group": {"_id": "$sentiment", "count": {"$sum": 1}}},
+        ]
+        result = await self.feedback_collection.aggregate(pipeline).to_list(
+            length=None
+        )
+        stats = {"positive": 0, "neutral": 0, "negative": 0, "mixed": 0}
+        for item in result:
+            if item["_id"] in stats:
+                stats[item["_id"]] = item["count"]
+        return stats
+
+    async def get_theme_stats(self, user_id: str) -> List[Dict[str, Any]]:
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": ObjectId(user_id)
+                    if isinstance(user_id, str)
+                    else user_id
+                }
+            },
+            {"$unwind": "$themes"},
+            {"$group": {"_id": "$themes", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 10},
+        ]
+        return await self.feedback_collection.aggregate(pipeline).to_list(length=None)
+
+    async def get_feedback_count(self, user_id: str) -> int:
+        return await self.feedback_collection.count_documents(
+            {"user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id}
+        )
+
+    async def get_average_satisfaction(self, user_id: str) -> float:
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": ObjectId(user_id)
+                    if isinstance(user_id, str)
+                    else user_id
+                }
+            },
+            {"$group": {"_id": None, "avg_score": {"$avg": "$sentiment_score"}}},
+        ]
+        result = await self.feedback_collection.aggregate(pipeline).to_list(
+            length=None
+        )
+        return result[0]["avg_score"] if result else 0.5
+
+    async def get_user_stats(self, user_id: str) -> Dict[str, Any]:
+        cursor = self.feedback_collection.aggregate(user_stats_pipeline(user_id))
+        return parse_user_stats(await cursor.to_list(length=None))
@@ -0,0 +1,39 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.models.user import UserInDB
+from app.core.principal_cache import principal_cache
+from typing import Any, Dict, Optional
+from bson import ObjectId
+
+class AsyncUserRepository:
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.collection = database["users"]
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("email", unique=True)
+    async def create_user(self, user: UserInDB) -> UserInDB:
+        user_dict = user.model_dump(by_alias=True, exclude={"id"})
+        result = await self.collection.insert_one(user_dict)
+        user_dict["_id"] = result.inserted_id
+        return UserInDB(**user_dict)
+    async def find_by_email(self, email: str) -> Optional[UserInDB]:
+        user_data = await self.collection.find_one({"email": email})
+        if user_data:
+            return UserInDB(**user_data)
+        return None
+    async def find_by_id(self, user_id: str) -> Optional[UserInDB]:
+        try:
+            oid = ObjectId(user_id)
+        except Exception:
+            return None
+        user_data = await self.collection.find_one({"_id": oid})
+        if user_data:
+            return UserInDB(**user_data)
+        return None
+    async def update_user(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        try:
+            oid = ObjectId(user_id)
+        except Exception:
+            return False
+        result = await self.collection.update_one({"_id": oid}, {"$set": fields})
+        # Authenticated requests must not keep seeing the old document
+        principal_cache.invalidate(str(oid))
+        return result.matched_count > 0
@@ -0,0 +1,38 @@
+"""Per-user data version, bumped by every write that can change analytics.
+
+One document per user, incremented with ``$inc`` so the version only ever
+grows and every process sees the same value:
+
+    {"user_id": ObjectId, "version": int, "updated_at": datetime}
+
+Readers compare versions instead of recomputing: analytics results cached
+under an older version are stale.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+DATA_VERSION_COLLECTION = "data_versions"
+
+
+def version_filter(user_id: Any) -> Dict[str, Any]:
+    return {"user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id}
+
+
+def build_version_bumps(user_ids: Iterable[Any]) -> List[UpdateOne]:
+    now = datetime.utcnow()
+    unique = {version_filter(user_id)["user_id"] for user_id in user_ids if user_id}
+    return [
+        UpdateOne(
+            {"user_id": user_id},
+            {"$inc": {"version": 1}, "$set": {"updated_at": now}},
+            upsert=True,
+        )
+        for user_id in unique
+    ]
+
+
+def parse_version(doc: Optional[Dict[str, Any]]) -> int:
+    return doc.get("version", 0) if doc else 0
@@ -1,8 +1,44 @@
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 from datetime import datetime
 from pymongo.database import Database
 from bson import ObjectId
 from app.models.feedback import FeedbackAnalysis
+from app.repositories.data_versions import (
+    DATA_VERSION_COLLECTION,
+    build_version_bumps,
+    parse_version,
+    version_filter,
+)
+from app.repositories.rollups import (
+    ROLLUP_COLLECTION,
+    ROLLUP_FIELDS,
+    build_rollup_updates,
+    rollup_filter,
+)
+from app.repositories.pipelines import (
+    parse_rollup,
+    parse_user_stats,
+    rollup_pipeline,
+    user_stats_pipeline,
+)
+
+QUESTION_KEYWORDS = [
+    "what",
+    "how",
+    "should i",
+    "which",
+    "could you",
+    "tell me",
+    "?",
+]
+
+
+def is_question_like(content: str) -> bool:
+    """Short messages that read like a question to the assistant, not feedback."""
+    content = (content or "").lower()
+    return len(content) <= 100 and any(
+        keyword in content for keyword in QUESTION_KEYWORDS
+    )
 
 
 class FeedbackRepository:
@@ -12,6 +48,8 @@ class FeedbackRepository:
         self.analysis_collection = db["analyses"]
         self.conversation_collection = db["conversations"]
         self.message_collection = db["messages"]
+        self.rollup_collection = db[ROLLUP_COLLECTION]
+        self.version_collection = db[DATA_VERSION_COLLECTION]
 
     def create_feedback(
         self,
@@ -31,10 +69,13 @@ class FeedbackRepository:
             "sentiment": sentiment,
             "sentiment_score": sentiment_score,
             "themes": themes or [],
+            "is_question": is_question_like(content),
             "created_at": datetime.utcnow(),
         }
         result = self.feedback_collection.insert_one(feedback_doc)
         feedback_doc["_id"] = result.inserted_id
+        self._apply_rollups([feedback_doc])
+        self._bump_data_version([feedback_doc["user_id"]])
         return feedback_doc
 
     def bulk_create_feedbacks(self, feedbacks: List[Dict[str, Any]]) -> bool:
@@ -56,36 +97,53 @@ class FeedbackRepository:
                 fb["sentiment"] = "neutral"
             if "sentiment_score" not in fb:
                 fb["sentiment_score"] = 0.5
+            if "is_question" not in fb:
+                fb["is_question"] = is_question_like(fb.get("content", ""))
 
         result = self.feedback_collection.insert_many(feedbacks)
+        self._apply_rollups(feedbacks)
+        self._bump_data_version(fb.get("user_id") for fb in feedbacks)
         return len(result.inserted_ids) > 0
 
+    def _apply_rollups(self, feedback_docs: List[Dict[str, Any]]) -> None:
+        updates = build_rollup_updates(feedback_docs)
+        if updates:
+            self.rollup_collection.bulk_write(updates, ordered=False)
+
+    def _bump_data_version(self, user_ids: Iterable[Any]) -> None:
+        bumps = build_version_bumps(user_ids)
+        if bumps:
+            self.version_collection.bulk_write(bumps, ordered=False)
+
+    def get_data_version(self, user_id: str) -> int:
+        return parse_version(
+            self.version_collection.find_one(version_filter(user_id))
+        )
+
+    def get_rollup(
+        self, user_id: str, conversation_id: str = None
+    ) -> Optional[Dict[str, Any]]:
+        return self.rollup_collection.find_one(
+            rollup_filter(user_id, conversation_id)
+        )
+
+    def aggregate_rollup(
+        self, user_id: str, conversation_id: str = None
+    ) -> Dict[str, Any]:
+        result = self.feedback_collection.aggregate(
+            rollup_pipeline(user_id, conversation_id)
+        )
+        return parse_rollup(list(result))
+
     def get_user_feedbacks(self, user_id: str, limit: int = None) -> List[Dict]:
-        query = {"user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id}
+        query = {
+            "user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id,
+            "is_question": {"$ne": True},
+        }
         cursor = self.feedback_collection.find(query).sort("created_at", -1)
         if limit is not None:
             cursor = cursor.limit(limit)
-        feedbacks = list(cursor)
-
-        question_keywords = [
-            "what",
-            "how",
-            "should i",
-            "which",
-            "could you",
-            "tell me",
-            "?",
-        ]
-
-        filtered = []
-        for feedback in feedbacks:
-            content = feedback.get("content", "").lower()
-            if (
-                not any(keyword in content for keyword in question_keywords)
-                or len(content) > 100
-            ):
-                filtered.append(feedback)
-        return filtered
+        return list(cursor)
 
     def get_feedback_by_id(self, feedback_id: str) -> Optional[Dict[str, Any]]:
         return self.feedback_collection.find_one({"_id": ObjectId(feedback_id)})
@@ -96,8 +154,17 @@ class FeedbackRepository:
         return list(self.feedback_collection.find({"conversation_id": conversation_id}))
 
     def delete_feedback(self, feedback_id: str) -> bool:
-        result = self.feedback_collection.delete_one({"_id": ObjectId(feedback_id)})
-        return result.deleted_count > 0
+        deleted = self.feedback_collection.find_one_and_delete(
+            {"_id": ObjectId(feedback_id)},
+            dict.fromkeys(ROLLUP_FIELDS, 1),
+        )
+        if deleted is None:
+            return False
+        updates = build_rollup_updates([deleted], sign=-1, drop_examples=True)
+        if updates:
+            self.rollup_collection.bulk_write(updates, ordered=False)
+        self._bump_data_version([deleted.get("user_id")])
+        return True
 
     def save_analysis(
         self,
@@ -117,6 +184,7 @@ class FeedbackRepository:
         }
         result = self.analysis_collection.insert_one(analysis_doc)
         analysis_doc["_id"] = result.inserted_id
+        self._bump_data_version([analysis_doc["user_id"]])
         return analysis_doc
 
     def get_latest_analysis(
@@ -286,3 +354,7 @@ class FeedbackRepository:
         ]
         result = list(self.feedback_collection.aggregate(pipeline))
         return result[0]["avg_score"] if result else 0.5
+
+    def get_user_stats(self, user_id: str) -> Dict[str, Any]:
+        result = self.feedback_collection.aggregate(user_stats_pipeline(user_id))
+        return parse_user_stats(list(result))
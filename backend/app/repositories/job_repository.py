@@ -0,0 +1,130 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+ACTIVE_STATUSES = ["queued", "running"]
+TERMINAL_STATUSES = ["completed", "failed"]
+
+
+class JobRepository:
+    """Durable job store backed by the ``jobs`` collection."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db["jobs"]
+
+    async def create_job(self, job_doc: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self.collection.insert_one(job_doc)
+        job_doc["_id"] = result.inserted_id
+        return job_doc
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.collection.find_one({"_id": ObjectId(job_id)})
+        except Exception:
+            return None
+
+    async def update_job(self, job_id: str, fields: Dict[str, Any]) -> None:
+        await self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+
+    async def claim_job(
+        self, job_id: str, worker_id: str, lease_seconds: int
+    ) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(job_id),
+                "$or": [
+                    {"status": "queued"},
+                    {
+                        "status": "running",
+                        "heartbeat_at": {"$lt": now - timedelta(seconds=lease_seconds)},
+                    },
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "heartbeat_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def list_resumable_jobs(
+        self, lease_seconds: int, host: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Running jobs whose lease expired, and queued jobs submitted on
+        ``host`` (or by then waiting a whole lease, their host presumably
+        gone)."""
+        stale = datetime.utcnow() - timedelta(seconds=lease_seconds)
+        cursor = self.collection.find(
+            {
+                "$or": [
+                    {"status": "queued", "host": {"$in": [host, None]}},
+                    {"status": "queued", "updated_at": {"$lt": stale}},
+                    {"status": "running", "heartbeat_at": {"$lt": stale}},
+                ]
+            }
+        ).sort("created_at", 1)
+        return await cursor.to_list(length=None)
+
+
+class InMemoryJobRepository:
+    """Process-local job store with the same interface, for tests and local runs."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def create_job(self, job_doc: Dict[str, Any]) -> Dict[str, Any]:
+        job_doc["_id"] = job_doc.get("_id") or ObjectId()
+        self.jobs[str(job_doc["_id"])] = dict(job_doc)
+        return job_doc
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(str(job_id))
+        return dict(job) if job else None
+
+    async def update_job(self, job_id: str, fields: Dict[str, Any]) -> None:
+        if str(job_id) in self.jobs:
+            self.jobs[str(job_id)].update(fields)
+
+    async def claim_job(
+        self, job_id: str, worker_id: str, lease_seconds: int
+    ) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(str(job_id))
+        if not job or job["status"] in TERMINAL_STATUSES:
+            return None
+        now = datetime.utcnow()
+        if job["status"] == "running" and job.get("heartbeat_at") and (
+            job["heartbeat_at"] >= now - timedelta(seconds=lease_seconds)
+        ):
+            return None
+        job.update(
+            {
+                "status": "running",
+                "worker_id": worker_id,
+                "heartbeat_at": now,
+                "updated_at": now,
+                "attempts": job.get("attempts", 0) + 1,
+            }
+        )
+        return dict(job)
+
+    async def list_resumable_jobs(
+        self, lease_seconds: int, host: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        stale = datetime.utcnow() - timedelta(seconds=lease_seconds)
+        return [
+            dict(job)
+            for job in sorted(self.jobs.values(), key=lambda j: j["created_at"])
+            if (
+                job["status"] == "queued"
+                and (job.get("host") in (host, None) or job["updated_at"] < stale)
+            )
+            or (job["status"] == "running" and job.get("heartbeat_at", stale) < stale)
+        ]
@@ -0,0 +1,168 @@
+"""Single-round-trip ``$facet`` aggregations over the feedbacks collection.
+
+Requires MongoDB 3.6 or newer (``$facet``, ``$lookup`` with a sub-pipeline),
+below the 4.0 that current pymongo releases support anyway. ``benchmarks/pipeline_parity.py``
+checks these pipelines against the queries and rollups they replace.
+"""
+from typing import Any, Dict, List, Optional
+
+from app.repositories.rollups import (
+    MAX_THEME_EXAMPLES,
+    SENTIMENTS,
+    example_snippet,
+    rollup_filter,
+    theme_key,
+)
+
+
+def _sentiment_count(sentiment: str) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [{"$eq": ["$sentiment", sentiment]}, 1, 0]}}
+
+
+def user_stats_pipeline(user_id: Any, top_themes: int = 10) -> List[Dict[str, Any]]:
+    """Sentiment stats, top themes, count and average score in one aggregation."""
+    return [
+        {"$match": {"user_id": rollup_filter(user_id)["user_id"]}},
+        {
+            "$facet": {
+                "sentiments": [
+                    {"$group": {"_id": "$sentiment", "count": {"$sum": 1}}}
+                ],
+                "themes": [
+                    {"$unwind": "$themes"},
+                    {"$group": {"_id": "$themes", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": top_themes},
+                ],
+                "totals": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "count": {"$sum": 1},
+                            "avg_score": {"$avg": "$sentiment_score"},
+                        }
+                    }
+                ],
+            }
+        },
+    ]
+
+
+def parse_user_stats(result: List[Dict[str, Any]]) -> Dict[str, Any]:
+    facets = result[0] if result else {}
+    stats = {"positive": 0, "neutral": 0, "negative": 0, "mixed": 0}
+    for item in facets.get("sentiments", []):
+        if item["_id"] in stats:
+            stats[item["_id"]] = item["count"]
+    totals = facets.get("totals")
+    return {
+        "sentiment_distribution": stats,
+        "top_themes": facets.get("themes", []),
+        "total_feedbacks": totals[0]["count"] if totals else 0,
+        "average_satisfaction": totals[0]["avg_score"] if totals else 0.5,
+    }
+
+
+def rollup_pipeline(
+    user_id: Any,
+    conversation_id: Any = None,
+    top_themes: Optional[int] = None,
+    max_examples: int = MAX_THEME_EXAMPLES,
+) -> List[Dict[str, Any]]:
+    """Compute a feedback_rollups-shaped summary directly from the raw rows."""
+    match = {
+        "user_id": rollup_filter(user_id)["user_id"],
+        "is_question": {"$ne": True},
+    }
+    if conversation_id is not None:
+        match["conversation_id"] = rollup_filter(user_id, conversation_id)[
+            "conversation_id"
+        ]
+    themes_stages: List[Dict[str, Any]] = [
+        {"$unwind": "$themes"},
+        {
+            "$group": {
+                "_id": "$themes",
+                "count": {"$sum": 1},
+                **{s: _sentiment_count(s) for s in SENTIMENTS if s != "neutral"},
+            }
+        },
+        {"$sort": {"count": -1}},
+    ]
+    if top_themes is not None:
+        themes_stages.append({"$limit": top_themes})
+    # Pushing every row's content in the $group and slicing afterwards can
+    # hit the 100 MB group limit ($firstN would bound it, but needs MongoDB
+    # 5.2): fetch each theme's newest rows with a limited sub-pipeline.
+    themes_stages += [
+        {
+            "$lookup": {
+                "from": "feedbacks",
+                "let": {"theme": "$_id"},
+                "pipeline": [
+                    {
+                        "$match": {
+                            **match,
+                            "$expr": {
+                                "$in": ["$$theme", {"$ifNull": ["$themes", []]}]
+                            },
+                        }
+                    },
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": max_examples},
+                    {"$project": {"_id": 0, "content": 1}},
+                ],
+                "as": "examples",
+            }
+        },
+        {"$addFields": {"examples": "$examples.content"}},
+    ]
+    return [
+        {"$match": match},
+        {"$sort": {"created_at": -1}},
+        {
+            "$facet": {
+                "sentiments": [
+                    {"$group": {"_id": "$sentiment", "count": {"$sum": 1}}}
+                ],
+                "totals": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "count": {"$sum": 1},
+                            "score_sum": {"$sum": "$sentiment_score"},
+                        }
+                    }
+                ],
+                "themes": themes_stages,
+            }
+        },
+    ]
+
+
+def parse_rollup(result: List[Dict[str, Any]]) -> Dict[str, Any]:
+    facets = result[0] if result else {}
+    totals = facets.get("totals") or [{"count": 0, "score_sum": 0.0}]
+    total = totals[0]["count"]
+    counts = {s: 0 for s in SENTIMENTS}
+    for item in facets.get("sentiments", []):
+        if item["_id"] in counts:
+            counts[item["_id"]] = item["count"]
+    counts["other"] = total - sum(counts.values())
+
+    themes = {}
+    for item in facets.get("themes", []):
+        theme_counts = {s: item.get(s, 0) for s in SENTIMENTS if s != "neutral"}
+        theme_counts["neutral"] = item["count"] - sum(theme_counts.values())
+        name = str(item["_id"])
+        themes[theme_key(name)] = {
+            "name": name,
+            "counts": theme_counts,
+            "examples": [example_snippet(c or "") for c in item["examples"]],
+        }
+    return {
+        "total": total,
+        "score_sum": totals[0]["score_sum"],
+        "counts": counts,
+        "themes": themes,
+    }
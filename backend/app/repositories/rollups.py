@@ -0,0 +1,232 @@
+"""Incrementally maintained analytics rollups for the feedbacks collection.
+
+One document per user (``conversation_id: None``) and one per conversation,
+updated with ``$inc`` whenever feedback is written:
+
+    {
+        "user_id": ObjectId, "conversation_id": ObjectId | None,
+        "total": int, "score_sum": float,
+        "counts": {"positive": int, "neutral": int, "negative": int,
+                   "mixed": int, "other": int},
+        "themes": {<key>: {"name": str,
+                           "counts": {"positive": int, ...},
+                           "examples": [str, ...]}},
+    }
+
+Question-like rows (``is_question: true``) are not rolled up, matching
+``FeedbackRepository.get_user_feedbacks``.
+"""
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReplaceOne, UpdateOne
+from pymongo.database import Database
+
+from app.repositories.data_versions import DATA_VERSION_COLLECTION, build_version_bumps
+
+ROLLUP_COLLECTION = "feedback_rollups"
+ROLLUP_INDEXES = [
+    # get_rollup / rollup upserts
+    IndexModel([("user_id", ASCENDING), ("conversation_id", ASCENDING)], unique=True),
+]
+SENTIMENTS = ("positive", "neutral", "negative", "mixed")
+MAX_THEME_EXAMPLES = 3
+# The feedback fields build_rollup_updates reads.
+ROLLUP_FIELDS = (
+    "user_id",
+    "conversation_id",
+    "content",
+    "sentiment",
+    "sentiment_score",
+    "themes",
+    "is_question",
+)
+
+
+def theme_key(theme: str) -> str:
+    # Theme names are free text; hash them so they are always valid field names.
+    return hashlib.sha1(theme.encode("utf-8")).hexdigest()[:16]
+
+
+def example_snippet(content: str) -> str:
+    return content[:100] + "..." if len(content) > 100 else content
+
+
+def _rollup_scopes(doc: Dict[str, Any]) -> List[Tuple[Any, Any]]:
+    scopes = [(doc.get("user_id"), None)]
+    if doc.get("conversation_id") is not None:
+        scopes.append((doc.get("user_id"), doc["conversation_id"]))
+    return scopes
+
+
+def build_rollup_updates(
+    feedback_docs: List[Dict[str, Any]], sign: int = 1, drop_examples: bool = False
+) -> List[UpdateOne]:
+    """Fold a batch of feedback documents into one upsert per rollup document.
+
+    ``sign=-1`` subtracts the documents instead, e.g. the old versions of
+    rows being reclassified. Theme examples are only added, unless
+    ``drop_examples`` is set with ``sign=-1`` for rows being deleted: their
+    snippets are then pulled (along with any identical snippet).
+    """
+    scopes: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for doc in feedback_docs:
+        if doc.get("is_question"):
+            continue
+        sentiment = doc.get("sentiment", "neutral")
+        content = doc.get("content", "")
+        for scope in _rollup_scopes(doc):
+            acc = scopes.setdefault(
+                scope, {"inc": {}, "names": {}, "examples": {}, "dropped": {}}
+            )
+            inc = acc["inc"]
+            inc["total"] = inc.get("total", 0) + sign
+            inc["score_sum"] = inc.get("score_sum", 0.0) + sign * doc.get(
+                "sentiment_score", 0.5
+            )
+            count_field = (
+                f"counts.{sentiment}" if sentiment in SENTIMENTS else "counts.other"
+            )
+            inc[count_field] = inc.get(count_field, 0) + sign
+
+            theme_sentiment = sentiment if sentiment in SENTIMENTS else "neutral"
+            for theme in doc.get("themes", []):
+                key = theme_key(theme)
+                field = f"themes.{key}.counts.{theme_sentiment}"
+                inc[field] = inc.get(field, 0) + sign
+                acc["names"][key] = theme
+                if sign < 0:
+                    if drop_examples:
+                        acc["dropped"].setdefault(key, []).append(
+                            example_snippet(content)
+                        )
+                    continue
+                examples = acc["examples"].setdefault(key, [])
+                examples.append(example_snippet(content))
+                if len(examples) > MAX_THEME_EXAMPLES:
+                    examples.pop(0)
+
+    now = datetime.utcnow()
+    updates = []
+    for (user_id, conversation_id), acc in scopes.items():
+        set_fields = {f"themes.{key}.name": name for key, name in acc["names"].items()}
+        set_fields["updated_at"] = now
+        update = {"$inc": acc["inc"], "$set": set_fields}
+        if acc["examples"]:
+            # Newest first, bounded, like the examples built from get_user_feedbacks.
+            update["$push"] = {
+                f"themes.{key}.examples": {
+                    "$each": list(reversed(examples)),
+                    "$position": 0,
+                    "$slice": MAX_THEME_EXAMPLES,
+                }
+                for key, examples in acc["examples"].items()
+            }
+        if acc["dropped"]:
+            update["$pull"] = {
+                f"themes.{key}.examples": {"$in": snippets}
+                for key, snippets in acc["dropped"].items()
+            }
+        updates.append(
+            UpdateOne(
+                {"user_id": user_id, "conversation_id": conversation_id},
+                update,
+                upsert=True,
+            )
+        )
+    return updates
+
+
+def rollup_filter(user_id: Any, conversation_id: Any = None) -> Dict[str, Any]:
+    return {
+        "user_id": ObjectId(user_id) if isinstance(user_id, str) else user_id,
+        "conversation_id": ObjectId(conversation_id)
+        if isinstance(conversation_id, str)
+        else conversation_id,
+    }
+
+
+def rebuild_rollups(
+    db: Database, user_id: Optional[str] = None, batch_size: int = 1000
+) -> int:
+    """Re-derive rollups from the raw feedbacks. Returns the rows folded in.
+
+    Rollups are folded into a scratch collection and only then swapped in
+    (renamed over the live one, or per user replaced document by document),
+    so readers never see a partial rebuild and no row is counted twice. A
+    row written while the rebuild runs may still be missed, because its
+    ``$inc`` lands in the documents being replaced: run it with writes
+    quiesced.
+
+    The data version of every user whose rollups were replaced is bumped
+    afterwards, so analytics cached from the old rollups are not served.
+    """
+    rollups = db[ROLLUP_COLLECTION]
+    scratch = db[f"{ROLLUP_COLLECTION}_rebuild_{ObjectId()}"]
+    scratch.create_indexes(ROLLUP_INDEXES)
+    query: Dict[str, Any] = {"is_question": {"$ne": True}}
+    if user_id:
+        query["user_id"] = ObjectId(user_id) if isinstance(user_id, str) else user_id
+
+    try:
+        folded = _fold_into(scratch, db["feedbacks"], query, batch_size)
+        if not user_id:
+            # Users whose rollups disappear are affected as much as new ones
+            touched = set(rollups.distinct("user_id")) | set(
+                scratch.distinct("user_id")
+            )
+            scratch.rename(ROLLUP_COLLECTION, dropTarget=True)
+            _bump_versions(db, touched)
+            return folded
+
+        rebuilt = list(scratch.find({}, {"_id": 0}))
+        writes = [
+            ReplaceOne(
+                {"user_id": doc["user_id"], "conversation_id": doc["conversation_id"]},
+                doc,
+                upsert=True,
+            )
+            for doc in rebuilt
+        ]
+        if writes:
+            rollups.bulk_write(writes, ordered=False)
+        rollups.delete_many(
+            {
+                "user_id": query["user_id"],
+                "conversation_id": {
+                    "$nin": [doc["conversation_id"] for doc in rebuilt]
+                },
+            }
+        )
+        _bump_versions(db, [query["user_id"]])
+        return folded
+    finally:
+        scratch.drop()
+
+
+def _bump_versions(db: Database, user_ids: Iterable[Any]) -> None:
+    bumps = build_version_bumps(user_ids)
+    if bumps:
+        db[DATA_VERSION_COLLECTION].bulk_write(bumps, ordered=False)
+
+
+def _fold_into(rollups, feedbacks, query: Dict[str, Any], batch_size: int) -> int:
+    # Oldest first so the newest examples end up at the front of each list.
+    cursor = feedbacks.find(query, dict.fromkeys(ROLLUP_FIELDS, 1)).sort(
+        "created_at", 1
+    )
+    folded = 0
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            rollups.bulk_write(build_rollup_updates(batch), ordered=True)
+            folded += len(batch)
+            batch = []
+    updates = build_rollup_updates(batch)
+    if updates:
+        rollups.bulk_write(updates, ordered=True)
+        folded += len(batch)
+    return folded
@@ -1,6 +1,7 @@
 from pymongo.database import Database
 from app.models.user import UserInDB
-from typing import Optional
+from app.core.principal_cache import principal_cache
+from typing import Any, Dict, Optional
 from bson import ObjectId
 
 class UserRepository:
@@ -26,3 +27,12 @@ class UserRepository:
         if user_data:
             return UserInDB(**user_data)
         return None
+    def update_user(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        try:
+            oid = ObjectId(user_id)
+        except Exception:
+            return False
+        result = self.collection.update_one({"_id": oid}, {"$set": fields})
+        # Authenticated requests must not keep seeing the old document
+        principal_cache.invalidate(str(oid))
+        return result.matched_count > 0
@@ -1,23 +1,55 @@
-from typing import List, Dict
-from langchain_groq import ChatGroq
+import asyncio
+import logging
+import random
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.outputs import Generation
 from app.core.config import settings
+from app.core.metrics import LLM_FALLBACKS
 from app.models.feedback import (
     FeedbackAnalysis,
+    RowClassification,
     SentimentDistribution,
 )
+from app.services.analysis_merge import merge_analyses
+from app.services.llm_cache import cache_key, llm_cache, schema_version
+from app.services.llm_gateway import llm_gateway
+from app.services.sentiment import LABELS, STRATA, score_batch, stratum_batch
+from app.services.prompt_packer import (
+    ITEM_OVERHEAD_TOKENS,
+    pack_reviews,
+    truncate_to_tokens,
+)
+from app.services.sampling import StratifiedReservoirSampler
+from app.services.tokens import TokenChunker, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Reviews are scored for stratification this many at a time.
+SAMPLE_BATCH_SIZE = 1000
+SENTIMENT_LABELS = set(LABELS.tolist())
 
 
 class AIService:
     def __init__(self):
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            api_key=settings.GROQ_API_KEY,
-            temperature=0.1,
-            max_tokens=6000,
-        )
+        self.llm = llm_gateway.chat_model(temperature=0.1, max_tokens=6000)
         self.parser = PydanticOutputParser(pydantic_object=FeedbackAnalysis)
+        self.schema_version = schema_version(FeedbackAnalysis)
         self.analysis_prompt = ChatPromptTemplate.from_template(
             """You are a product feedback analyst. Analyze the following customer feedback and return a complete JSON response.
 
@@ -72,6 +104,82 @@ RULES:
 {format_instructions}"""
         )
 
+        self.chunk_prompt = ChatPromptTemplate.from_template(
+            """You are a product feedback analyst. The reviews below are ONE CHUNK of a larger dataset.
+Analyze ONLY these reviews and return structured data.
+
+REVIEWS IN THIS CHUNK ({feedback_count} total):
+{feedbacks}
+
+RULES:
+- 'sentiment_distribution' counts must sum to exactly {feedback_count}.
+- Each theme 'count' is the number of reviews in this chunk that mention it.
+- Put 1-3 short verbatim quotes from these reviews in each theme's 'examples'.
+- 'affected_users' is the number of reviews in this chunk that motivate the suggestion.
+- 'chat_response' must be ONE short sentence; the full report is written later.
+- Return ONLY valid JSON matching the schema below.
+
+{format_instructions}"""
+        )
+
+        self.narrative_prompt = ChatPromptTemplate.from_template(
+            """You are a product feedback analyst. Every one of {feedback_count} customer reviews has
+already been analyzed. Write the final report from the aggregated results below.
+
+AGGREGATED RESULTS:
+- Overall sentiment: {overall_sentiment} ({satisfaction}% satisfaction)
+- Sentiment distribution: {sentiment_dist}
+- Themes (count, sentiment, example quotes):
+{themes}
+- Recommended actions:
+{features}
+
+RESPONSE FORMAT RULES:
+1. Use markdown headers (###, **) and bullet points.
+2. Use emojis (✅, 🟠, 🟢, 🔴, ❌, ⚠️) for visual clarity.
+3. Quote the example quotes above where relevant. Do not invent quotes.
+4. NO preamble. Start directly with the summary line.
+
+TEMPLATE (write every section completely):
+"Analyzed {feedback_count} feedbacks. [Sentiment] sentiment ([X]% satisfaction).
+
+**Key Insights:**
+- [Emoji] **Strengths:** ...
+- [Emoji] **Weaknesses:** ...
+
+**Detailed Analysis:**
+✅/❌ [Theme]: [Summary] - "[Quote]"
+
+**Priority Actions:**
+🔴 **CRITICAL:** [Title]
+   Issue: ...
+   Impact: ...
+   Action: ...
+
+🟢 **MAINTAIN:** [Positive area to keep stable]
+
+**Expected Impact:**
+[2-3 sentence summary]"
+
+Return only the report text."""
+        )
+
+        self.classify_prompt = ChatPromptTemplate.from_template(
+            """Classify each customer feedback row below on its own.
+
+ROWS ({row_count} total, one per line as <id>: <text>):
+{rows}
+
+Return ONLY a JSON array with exactly one object per row and no other text:
+[{{"id": <row id>, "s": "<positive|neutral|negative|mixed>", "p": <satisfaction 0.0-1.0>, "t": ["<theme>", ...]}}]
+
+RULES:
+- "s" is the row's sentiment; use "mixed" when it both praises and complains.
+- "p" is how satisfied the writer is: 0.0 furious, 0.5 indifferent, 1.0 delighted.
+- "t" holds 0-3 short Title Case themes the row is about, e.g. "Delivery Speed".
+- Reuse the same theme name for the same topic across rows."""
+        )
+
         self.question_prompt = ChatPromptTemplate.from_template(
             """You are a senior product analyst answering a PRODUCT MANAGER'S question about customer feedback data.
 PRODUCT MANAGER'S QUESTION:
@@ -103,103 +211,318 @@ CRITICAL RULES:
 Return a clear, structured, and long-form response."""
         )
 
-    def analyze_feedback(
-        self, reviews: List[str], history: List[Dict[str, str]] = []
-    ) -> FeedbackAnalysis:
-        feedback_count = len(reviews)
-
-        # For large datasets, sample intelligently to fit within context window
-        # while preserving statistical representativeness
-        MAX_SAMPLES = 80
-        if feedback_count > MAX_SAMPLES:
-            import random
-
-            random.seed(42)  # deterministic sampling
-
-            # Stratified sampling: get negative, positive, and neutral samples
-            neg_keywords = [
-                "bad",
-                "terrible",
-                "slow",
-                "worst",
-                "hate",
-                "poor",
-                "broken",
-                "crash",
-                "issue",
-                "problem",
-                "unusable",
-                "awful",
-            ]
-            pos_keywords = [
-                "good",
-                "great",
-                "excellent",
-                "love",
-                "amazing",
-                "best",
-                "perfect",
-                "fast",
-                "smooth",
-                "easy",
-            ]
-
-            negatives = [
-                r for r in reviews if any(w in r.lower() for w in neg_keywords)
-            ]
-            positives = [
-                r for r in reviews if any(w in r.lower() for w in pos_keywords)
-            ]
-            neutrals = [r for r in reviews if r not in negatives and r not in positives]
-
-            n_neg = min(len(negatives), 30)
-            n_pos = min(len(positives), 30)
-            n_neu = max(0, MAX_SAMPLES - n_neg - n_pos)
-            n_neu = min(n_neu, len(neutrals))
-
-            sampled = (
-                random.sample(negatives, n_neg)
-                + random.sample(positives, n_pos)
-                + random.sample(neutrals, n_neu)
+    def _stratified_sample(
+        self, reviews: Iterable[str]
+    ) -> Tuple[StratifiedReservoirSampler, int]:
+        """One pass over reviews, in memory bounded by the sample size.
+
+        Returns per-stratum reservoirs of ``(position, review)`` and the
+        estimated prompt tokens of the whole input. Every packed review costs
+        at least one token plus list overhead, so no stratum could ever
+        contribute more than ``budget // (1 + overhead)`` reviews to a prompt.
+        """
+        cap = settings.ANALYSIS_INPUT_TOKEN_BUDGET // (1 + ITEM_OVERHEAD_TOKENS)
+        sampler = StratifiedReservoirSampler({name: cap for name in STRATA.tolist()})
+        tokens = 0
+        cleaned = (c for c in map(self._clean_feedback, reviews) if c)
+        batch = list(islice(cleaned, SAMPLE_BATCH_SIZE))
+        while batch:
+            strata = stratum_batch(score_batch(batch)).tolist()
+            for stratum, review in zip(strata, batch):
+                sampler.add(stratum, (sampler.seen, review))
+                tokens += estimate_tokens(review) + ITEM_OVERHEAD_TOKENS
+            batch = list(islice(cleaned, SAMPLE_BATCH_SIZE))
+        return sampler, tokens
+
+    def _analysis_inputs(
+        self, reviews: Iterable[str], total_count: Optional[int] = None
+    ) -> Tuple[Dict, int]:
+        sampler, tokens = self._stratified_sample(reviews)
+        # total_count is set when reviews is already a sample of a larger upload
+        feedback_count = total_count if total_count is not None else sampler.seen
+
+        # Fill a token budget rather than a fixed number of reviews, so a few
+        # very long reviews cannot blow the context window and short ones are
+        # not left out when there is room for them.
+        budget = settings.ANALYSIS_INPUT_TOKEN_BUDGET
+        if sampler.seen > 1 and tokens > budget:
+            rng = random.Random(42)  # deterministic sampling
+
+            # Stratified sampling: negative, positive and neutral reviews are
+            # interleaved 3:3:2 until the budget is full
+            strata = {}
+            for name, reservoir in sampler.strata.items():
+                strata[name] = [review for _, review in reservoir]
+                rng.shuffle(strata[name])
+
+            packed = pack_reviews(
+                [
+                    ("negative", strata["negative"], 3),
+                    ("positive", strata["positive"], 3),
+                    ("neutral", strata["neutral"], 2),
+                ],
+                budget_tokens=budget,
+                max_review_tokens=settings.ANALYSIS_MAX_REVIEW_TOKENS,
             )
-            random.shuffle(sampled)
-            sample_note = f"(Showing {len(sampled)} representative samples out of {feedback_count} total)"
+            sampled = packed.reviews
+            rng.shuffle(sampled)
+            truncated = packed.truncated
         else:
-            sampled = reviews
-            sample_note = ""
-
+            # Everything fits, so no reservoir overflowed: keep input order
+            sampled = [review for _, review in sorted(sampler.items)]
+            truncated = 0
+            if len(sampled) == 1:
+                sampled[0], was_cut = truncate_to_tokens(sampled[0], budget)
+                truncated = int(was_cut)
+
+        sample_note = self._sample_note(len(sampled), feedback_count, truncated)
         if len(sampled) == 1:
             formatted_feedbacks = f'Single feedback:\n"{sampled[0]}"'
         else:
             formatted_feedbacks = f"Customer feedbacks {sample_note}:\n"
             for i, review in enumerate(sampled, 1):
-                clean_review = self._clean_feedback(review)
-                if clean_review:
-                    formatted_feedbacks += f'{i}. "{clean_review}"\n'
+                formatted_feedbacks += f'{i}. "{review}"\n'
+
+        inputs = {
+            "feedback_count": feedback_count,
+            "feedbacks": formatted_feedbacks,
+            "format_instructions": self.parser.get_format_instructions(),
+        }
+        return inputs, feedback_count
+
+    def _sample_note(self, shown: int, feedback_count: int, truncated: int) -> str:
+        parts = []
+        if shown < feedback_count:
+            coverage = shown / feedback_count * 100 if feedback_count else 100.0
+            parts.append(
+                f"Showing {shown} representative samples out of {feedback_count} "
+                f"total, {coverage:.1f}% coverage"
+            )
+        if truncated:
+            parts.append(f"{truncated} overly long review(s) shortened, marked [...]")
+        return f"({'; '.join(parts)})" if parts else ""
+
+    def _finalize_analysis(
+        self, result: FeedbackAnalysis, feedback_count: int
+    ) -> FeedbackAnalysis:
+        result.total_feedbacks_analyzed = feedback_count
+        result.is_question_response = False
+        return self._validate_and_enhance(result, feedback_count)
 
-        chain = self.analysis_prompt | self.llm | self.parser
+    async def analyze_feedback(
+        self,
+        reviews: List[str],
+        history: List[Dict[str, str]] = [],
+        total_count: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> FeedbackAnalysis:
+        inputs, feedback_count = self._analysis_inputs(reviews, total_count)
         try:
-            result = chain.invoke(
+            result = await self._invoke(
+                self.analysis_prompt,
+                inputs,
+                call_site="analyze_feedback",
+                use_cache=use_cache,
+            )
+            return self._finalize_analysis(result, feedback_count)
+        except Exception as e:
+            logger.warning(f"AI Analysis Error: {str(e)}")
+            LLM_FALLBACKS.labels("analyze_feedback").inc()
+            return self._create_fallback_analysis(reviews, total_count=feedback_count)
+
+    async def stream_feedback_analysis(
+        self,
+        reviews: List[str],
+        total_count: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming analyze_feedback.
+
+        Yields ``("field", {"name", "value"})`` as each top-level analysis field
+        becomes complete, ``("token", text)`` deltas of ``chat_response`` as
+        they arrive, and finally ``("analysis", FeedbackAnalysis)``. The final
+        analysis is authoritative: post-processing may adjust the streamed text.
+        """
+        inputs, feedback_count = self._analysis_inputs(reviews, total_count)
+        key = self._cache_key(self.analysis_prompt, inputs) if use_cache else None
+        cached = llm_cache.get(key, "analyze_feedback") if key else None
+        if cached is not None:
+            for name, value in cached.model_dump(mode="json").items():
+                if name == "chat_response":
+                    yield "token", value
+                else:
+                    yield "field", {"name": name, "value": value}
+            yield "analysis", self._finalize_analysis(cached, feedback_count)
+            return
+
+        chain = self.analysis_prompt | self.llm | JsonOutputParser()
+        partial: Dict = {}
+        emitted = set()
+        streamed = ""
+        try:
+            async for partial in llm_gateway.astream(
+                chain, inputs, call_site="analyze_feedback"
+            ):
+                if not isinstance(partial, dict):
+                    continue
+                # Every key but the last one being written is complete.
+                for name in list(partial)[:-1]:
+                    if name not in emitted and name != "chat_response":
+                        emitted.add(name)
+                        yield "field", {"name": name, "value": partial[name]}
+                response = partial.get("chat_response")
+                if isinstance(response, str) and len(response) > len(streamed):
+                    yield "token", response[len(streamed) :]
+                    streamed = response
+            result = FeedbackAnalysis.model_validate(partial)
+        except Exception as e:
+            logger.warning(f"AI Analysis Error: {str(e)}")
+            LLM_FALLBACKS.labels("analyze_feedback").inc()
+            yield "analysis", self._create_fallback_analysis(
+                reviews, total_count=feedback_count
+            )
+            return
+
+        if key:
+            llm_cache.set(key, result)
+        yield "analysis", self._finalize_analysis(result, feedback_count)
+
+    async def analyze_feedback_chunked(
+        self,
+        reviews: Union[Iterable[str], AsyncIterable[str]],
+        chunk_tokens: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        on_chunk: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        use_cache: bool = True,
+    ) -> FeedbackAnalysis:
+        """Analyze every review: map token-sized chunks concurrently, then merge.
+
+        Larger ``chunk_tokens`` means fewer LLM calls (faster, cheaper) but each
+        call sees more text and may summarize it more coarsely. At most
+        ``concurrency`` chunk calls are in flight, and reviews are read lazily
+        so only a bounded number of chunks is held in memory at once.
+        """
+        chunk_tokens = chunk_tokens or settings.ANALYSIS_CHUNK_TOKENS
+        concurrency = concurrency or settings.ANALYSIS_CONCURRENCY
+        semaphore = asyncio.Semaphore(concurrency)
+        chunker = TokenChunker(chunk_tokens)
+        results: Dict[int, tuple] = {}
+        pending = set()
+        submitted = 0
+
+        async def run(index: int, chunk: List[str]) -> None:
+            async with semaphore:
+                results[index] = (
+                    await self._analyze_chunk(chunk, use_cache),
+                    len(chunk),
+                )
+            if on_chunk:
+                await on_chunk(len(results), index)
+
+        async def submit(chunk: List[str]) -> None:
+            nonlocal pending, submitted
+            if len(pending) >= concurrency * 2:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    # Re-raise a failed chunk rather than merge without it
+                    task.result()
+            pending.add(asyncio.create_task(run(submitted, chunk)))
+            submitted += 1
+
+        try:
+            if hasattr(reviews, "__aiter__"):
+                async for review in reviews:
+                    chunk = chunker.add(self._clean_feedback(review))
+                    if chunk:
+                        await submit(chunk)
+            else:
+                for review in reviews:
+                    chunk = chunker.add(self._clean_feedback(review))
+                    if chunk:
+                        await submit(chunk)
+            chunk = chunker.flush()
+            if chunk:
+                await submit(chunk)
+            if pending:
+                await asyncio.gather(*pending)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        ordered = [results[i] for i in sorted(results)]
+        merged = merge_analyses([a for a, _ in ordered], [n for _, n in ordered])
+        merged.chat_response = await self._write_narrative(merged, use_cache)
+        return self._validate_and_enhance(merged, merged.total_feedbacks_analyzed)
+
+    async def _analyze_chunk(
+        self, chunk: List[str], use_cache: bool = True
+    ) -> FeedbackAnalysis:
+        formatted = "\n".join(f'{i}. "{review}"' for i, review in enumerate(chunk, 1))
+        try:
+            return await self._invoke(
+                self.chunk_prompt,
                 {
-                    "feedback_count": feedback_count,
-                    "feedbacks": formatted_feedbacks,
+                    "feedback_count": len(chunk),
+                    "feedbacks": formatted,
                     "format_instructions": self.parser.get_format_instructions(),
-                }
+                },
+                call_site="analyze_chunk",
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            logger.warning(f"AI Chunk Analysis Error: {str(e)}")
+            LLM_FALLBACKS.labels("analyze_chunk").inc()
+            return self._create_fallback_analysis(chunk)
+
+    async def _write_narrative(
+        self, analysis: FeedbackAnalysis, use_cache: bool = True
+    ) -> str:
+        dist = analysis.sentiment_distribution
+        themes = "\n".join(
+            f"  - {t.theme} ({t.count}x, {t.sentiment}): "
+            + "; ".join(f'"{e}"' for e in t.examples)
+            for t in analysis.themes
+        )
+        features = "\n".join(
+            f"  - [{f.priority}] {f.feature}: {f.reasoning}"
+            for f in analysis.feature_suggestions
+        )
+        try:
+            return await self._invoke(
+                self.narrative_prompt,
+                {
+                    "feedback_count": analysis.total_feedbacks_analyzed,
+                    "overall_sentiment": analysis.overall_sentiment,
+                    "satisfaction": int(analysis.satisfaction_index * 100),
+                    "sentiment_dist": f"{dist.positive} positive, {dist.neutral} neutral, {dist.negative} negative, {dist.mixed} mixed",
+                    "themes": themes or "  - No themes detected",
+                    "features": features or "  - No suggestions",
+                },
+                call_site="write_narrative",
+                parse=False,
+                use_cache=use_cache,
             )
-            result.total_feedbacks_analyzed = feedback_count
-            result.is_question_response = False
-            result = self._validate_and_enhance(result, feedback_count)
-            return result
         except Exception as e:
-            print(f"AI Analysis Error: {str(e)}")
-            return self._create_fallback_analysis(reviews)
+            logger.warning(f"AI Narrative Error: {str(e)}")
+            LLM_FALLBACKS.labels("write_narrative").inc()
+            top = analysis.themes[0].theme if analysis.themes else "None"
+            return (
+                f"Analyzed {analysis.total_feedbacks_analyzed} feedbacks. "
+                f"{analysis.overall_sentiment.capitalize()} sentiment "
+                f"({int(analysis.satisfaction_index * 100)}% satisfaction). "
+                f"Top theme: {top}."
+            )
 
-    def answer_question(
+    async def answer_question(
         self,
         question: str,
         analysis_data: FeedbackAnalysis,
         history: List[Dict[str, str]] = [],
         raw_feedbacks: List[str] = [],
+        use_cache: bool = True,
     ) -> str:
         sentiment_dist = f"{analysis_data.sentiment_distribution.positive_percentage:.0f}% positive, {analysis_data.sentiment_distribution.negative_percentage:.0f}% negative"
         top_themes = (
@@ -315,9 +638,9 @@ Return a clear, structured, and long-form response."""
             else "No previous conversation"
         )
 
-        chain = self.question_prompt | self.llm
         try:
-            result = chain.invoke(
+            return await self._invoke(
+                self.question_prompt,
                 {
                     "question": question,
                     "total_feedbacks": analysis_data.total_feedbacks_analyzed,
@@ -326,13 +649,166 @@ Return a clear, structured, and long-form response."""
                     "features": features,
                     "history": formatted_history,
                     "samples": samples,
-                }
+                },
+                call_site="answer_question",
+                parse=False,
+                use_cache=use_cache,
             )
-            return result.content
         except Exception as e:
-            print(f"Question answering error: {str(e)}")
+            logger.warning(f"Question answering error: {str(e)}")
+            LLM_FALLBACKS.labels("answer_question").inc()
             return "I encountered an error answering your question. Please try rephrasing it."
 
+    async def classify_rows(
+        self,
+        rows: Sequence[str],
+        concurrency: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> List[Optional[RowClassification]]:
+        """Per-row sentiment, score and themes, many rows per LLM call.
+
+        Rows are packed into batches of at most ``ROW_CLASSIFY_BATCH_ROWS``
+        rows and ``ROW_CLASSIFY_BATCH_TOKENS`` prompt tokens, and the batches
+        run concurrently. Rows missing from a reply or malformed in it are
+        resent split across two smaller batches (a long reply is the likeliest
+        to be cut short), up to ``ROW_CLASSIFY_RETRIES`` times. The result is
+        aligned with ``rows``; rows that never classified are None.
+        """
+        results: List[Optional[RowClassification]] = [None] * len(rows)
+        lines = [self._row_line(row) for row in rows]
+        semaphore = asyncio.Semaphore(concurrency or settings.ANALYSIS_CONCURRENCY)
+
+        async def run(batch: List[int], attempt: int = 0) -> None:
+            async with semaphore:
+                classified = await self._classify_batch(
+                    [(i, lines[i]) for i in batch], use_cache and attempt == 0
+                )
+            for index, row in classified.items():
+                results[index] = row
+            remaining = [i for i in batch if i not in classified]
+            if not remaining or attempt >= settings.ROW_CLASSIFY_RETRIES:
+                return
+            half = (len(remaining) + 1) // 2
+            await asyncio.gather(
+                *(
+                    run(part, attempt + 1)
+                    for part in (remaining[:half], remaining[half:])
+                    if part
+                )
+            )
+
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        used = 0
+        for index, line in enumerate(lines):
+            if not line:
+                continue
+            cost = estimate_tokens(line) + ITEM_OVERHEAD_TOKENS
+            if batch and (
+                len(batch) >= settings.ROW_CLASSIFY_BATCH_ROWS
+                or used + cost > settings.ROW_CLASSIFY_BATCH_TOKENS
+            ):
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(index)
+            used += cost
+        if batch:
+            batches.append(batch)
+
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
+
+    def _row_line(self, row: str) -> str:
+        text = " ".join(self._clean_feedback(row).split())
+        return truncate_to_tokens(text, settings.ANALYSIS_MAX_REVIEW_TOKENS)[0]
+
+    async def _classify_batch(
+        self, batch: List[Tuple[int, str]], use_cache: bool = True
+    ) -> Dict[int, RowClassification]:
+        """Classify ``(index, line)`` pairs; returns only rows that came back valid.
+
+        Rows are numbered 1..n in the prompt to keep the reply short and are
+        mapped back to the caller's indices here.
+        """
+        local = {n: index for n, (index, _) in enumerate(batch, 1)}
+        inputs = {
+            "row_count": len(batch),
+            "rows": "\n".join(f"{n}: {line}" for n, (_, line) in enumerate(batch, 1)),
+        }
+        try:
+            text = await self._invoke(
+                self.classify_prompt,
+                inputs,
+                call_site="classify_rows",
+                parse=False,
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            logger.warning(f"AI Row Classification Error: {str(e)}")
+            LLM_FALLBACKS.labels("classify_rows").inc()
+            return {}
+
+        try:
+            items = JsonOutputParser().parse_result(
+                [Generation(text=text)], partial=True
+            )
+        except Exception:
+            items = None
+        classified: Dict[int, RowClassification] = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                themes = [str(theme).strip() for theme in item.get("t") or []]
+                row = RowClassification(
+                    id=item["id"],
+                    sentiment=str(item["s"]).lower(),
+                    score=item["p"],
+                    themes=[theme for theme in themes if theme][:3],
+                )
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+            if row.id in local and row.sentiment in SENTIMENT_LABELS:
+                classified[local[row.id]] = row
+        return classified
+
+    def _cache_key(
+        self, prompt: ChatPromptTemplate, inputs: Dict, parse: bool = True
+    ) -> Optional[str]:
+        if not settings.LLM_CACHE_ENABLED:
+            return None
+        return cache_key(
+            model=llm_gateway.model,
+            temperature=self.llm.temperature,
+            prompt=prompt.format(**inputs),
+            schema=self.schema_version if parse else "text",
+        )
+
+    async def _invoke(
+        self,
+        prompt: ChatPromptTemplate,
+        inputs: Dict,
+        call_site: str,
+        parse: bool = True,
+        use_cache: bool = True,
+    ):
+        """Run prompt | llm (| parser) via the gateway, consulting the LLM cache.
+
+        Returns the parsed FeedbackAnalysis, or the response text when
+        ``parse`` is False. Failures are never cached.
+        """
+        key = self._cache_key(prompt, inputs, parse) if use_cache else None
+        if key:
+            cached = llm_cache.get(key, call_site)
+            if cached is not None:
+                return cached
+
+        chain = prompt | self.llm | self.parser if parse else prompt | self.llm
+        result = await llm_gateway.ainvoke(chain, inputs, call_site=call_site)
+        if not parse:
+            result = result.content
+        if key:
+            llm_cache.set(key, result)
+        return result
+
     def _clean_feedback(self, feedback: str) -> str:
         if not feedback:
             return ""
@@ -397,31 +873,13 @@ Return a clear, structured, and long-form response."""
                 theme.satisfaction = 50
         return result
 
-    def _create_fallback_analysis(self, reviews: List[str]) -> FeedbackAnalysis:
-        feedback_count = len(reviews)
-        text_combined = " ".join(reviews).lower()
-        positive_words = [
-            "good",
-            "great",
-            "excellent",
-            "love",
-            "amazing",
-            "best",
-            "perfect",
-        ]
-        negative_words = [
-            "bad",
-            "terrible",
-            "slow",
-            "worst",
-            "hate",
-            "poor",
-            "broken",
-            "crash",
-        ]
-
-        pos_count = sum(1 for word in positive_words if word in text_combined)
-        neg_count = sum(1 for word in negative_words if word in text_combined)
+    def _create_fallback_analysis(
+        self, reviews: List[str], total_count: Optional[int] = None
+    ) -> FeedbackAnalysis:
+        feedback_count = total_count if total_count is not None else len(reviews)
+        scores = score_batch(reviews)
+        pos_count = int(scores.positive.sum())
+        neg_count = int(scores.negative.sum())
 
         if pos_count > neg_count:
             sentiment = "positive"
@@ -0,0 +1,165 @@
+"""Deterministic reduce step for chunked (map-reduce) feedback analysis.
+
+Each chunk of reviews is analyzed independently into a partial
+FeedbackAnalysis; ``merge_analyses`` combines them without another LLM call.
+Only the narrative ``chat_response`` is written afterwards by a final pass.
+"""
+from typing import Dict, List, Tuple
+
+from app.models.feedback import (
+    FeatureSuggestion,
+    FeedbackAnalysis,
+    SentimentDistribution,
+    ThemeAnalysis,
+)
+
+SENTIMENTS = ("positive", "neutral", "negative", "mixed")
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+MAX_MERGED_THEMES = 10
+MAX_MERGED_SUGGESTIONS = 10
+MAX_THEME_EXAMPLES = 3
+
+
+def normalize_distribution(
+    dist: SentimentDistribution, size: int
+) -> SentimentDistribution:
+    """Rescale a chunk's counts so they sum to exactly the chunk size.
+
+    Uses largest-remainder rounding; an empty distribution counts as neutral.
+    """
+    counts = {s: getattr(dist, s) for s in SENTIMENTS}
+    total = sum(counts.values())
+    if total == size:
+        return dist
+    if total == 0:
+        return SentimentDistribution(neutral=size)
+    scaled = {s: counts[s] * size / total for s in SENTIMENTS}
+    floors = {s: int(v) for s, v in scaled.items()}
+    remainder = size - sum(floors.values())
+    by_fraction = sorted(
+        SENTIMENTS, key=lambda s: (-(scaled[s] - floors[s]), SENTIMENTS.index(s))
+    )
+    for s in by_fraction[:remainder]:
+        floors[s] += 1
+    return SentimentDistribution(**floors)
+
+
+def _overall_sentiment(dist: SentimentDistribution) -> str:
+    if dist.positive > dist.negative:
+        return "positive"
+    if dist.negative > dist.positive:
+        return "negative"
+    return "mixed" if dist.mixed > dist.neutral else "neutral"
+
+
+def _merge_themes(
+    partials: List[FeedbackAnalysis], total: int
+) -> List[ThemeAnalysis]:
+    merged: Dict[str, Dict] = {}
+    for analysis in partials:
+        for theme in analysis.themes:
+            key = theme.theme.strip().lower()
+            if not key:
+                continue
+            entry = merged.setdefault(
+                key,
+                {
+                    "theme": theme.theme.strip(),
+                    "count": 0,
+                    "votes": {s: 0 for s in SENTIMENTS},
+                    "satisfaction_sum": 0,
+                    "examples": [],
+                },
+            )
+            weight = max(theme.count, 1)
+            entry["count"] += theme.count
+            sentiment = theme.sentiment.lower()
+            entry["votes"][sentiment if sentiment in SENTIMENTS else "neutral"] += weight
+            entry["satisfaction_sum"] += theme.satisfaction * weight
+            for example in theme.examples:
+                if (
+                    example not in entry["examples"]
+                    and len(entry["examples"]) < MAX_THEME_EXAMPLES
+                ):
+                    entry["examples"].append(example)
+
+    themes = []
+    for entry in merged.values():
+        weight = sum(entry["votes"].values())
+        sentiment = max(
+            SENTIMENTS, key=lambda s: (entry["votes"][s], -SENTIMENTS.index(s))
+        )
+        themes.append(
+            ThemeAnalysis(
+                theme=entry["theme"],
+                count=entry["count"],
+                sentiment=sentiment,
+                examples=entry["examples"],
+                percentage=round(entry["count"] / total * 100, 1) if total else 0.0,
+                satisfaction=round(entry["satisfaction_sum"] / weight)
+                if weight
+                else 50,
+            )
+        )
+    themes.sort(key=lambda t: (-t.count, t.theme.lower()))
+    return themes[:MAX_MERGED_THEMES]
+
+
+def _merge_suggestions(partials: List[FeedbackAnalysis]) -> List[FeatureSuggestion]:
+    merged: Dict[str, FeatureSuggestion] = {}
+    for analysis in partials:
+        for suggestion in analysis.feature_suggestions:
+            key = suggestion.feature.strip().lower()
+            if not key:
+                continue
+            current = merged.get(key)
+            if current is None:
+                merged[key] = suggestion.model_copy()
+                continue
+            current.affected_users += suggestion.affected_users
+            if PRIORITY_RANK.get(suggestion.priority.lower(), 2) < PRIORITY_RANK.get(
+                current.priority.lower(), 2
+            ):
+                current.priority = suggestion.priority
+            if suggestion.impact_score > current.impact_score:
+                current.impact_score = suggestion.impact_score
+                current.reasoning = suggestion.reasoning
+
+    def rank(s: FeatureSuggestion) -> Tuple:
+        return (
+            PRIORITY_RANK.get(s.priority.lower(), 2),
+            -s.impact_score,
+            -s.affected_users,
+            s.feature.lower(),
+        )
+
+    return sorted(merged.values(), key=rank)[:MAX_MERGED_SUGGESTIONS]
+
+
+def merge_analyses(
+    partials: List[FeedbackAnalysis], sizes: List[int]
+) -> FeedbackAnalysis:
+    """Combine per-chunk analyses; ``sizes[i]`` is the review count of chunk i."""
+    total = sum(sizes)
+    dist = SentimentDistribution()
+    satisfaction_sum = 0.0
+    for analysis, size in zip(partials, sizes):
+        chunk_dist = normalize_distribution(analysis.sentiment_distribution, size)
+        for s in SENTIMENTS:
+            setattr(dist, s, getattr(dist, s) + getattr(chunk_dist, s))
+        satisfaction_sum += analysis.satisfaction_index * size
+
+    themes = _merge_themes(partials, total)
+    suggestions = _merge_suggestions(partials)
+    return FeedbackAnalysis(
+        total_feedbacks_analyzed=total,
+        overall_sentiment=_overall_sentiment(dist),
+        satisfaction_index=round(satisfaction_sum / total, 4) if total else 0.5,
+        sentiment_distribution=dist,
+        total_themes_detected=len(themes),
+        themes=themes,
+        key_features_count=len(suggestions),
+        feature_suggestions=suggestions,
+        chat_response="",
+        is_question_response=False,
+    )
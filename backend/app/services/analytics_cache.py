@@ -0,0 +1,183 @@
+"""Single-flight, stale-while-revalidate cache for per-user analytics.
+
+Entries are keyed by ``(user_id, endpoint, ...)`` and tagged with the user's
+data version (see ``app.repositories.data_versions``) when computed:
+
+- same version, younger than ``ttl_seconds``: served as is;
+- same version, younger than ``ttl_seconds + stale_seconds``: served as is
+  while one background refresh recomputes it;
+- otherwise, including any newer data version: recomputed before answering.
+
+Concurrent requests for a key that is being computed wait for that one
+computation instead of starting their own. Sync callers (threadpool
+endpoints) use ``get``; coroutines use ``aget``.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FRESH, STALE, WAIT, LEAD = "fresh", "stale", "wait", "lead"
+
+
+class AnalyticsCache:
+    def __init__(
+        self,
+        ttl_seconds: float = 30,
+        stale_seconds: float = 300,
+        max_entries: int = 10000,
+        refresh_workers: int = 2,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        # key -> (version, computed_at, value)
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        # key -> (version, future) of the computation in flight
+        self._flights: Dict[Hashable, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="analytics-refresh"
+        )
+        self._tasks: Set[asyncio.Task] = set()
+        self.counts = {FRESH: 0, STALE: 0, WAIT: 0, LEAD: 0}
+
+    def get(self, key: Hashable, version: int, compute: Callable[[], Any]) -> Any:
+        state, payload = self._lookup(key, version)
+        if state == STALE:
+            future = self._begin_refresh(key, version)
+            if future is not None:
+                self._refresher.submit(self._run, key, version, future, compute)
+        if state in (FRESH, STALE):
+            return payload
+        if state == LEAD:
+            self._run(key, version, payload, compute)
+        return payload.result()
+
+    async def aget(
+        self, key: Hashable, version: int, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        state, payload = self._lookup(key, version)
+        if state == STALE:
+            future = self._begin_refresh(key, version)
+            if future is not None:
+                task = asyncio.create_task(self._arun(key, version, future, compute))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        if state in (FRESH, STALE):
+            return payload
+        if state == LEAD:
+            await self._arun(key, version, payload, compute)
+        return await asyncio.wrap_future(payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self.counts.values())
+        served = self.counts[FRESH] + self.counts[STALE]
+        return {
+            "entries": len(self._entries),
+            "fresh": self.counts[FRESH],
+            "stale": self.counts[STALE],
+            "coalesced": self.counts[WAIT],
+            "computed": self.counts[LEAD],
+            "hit_ratio": served / lookups if lookups else 0.0,
+        }
+
+    def _lookup(self, key: Hashable, version: int) -> Tuple[str, Any]:
+        """``(FRESH|STALE, value)`` to answer from cache, ``(WAIT, future)``
+        to wait for a computation in flight, or ``(LEAD, future)`` when the
+        caller must compute and resolve ``future`` itself."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                age = now - entry[1]
+                if age < self.ttl_seconds + self.stale_seconds:
+                    state = FRESH if age < self.ttl_seconds else STALE
+                    self._entries.move_to_end(key)
+                    self.counts[state] += 1
+                    return state, entry[2]
+
+            flight = self._flights.get(key)
+            if flight is not None and flight[0] >= version:
+                self.counts[WAIT] += 1
+                return WAIT, flight[1]
+            self.counts[LEAD] += 1
+            future: Future = Future()
+            self._flights[key] = (version, future)
+            return LEAD, future
+
+    def _begin_refresh(self, key: Hashable, version: int) -> Optional[Future]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight[0] >= version:
+                return None
+            future: Future = Future()
+            self._flights[key] = (version, future)
+            return future
+
+    def _run(
+        self, key: Hashable, version: int, future: Future, compute: Callable[[], Any]
+    ) -> None:
+        try:
+            value = compute()
+        except Exception as e:
+            self._finish(key, version, future, error=e)
+        else:
+            self._finish(key, version, future, value)
+
+    async def _arun(
+        self,
+        key: Hashable,
+        version: int,
+        future: Future,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> None:
+        try:
+            value = await compute()
+        except Exception as e:
+            self._finish(key, version, future, error=e)
+        else:
+            self._finish(key, version, future, value)
+
+    def _finish(
+        self,
+        key: Hashable,
+        version: int,
+        future: Future,
+        value: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        with self._lock:
+            if error is None:
+                current = self._entries.get(key)
+                # A slow computation must not overwrite a newer version's result
+                if current is None or current[0] <= version:
+                    self._entries[key] = (version, time.monotonic(), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            if self._flights.get(key, (None, None))[1] is future:
+                del self._flights[key]
+        if error is None:
+            future.set_result(value)
+        else:
+            logger.warning(f"Analytics computation failed for {key!r}: {error}")
+            future.set_exception(error)
+
+
+analytics_cache = AnalyticsCache(
+    ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS,
+    stale_seconds=settings.ANALYTICS_CACHE_STALE_SECONDS,
+    max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES,
+)
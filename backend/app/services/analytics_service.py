@@ -1,29 +1,81 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
 from datetime import datetime
 from app.repositories.feedback_repository import FeedbackRepository
+from app.services.analytics_cache import analytics_cache
 
 
 class AnalyticsService:
     def __init__(self, feedback_repo: FeedbackRepository):
         self.feedback_repo = feedback_repo
 
-    def get_analytics_summary(self, user_id: str) -> Dict[str, Any]:
-        all_feedbacks = self.feedback_repo.get_user_feedbacks(user_id, limit=None)
-        if not all_feedbacks:
+    # Each public getter serves from analytics_cache under the user's data
+    # version, read once per request (callers that already read it for an
+    # ETag pass it in); the _build_* methods do the actual work on a miss.
+
+    def data_version(self, user_id: str) -> int:
+        return self.feedback_repo.get_data_version(user_id)
+
+    def get_analytics_summary(
+        self, user_id: str, version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        if version is None:
+            version = self.data_version(user_id)
+        return analytics_cache.get(
+            (user_id, "summary"),
+            version,
+            lambda: self._build_analytics_summary(user_id, version),
+        )
+
+    def get_historical_analytics(
+        self, user_id: str, limit: int = 10, version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        if version is None:
+            version = self.data_version(user_id)
+        return analytics_cache.get(
+            (user_id, "history", limit),
+            version,
+            lambda: self._build_historical_analytics(user_id, limit),
+        )
+
+    def get_theme_breakdown(
+        self, user_id: str, version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        if version is None:
+            version = self.data_version(user_id)
+        return analytics_cache.get(
+            (user_id, "themes"),
+            version,
+            lambda: self._build_theme_breakdown(user_id, version),
+        )
+
+    def get_recommendations(
+        self, user_id: str, version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        if version is None:
+            version = self.data_version(user_id)
+        return analytics_cache.get(
+            (user_id, "recommendations"),
+            version,
+            lambda: self._build_recommendations(user_id),
+        )
+
+    def _build_analytics_summary(self, user_id: str, version: int) -> Dict[str, Any]:
+        rollup = self._get_rollup(user_id, version)
+        if not rollup or not rollup.get("total"):
             return self._get_empty_analytics()
-        total_feedbacks = len(all_feedbacks)
-        sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0, "mixed": 0}
-        for feedback in all_feedbacks:
-            sentiment = feedback.get("sentiment", "neutral")
-            if sentiment in sentiment_counts:
-                sentiment_counts[sentiment] += 1
-            else:
-                sentiment_counts["neutral"] += 1
+        total_feedbacks = rollup["total"]
+        counts = rollup.get("counts", {})
+        sentiment_counts = {
+            "positive": counts.get("positive", 0),
+            "neutral": counts.get("neutral", 0) + counts.get("other", 0),
+            "negative": counts.get("negative", 0),
+            "mixed": counts.get("mixed", 0),
+        }
         satisfaction_index = self._calculate_satisfaction_index(
             sentiment_counts, total_feedbacks
         )
         overall_sentiment = self._determine_overall_sentiment(sentiment_counts)
-        theme_analysis = self._analyze_themes(all_feedbacks)
+        theme_analysis = self._analyze_themes(rollup)
         for t in theme_analysis["themes"]:
             t["percentage"] = (
                 int((t["count"] / total_feedbacks) * 100) if total_feedbacks > 0 else 0
@@ -60,6 +112,20 @@ class AnalyticsService:
             "last_updated": datetime.utcnow().isoformat(),
         }
 
+    def _get_rollup(self, user_id: str, version: int) -> Dict[str, Any]:
+        # Shared by the summary and themes endpoints, which the dashboard
+        # requests together: one read serves both.
+        return analytics_cache.get(
+            (user_id, "rollup"), version, lambda: self._read_rollup(user_id)
+        )
+
+    def _read_rollup(self, user_id: str) -> Dict[str, Any]:
+        # Rollups are built by migration 3; until then derive the same shape
+        # with a single $facet aggregation instead of scanning in Python.
+        return self.feedback_repo.get_rollup(
+            user_id
+        ) or self.feedback_repo.aggregate_rollup(user_id)
+
     def _calculate_satisfaction_index(
         self, sentiment_counts: Dict[str, int], total: int
     ) -> int:
@@ -81,34 +147,28 @@ class AnalyticsService:
         else:
             return "neutral"
 
-    def _analyze_themes(self, feedbacks: List[Dict]) -> Dict[str, Any]:
+    def _analyze_themes(self, rollup: Dict[str, Any]) -> Dict[str, Any]:
         theme_sentiments = {}
         theme_examples = {}
-        for feedback in feedbacks:
-            themes = feedback.get("themes", [])
-            sentiment = feedback.get("sentiment", "neutral")
-            content = feedback.get("content", "")
-            for theme in themes:
-                if theme not in theme_sentiments:
-                    theme_sentiments[theme] = {
-                        "positive": 0,
-                        "neutral": 0,
-                        "negative": 0,
-                        "mixed": 0,
-                    }
-                    theme_examples[theme] = []
-                if sentiment in theme_sentiments[theme]:
-                    theme_sentiments[theme][sentiment] += 1
-                else:
-                    theme_sentiments[theme]["neutral"] += 1
-                if len(theme_examples[theme]) < 3:
-                    theme_examples[theme].append(
-                        content[:100] + "..." if len(content) > 100 else content
-                    )
+        for entry in rollup.get("themes", {}).values():
+            theme = entry.get("name")
+            if not theme:
+                continue
+            counts = entry.get("counts", {})
+            theme_sentiments[theme] = {
+                "positive": counts.get("positive", 0),
+                "neutral": counts.get("neutral", 0),
+                "negative": counts.get("negative", 0),
+                "mixed": counts.get("mixed", 0),
+            }
+            theme_examples[theme] = entry.get("examples", [])
         themes_list = []
         theme_satisfaction_list = []
         for theme, sentiments in theme_sentiments.items():
             total = sum(sentiments.values())
+            if total <= 0:
+                # Every row under this theme was reclassified away from it
+                continue
             satisfaction = self._calculate_theme_satisfaction(sentiments, total)
             themes_list.append(
                 {
@@ -123,8 +183,10 @@ class AnalyticsService:
             theme_satisfaction_list.append(
                 {"theme": theme, "satisfaction": satisfaction}
             )
-        themes_list.sort(key=lambda x: x["count"], reverse=True)
-        theme_satisfaction_list.sort(key=lambda x: x["satisfaction"], reverse=True)
+        # Ties break by name: stored rollups and the fallback pipeline list
+        # themes in different orders.
+        themes_list.sort(key=lambda x: (-x["count"], x["theme"]))
+        theme_satisfaction_list.sort(key=lambda x: (-x["satisfaction"], x["theme"]))
         return {
             "themes": themes_list,
             "theme_satisfaction": theme_satisfaction_list[:10],
@@ -160,7 +222,9 @@ class AnalyticsService:
         else:
             return "neutral"
 
-    def get_historical_analytics(self, user_id: str, limit: int = 10) -> Dict[str, Any]:
+    def _build_historical_analytics(
+        self, user_id: str, limit: int = 10
+    ) -> Dict[str, Any]:
         analyses = self.feedback_repo.get_user_analyses(user_id, limit=limit)
         if not analyses:
             return {"history": [], "trend": "stable", "average_satisfaction": 0}
@@ -198,21 +262,23 @@ class AnalyticsService:
             "average_satisfaction": int(avg_satisfaction * 100),
         }
 
-    def get_theme_breakdown(self, user_id: str) -> Dict[str, Any]:
-        all_feedbacks = self.feedback_repo.get_user_feedbacks(user_id, limit=None)
-        if not all_feedbacks:
+    def _build_theme_breakdown(self, user_id: str, version: int) -> Dict[str, Any]:
+        rollup = self._get_rollup(user_id, version)
+        if not rollup or not rollup.get("total"):
             return {
                 "themes": [],
                 "sentiment_stats": {"positive": 0, "neutral": 0, "negative": 0},
                 "total_feedbacks": 0,
             }
-        theme_analysis = self._analyze_themes(all_feedbacks)
-        sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0, "mixed": 0}
-        for f in all_feedbacks:
-            s = f.get("sentiment", "neutral")
-            if s in sentiment_counts:
-                sentiment_counts[s] += 1
-        total = len(all_feedbacks)
+        theme_analysis = self._analyze_themes(rollup)
+        counts = rollup.get("counts", {})
+        sentiment_counts = {
+            "positive": counts.get("positive", 0),
+            "neutral": counts.get("neutral", 0),
+            "negative": counts.get("negative", 0),
+            "mixed": counts.get("mixed", 0),
+        }
+        total = rollup["total"]
         themes = theme_analysis["themes"]
         for t in themes:
             t["percentage"] = int((t["count"] / total) * 100) if total > 0 else 0
@@ -222,7 +288,7 @@ class AnalyticsService:
             "total_feedbacks": total,
         }
 
-    def get_recommendations(self, user_id: str) -> Dict[str, Any]:
+    def _build_recommendations(self, user_id: str) -> Dict[str, Any]:
         latest_analysis_doc = self.feedback_repo.get_latest_analysis(user_id)
         if not latest_analysis_doc:
             return {"critical": [], "high": [], "medium": [], "low": []}
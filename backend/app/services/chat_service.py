@@ -1,19 +1,39 @@
-from typing import List, Dict, Optional
+import asyncio
+import csv
+import os
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.agents.agent_pool import AgentPool
 from app.agents.feedback_agent import FeedbackAgent
-from app.repositories.feedback_repository import FeedbackRepository
-from app.models.feedback import FeedbackAnalysis
+from app.repositories.async_feedback_repository import AsyncFeedbackRepository
+from app.models.feedback import FeedbackAnalysis, RowClassification
 from app.services.ai_service import ai_service
+from app.services.analytics_cache import analytics_cache
+from app.services.csv_ingest import check_csv_limits, iter_feedback_rows, take
+from app.services.job_service import JobContext
+from app.services import sentiment
+from app.services.sampling import StratifiedReservoirSampler
+from app.services.themes import ThemeTagger
 
 
 class ChatService:
-    def __init__(self, feedback_repo: FeedbackRepository):
+    def __init__(
+        self,
+        feedback_repo: AsyncFeedbackRepository,
+        agent_pool: Optional[AgentPool[FeedbackAgent]] = None,
+    ):
         self.feedback_repo = feedback_repo
-        self._agent_cache: Dict[str, FeedbackAgent] = {}
+        self.agent_pool = agent_pool or AgentPool(
+            lambda user_id: FeedbackAgent(user_id=user_id),
+            max_size=settings.AGENT_POOL_MAX_SIZE,
+            idle_seconds=settings.AGENT_POOL_IDLE_SECONDS,
+        )
 
     def _get_agent(self, user_id: str) -> FeedbackAgent:
-        if user_id not in self._agent_cache:
-            self._agent_cache[user_id] = FeedbackAgent(user_id=user_id)
-        return self._agent_cache[user_id]
+        return self.agent_pool.get(user_id)
 
     def _is_new_feedback(self, message: str) -> bool:
         """
@@ -84,94 +104,41 @@ class ChatService:
             return True
 
         # RULE 6: Contains clear sentiment/opinion words → new feedback
-        opinion_markers = [
-            # Positive
-            "good",
-            "great",
-            "excellent",
-            "best",
-            "amazing",
-            "awesome",
-            "love",
-            "perfect",
-            "fantastic",
-            "outstanding",
-            "wonderful",
-            "brilliant",
-            "smooth",
-            "fast",
-            "quick",
-            "efficient",
-            "effective",
-            "reliable",
-            "easy",
-            "helpful",
-            "useful",
-            "intuitive",
-            "clean",
-            "beautiful",
-            "simple",
-            "nice",
-            "pleased",
-            "happy",
-            "satisfied",
-            # Negative
-            "bad",
-            "terrible",
-            "awful",
-            "worst",
-            "hate",
-            "issue",
-            "broken",
-            "slow",
-            "crash",
-            "crashes",
-            "bug",
-            "error",
-            "problem",
-            "fail",
-            "fails",
-            "failing",
-            "poor",
-            "useless",
-            "difficult",
-            "confusing",
-            "frustrating",
-            "annoying",
-            "disappointing",
-            "laggy",
-            "freeze",
-            "freezing",
-            "unusable",
-            "lost",
-            # Mixed
-            "okay",
-            "ok",
-            "decent",
-            "average",
-            "mediocre",
-            "acceptable",
-        ]
-        if any(w in words for w in opinion_markers):
+        if sentiment.has_opinion(message):
             return True
 
         # DEFAULT: Route to agent — when in doubt, let the AI handle it
         return False
 
-    async def process_message(
-        self, user_id: str, message: str, conversation_id: Optional[str] = None
-    ) -> Dict:
+    async def _start_turn(
+        self, user_id: str, message: str, conversation_id: Optional[str]
+    ) -> str:
         # Get or create conversation
         if not conversation_id:
-            conversation = self.feedback_repo.create_conversation(
+            conversation = await self.feedback_repo.create_conversation(
                 user_id=user_id, title=message[:50]
             )
             conversation_id = str(conversation["_id"])
 
         # Save user message
-        self.feedback_repo.create_message(
+        await self.feedback_repo.create_message(
             conversation_id=conversation_id, role="user", content=message
         )
+        return conversation_id
+
+    async def _finish_turn(self, conversation_id: str, result: Dict) -> None:
+        # Save assistant response
+        await self.feedback_repo.create_message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=result["response"],
+            metadata=result.get("metadata", {}),
+        )
+
+    async def process_message(
+        self, user_id: str, message: str, conversation_id: Optional[str] = None
+    ) -> Dict:
+        conversation_id = await self._start_turn(user_id, message, conversation_id)
 
         # DECISION POINT: New feedback or question?
         is_new_feedback = self._is_new_feedback(message)
@@ -187,41 +154,122 @@ class ChatService:
                 user_id=user_id, question=message, conversation_id=conversation_id
             )
 
-        # Save assistant response
-        self.feedback_repo.create_message(
-            conversation_id=conversation_id,
-            role="assistant",
-            content=result["response"],
-            metadata=result.get("metadata", {}),
-        )
-
+        await self._finish_turn(conversation_id, result)
         return result
 
+    async def stream_message(
+        self, user_id: str, message: str, conversation_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """Streaming process_message, yielding ``(event, data)`` pairs.
+
+        Events: ``start`` once the turn is recorded, ``token`` text deltas,
+        ``field`` analysis fields as they become parseable, ``tool`` agent
+        tool calls, and ``done`` with the same payload process_message
+        returns, after the assistant message has been persisted.
+        """
+        conversation_id = await self._start_turn(user_id, message, conversation_id)
+        is_new_feedback = self._is_new_feedback(message)
+        yield "start", {
+            "conversation_id": conversation_id,
+            "is_question": not is_new_feedback,
+        }
+
+        if is_new_feedback:
+            feedbacks = self._parse_feedbacks(message)
+            analysis = None
+            # Per-row classification runs while the analysis streams
+            classifying = asyncio.create_task(self._classify_feedbacks(feedbacks))
+            try:
+                async for kind, payload in ai_service.stream_feedback_analysis(
+                    feedbacks
+                ):
+                    if kind == "analysis":
+                        analysis = payload
+                    elif kind == "token":
+                        yield "token", {"text": payload}
+                    else:
+                        yield kind, payload
+                classifications = await classifying
+            finally:
+                classifying.cancel()
+            result = await self._store_feedback_analysis(
+                user_id, conversation_id, feedbacks, analysis, classifications
+            )
+        else:
+            agent, history = await self._prepare_agent(
+                user_id, message, conversation_id
+            )
+            agent_result: Dict = {}
+            async for kind, payload in agent.stream_chat(
+                message=message, history=history, conversation_id=conversation_id
+            ):
+                if kind == "done":
+                    agent_result = payload
+                elif kind == "token":
+                    yield "token", {"text": payload}
+                else:
+                    yield "tool", {"name": payload}
+            result = self._agent_result(conversation_id, agent_result)
+
+        await self._finish_turn(conversation_id, result)
+        yield "done", result
+
     async def _handle_new_feedback(
         self, user_id: str, feedback_text: str, conversation_id: str
     ) -> Dict:
         feedbacks = self._parse_feedbacks(feedback_text)
-        analysis = ai_service.analyze_feedback(reviews=feedbacks, history=[])
+        analysis, classifications = await asyncio.gather(
+            ai_service.analyze_feedback(reviews=feedbacks, history=[]),
+            self._classify_feedbacks(feedbacks),
+        )
+        return await self._store_feedback_analysis(
+            user_id, conversation_id, feedbacks, analysis, classifications
+        )
 
-        for feedback in feedbacks:
-            stored_sentiment = (
-                analysis.overall_sentiment
-                if len(feedbacks) == 1
-                else self._quick_sentiment(feedback)
-            )
+    async def _classify_feedbacks(
+        self, feedbacks: List[str]
+    ) -> List[Optional[RowClassification]]:
+        # A single feedback is fully described by its own analysis
+        if len(feedbacks) < 2:
+            return [None] * len(feedbacks)
+        return await ai_service.classify_rows(feedbacks)
 
-            self.feedback_repo.create_feedback(
-                user_id=user_id,
-                conversation_id=conversation_id,
-                content=feedback,
-                sentiment=stored_sentiment,
-                sentiment_score=analysis.satisfaction_index,
-                themes=[t.theme for t in analysis.themes[:3]]
-                if analysis.themes
-                else [],
+    async def _store_feedback_analysis(
+        self,
+        user_id: str,
+        conversation_id: str,
+        feedbacks: List[str],
+        analysis: FeedbackAnalysis,
+        classifications: Optional[List[Optional[RowClassification]]] = None,
+    ) -> Dict:
+        classifications = classifications or [None] * len(feedbacks)
+        scores = sentiment.score_batch(feedbacks)
+        feedback_docs = []
+        for i, (feedback, row) in enumerate(zip(feedbacks, classifications)):
+            if len(feedbacks) == 1:
+                values = (
+                    analysis.overall_sentiment,
+                    analysis.satisfaction_index,
+                    [t.theme for t in analysis.themes[:3]],
+                )
+            elif row is not None:
+                values = (row.sentiment, row.score, row.themes)
+            else:
+                # Classification failed for this row: keyword label, no themes
+                values = (str(scores.labels[i]), float(scores.scores[i]), [])
+            feedback_docs.append(
+                {
+                    "user_id": user_id,
+                    "conversation_id": conversation_id,
+                    "content": feedback,
+                    "sentiment": values[0],
+                    "sentiment_score": values[1],
+                    "themes": values[2],
+                }
             )
+        await self.feedback_repo.bulk_create_feedbacks(feedback_docs)
 
-        self.feedback_repo.save_analysis(
+        await self.feedback_repo.save_analysis(
             user_id=user_id,
             analysis=analysis,
             feedback_count=len(feedbacks),
@@ -243,13 +291,12 @@ class ChatService:
             "success": True,
         }
 
-    async def _handle_question_with_agent(
+    async def _prepare_agent(
         self, user_id: str, question: str, conversation_id: str
-    ) -> Dict:
+    ) -> Tuple[FeedbackAgent, List[Dict]]:
         agent = self._get_agent(user_id)
-        agent.set_conversation_id(conversation_id)
 
-        db_messages = self.feedback_repo.get_conversation_messages(
+        db_messages = await self.feedback_repo.get_conversation_messages(
             conversation_id, limit=10
         )
         history = [
@@ -257,9 +304,18 @@ class ChatService:
             for msg in db_messages
             if msg["content"] != question
         ]
+        return agent, history
 
-        result = agent.chat(message=question, history=history)
+    async def _handle_question_with_agent(
+        self, user_id: str, question: str, conversation_id: str
+    ) -> Dict:
+        agent, history = await self._prepare_agent(user_id, question, conversation_id)
+        result = await agent.chat(
+            message=question, history=history, conversation_id=conversation_id
+        )
+        return self._agent_result(conversation_id, result)
 
+    def _agent_result(self, conversation_id: str, result: Dict) -> Dict:
         return {
             "conversation_id": conversation_id,
             "response": result["response"],
@@ -287,197 +343,184 @@ class ChatService:
 
         return feedbacks if feedbacks else [text.strip()]
 
-    def _quick_sentiment(self, text: str) -> str:
-        import re
-
-        text_lower = text.lower()
-        words = set(re.findall(r"\b\w+\b", text_lower))
-
-        positive_words = {
-            "good",
-            "great",
-            "excellent",
-            "love",
-            "amazing",
-            "best",
-            "smooth",
-            "smoothly",
-            "perfect",
-            "fantastic",
-            "outstanding",
-            "wonderful",
-            "brilliant",
-            "fast",
-            "quick",
-            "easy",
-            "helpful",
-            "useful",
-            "nice",
-            "pleased",
-            "happy",
-            "satisfied",
-            "beautiful",
-            "clean",
-            "intuitive",
-            "reliable",
-            "effective",
-            "efficient",
-            "improved",
-            "better",
-            "awesome",
-            "like",
-            "enjoy",
-            "enjoyed",
-            "enjoying",
-            "superb",
-            "neat",
-            "clear",
-            "stable",
-            "works",
-            "working",
-            "joy",
-            "delight",
-            "delightful",
-            "fluid",
-        }
-        negative_words = {
-            "bad",
-            "terrible",
-            "slow",
-            "worst",
-            "hate",
-            "poor",
-            "broken",
-            "crash",
-            "crashes",
-            "crashing",
-            "crashed",
-            "bug",
-            "bugs",
-            "error",
-            "errors",
-            "problem",
-            "problems",
-            "fail",
-            "fails",
-            "failing",
-            "failed",
-            "failure",
-            "useless",
-            "awful",
-            "horrible",
-            "frustrating",
-            "frustration",
-            "annoying",
-            "difficult",
-            "confusing",
-            "delayed",
-            "delay",
-            "not",
-            "never",
-            "cant",
-            "cannot",
-            "doesn",
-            "doesn't",
-            "won't",
-            "wont",
-            "missing",
-            "lost",
-            "broken",
-            "laggy",
-            "lag",
-            "freeze",
-            "freezing",
-            "frozen",
-            "unusable",
-            "disappointing",
-            "disappointed",
-            "complaint",
-            "complain",
-            "broken",
-        }
-
-        # Connector words that signal mixed sentiment (word "but", "however", etc.)
-        mixed_connectors = {
-            "but",
-            "however",
-            "although",
-            "though",
-            "yet",
-            "while",
-            "except",
-            "unfortunately",
-            "despite",
-        }
+    async def create_dataset_conversation(self, user_id: str, filename: str) -> str:
+        conversation = await self.feedback_repo.create_conversation(
+            user_id=user_id, title=f"Dataset: {filename}"
+        )
+        return str(conversation["_id"])
+
+    async def run_csv_job(self, job: Dict, context: JobContext) -> Dict:
+        """Job handler for queued CSV uploads spooled to disk by the controller."""
+        payload = job["payload"]
+        path = payload["path"]
+        if not os.path.exists(path):
+            # Spooled on another instance's local disk, or lost with it
+            raise ValueError(
+                f"The uploaded file is not available on this server (it was "
+                f"spooled on {job.get('host', 'another host')}). Upload it "
+                f"again, or point JOB_SPOOL_DIR at storage every instance shares."
+            )
+        try:
+            with open(path, "rb") as spooled:
+                # Reject an oversized file before any of its batches is stored
+                await run_in_threadpool(
+                    check_csv_limits,
+                    spooled,
+                    max_rows=settings.CSV_MAX_ROWS,
+                    max_bytes=settings.CSV_MAX_BYTES,
+                )
+                rows = iter_feedback_rows(
+                    spooled,
+                    max_rows=settings.CSV_MAX_ROWS,
+                    max_bytes=settings.CSV_MAX_BYTES,
+                )
+                result = await self.process_csv_upload(
+                    user_id=job["user_id"],
+                    feedbacks=rows,
+                    filename=payload["filename"],
+                    conversation_id=payload.get("conversation_id"),
+                    context=context,
+                )
+        except UnicodeDecodeError:
+            self._discard_spool(path)
+            raise ValueError("Invalid file encoding. Please use UTF-8.")
+        except csv.Error as e:
+            self._discard_spool(path)
+            raise ValueError(f"CSV parsing error: {str(e)}")
+        except Exception:
+            self._discard_spool(path)
+            raise
+        self._discard_spool(path)
+        return result
 
-        pos = len(words & positive_words)
-        neg = len(words & negative_words)
-        has_connector = bool(words & mixed_connectors)
-
-        # Mixed: has both pos+neg signals, OR has a contrast connector with any sentiment
-        if pos > 0 and neg > 0:
-            return "mixed"
-        if has_connector and (pos > 0 or neg > 0):
-            return "mixed"
-        if pos > 0:
-            return "positive"
-        if neg > 0:
-            return "negative"
-        return "neutral"
+    def _discard_spool(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
     async def process_csv_upload(
         self,
         user_id: str,
-        feedbacks: List[str],
+        feedbacks: Iterable[str],
         filename: str,
         conversation_id: Optional[str] = None,
+        context: Optional[JobContext] = None,
     ) -> Dict:
+        # A resumed job re-reads the file but only samples rows it already stored
+        already_ingested = context.progress.get("rows_ingested", 0) if context else 0
+        upload_id = context.job_id if context else str(ObjectId())
+
+        rows = iter(feedbacks)
+        batch = await run_in_threadpool(take, rows, settings.CSV_BATCH_SIZE)
+        if not batch:
+            raise HTTPException(
+                status_code=400,
+                detail="No valid feedback found in CSV. Ensure it has a column like 'review', 'feedback', or 'text'.",
+            )
 
         if not conversation_id:
-            conversation = self.feedback_repo.create_conversation(
-                user_id=user_id, title=f"Dataset: {filename}"
-            )
-            conversation_id = str(conversation["_id"])
+            conversation_id = await self.create_dataset_conversation(user_id, filename)
 
-        # 1. Prepare and save all feedbacks in bulk first
-        feedback_docs = []
-        for text in feedbacks:
-            cleaned = text.strip()
-            if cleaned:
+        # 1. Save feedbacks in fixed-size batches while keeping a bounded sample
+        # Sampled per sentiment stratum so rare complaints survive huge uploads
+        stratum_size = settings.CSV_ANALYSIS_SAMPLE_SIZE // len(sentiment.STRATA)
+        sampler = StratifiedReservoirSampler(
+            {name: stratum_size for name in sentiment.STRATA.tolist()}
+        )
+        tagger = (
+            ThemeTagger(
+                clusters=settings.THEME_CLUSTERS,
+                vocabulary_size=settings.THEME_VOCABULARY_SIZE,
+                min_similarity=settings.THEME_MIN_SIMILARITY,
+            )
+            if settings.THEME_TAGGING_ENABLED
+            else None
+        )
+        while batch:
+            feedback_docs = []
+            cleaned_batch = [text.strip() for text in batch if text.strip()]
+            scores = sentiment.score_batch(cleaned_batch)
+            strata = sentiment.stratum_batch(scores).tolist()
+            # Every row is tagged, including ones a resumed job skips, so the
+            # clusters and their names come out the same as in the first run.
+            themes = (
+                await run_in_threadpool(tagger.tag_batch, cleaned_batch)
+                if tagger
+                else [[] for _ in cleaned_batch]
+            )
+            for i, cleaned in enumerate(cleaned_batch):
+                sampler.add(strata[i], cleaned)
+                if sampler.seen <= already_ingested:
+                    continue
                 feedback_docs.append(
                     {
                         "user_id": user_id,
                         "conversation_id": conversation_id,
                         "content": cleaned,
-                        "sentiment": self._quick_sentiment(cleaned),
-                        "sentiment_score": 0.5,
-                        "themes": [],
+                        "sentiment": str(scores.labels[i]),
+                        "sentiment_score": float(scores.scores[i]),
+                        "themes": themes[i],
+                        "upload_id": upload_id,
                     }
                 )
-
-        if feedback_docs:
-            self.feedback_repo.bulk_create_feedbacks(feedback_docs)
+            if feedback_docs:
+                await self.feedback_repo.bulk_create_feedbacks(feedback_docs)
+                if context:
+                    await context.update(
+                        stage="ingesting",
+                        rows_ingested=sampler.seen,
+                        conversation_id=conversation_id,
+                    )
+            batch = await run_in_threadpool(take, rows, settings.CSV_BATCH_SIZE)
+
+        feedback_count = sampler.seen
+        if context:
+            await context.update(stage="analyzing", rows_ingested=feedback_count)
 
         # 2. Perform direct analysis (not via agent)
-        analysis = ai_service.analyze_feedback(reviews=feedbacks, history=[])
+        if (
+            settings.ANALYSIS_MODE == "chunked"
+            and feedback_count > settings.ANALYSIS_CHUNKED_MIN_ROWS
+        ):
+            # Map-reduce over every stored row instead of judging from a sample
+            async def on_chunk(chunks_done: int, _index: int) -> None:
+                if context:
+                    await context.update(chunks_analyzed=chunks_done)
+
+            analysis = await ai_service.analyze_feedback_chunked(
+                self.feedback_repo.iter_upload_contents(conversation_id, upload_id),
+                on_chunk=on_chunk,
+            )
+        else:
+            analysis = await ai_service.analyze_feedback(
+                reviews=sampler.items,
+                history=[],
+                total_count=feedback_count,
+            )
+
+        if settings.CSV_LLM_CLASSIFICATION:
+            await self._classify_upload(conversation_id, upload_id, context)
 
         # 3. Save analysis results
-        self.feedback_repo.save_analysis(
+        if context:
+            await context.update(stage="saving")
+        await self.feedback_repo.save_analysis(
             user_id=user_id,
             analysis=analysis,
-            feedback_count=len(feedbacks),
+            feedback_count=feedback_count,
             conversation_id=conversation_id,
         )
 
         # 4. Save analysis as a message for agent history context
-        self.feedback_repo.create_message(
+        await self.feedback_repo.create_message(
             conversation_id=conversation_id,
             role="assistant",
             content=analysis.chat_response,
             metadata={
                 "type": "csv_analysis",
                 "filename": filename,
-                "feedbacks_analyzed": len(feedbacks),
+                "feedbacks_analyzed": feedback_count,
                 "sentiment": analysis.overall_sentiment,
                 "index": int(analysis.satisfaction_index * 100),
             },
@@ -490,7 +533,7 @@ class ChatService:
             "metadata": {
                 "type": "new_feedback_batch",
                 "filename": filename,
-                "feedbacks_analyzed": len(feedbacks),
+                "feedbacks_analyzed": feedback_count,
                 "sentiment": analysis.overall_sentiment,
                 "index": int(analysis.satisfaction_index * 100),
             },
@@ -498,20 +541,68 @@ class ChatService:
             "success": True,
         }
 
-    def analyze_reviews(
+    async def _classify_upload(
+        self,
+        conversation_id: str,
+        upload_id: str,
+        context: Optional[JobContext] = None,
+    ) -> int:
+        """Replace ingest-time keyword labels with LLM per-row classifications.
+
+        Rows are read back page by page, classified in packed batches, and
+        written back with one bulk update per page. Rows the model could not
+        classify keep their ingest-time values. Returns the rows updated.
+        """
+        if context:
+            await context.update(stage="classifying", rows_classified=0)
+        classified = 0
+
+        async def flush(page: List[Dict]) -> None:
+            nonlocal classified
+            results = await ai_service.classify_rows([d["content"] for d in page])
+            classified += await self.feedback_repo.update_feedback_classifications(
+                [
+                    {
+                        "_id": doc["_id"],
+                        "sentiment": row.sentiment,
+                        "sentiment_score": row.score,
+                        "themes": row.themes,
+                    }
+                    for doc, row in zip(page, results)
+                    if row is not None
+                ]
+            )
+            if context:
+                await context.update(rows_classified=classified)
+
+        page: List[Dict] = []
+        async for doc in self.feedback_repo.iter_upload_rows(
+            conversation_id, upload_id
+        ):
+            page.append(doc)
+            if len(page) >= settings.CSV_BATCH_SIZE:
+                await flush(page)
+                page = []
+        if page:
+            await flush(page)
+        return classified
+
+    async def analyze_reviews(
         self,
         reviews: List[str],
         history: List[Dict[str, str]] = None,
         user_id: str = None,
     ) -> FeedbackAnalysis:
-        analysis = ai_service.analyze_feedback(reviews=reviews, history=history or [])
+        analysis = await ai_service.analyze_feedback(
+            reviews=reviews, history=history or []
+        )
 
         if user_id:
-            self.feedback_repo.save_analysis(
+            await self.feedback_repo.save_analysis(
                 user_id=user_id, analysis=analysis, feedback_count=len(reviews)
             )
             for review in reviews:
-                self.feedback_repo.create_feedback(
+                await self.feedback_repo.create_feedback(
                     user_id=user_id,
                     content=review,
                     sentiment=analysis.overall_sentiment,
@@ -520,13 +611,15 @@ class ChatService:
                 )
         return analysis
 
-    def get_user_stats(self, user_id: str) -> Dict:
+    async def get_data_version(self, user_id: str) -> int:
+        return await self.feedback_repo.get_data_version(user_id)
+
+    async def get_user_stats(self, user_id: str, version: Optional[int] = None) -> Dict:
         """Get aggregated statistics for a user."""
-        return {
-            "sentiment_distribution": self.feedback_repo.get_sentiment_stats(user_id),
-            "top_themes": self.feedback_repo.get_theme_stats(user_id),
-            "total_feedbacks": self.feedback_repo.get_feedback_count(user_id),
-            "average_satisfaction": self.feedback_repo.get_average_satisfaction(
-                user_id
-            ),
-        }
+        if version is None:
+            version = await self.get_data_version(user_id)
+        return await analytics_cache.aget(
+            (user_id, "stats"),
+            version,
+            lambda: self.feedback_repo.get_user_stats(user_id),
+        )
@@ -0,0 +1,166 @@
+"""Streaming CSV parsing for /analyze/upload.
+
+Rows are decoded and parsed incrementally from the spooled upload, so peak
+memory depends on the batch size rather than on the size of the file.
+"""
+import csv
+import io
+import os
+import tempfile
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+FEEDBACK_COLUMNS = [
+    "review",
+    "feedback",
+    "text",
+    "comment",
+    "description",
+    "content",
+    "message",
+]
+
+
+class CsvBudgetExceeded(Exception):
+    pass
+
+
+class _ByteBudgetReader(io.RawIOBase):
+    def __init__(self, raw: BinaryIO, max_bytes: Optional[int]):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self.raw.read(len(buffer))
+        if not chunk:
+            return 0
+        self.bytes_read += len(chunk)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise CsvBudgetExceeded(f"CSV exceeds the {self.max_bytes} byte limit")
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self) -> None:
+        # The upload owns the underlying file; never close it from here.
+        pass
+
+
+def detect_feedback_column(header: List[str]) -> Optional[int]:
+    for col in FEEDBACK_COLUMNS:
+        for index, key in enumerate(header):
+            if col in key.lower():
+                return index
+    return None
+
+
+def _csv_reader(binary_file: BinaryIO, max_bytes: Optional[int]):
+    stream = io.TextIOWrapper(
+        io.BufferedReader(_ByteBudgetReader(binary_file, max_bytes)),
+        encoding="utf-8-sig",
+        newline="",
+    )
+    return csv.reader(stream)
+
+
+def _limit_rows(reader, max_rows: Optional[int]) -> Iterator[List[str]]:
+    for row_count, row in enumerate(reader, 1):
+        if max_rows is not None and row_count > max_rows:
+            raise CsvBudgetExceeded(f"CSV exceeds the {max_rows} row limit")
+        yield row
+
+
+def check_csv_limits(
+    binary_file: BinaryIO,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> int:
+    """Parse the whole file once, raising CsvBudgetExceeded past either limit.
+
+    Run before ingesting so an oversized file fails before any batch is
+    stored. Reads from the start and returns the number of data rows,
+    leaving the file rewound.
+    """
+    binary_file.seek(0)
+    reader = _csv_reader(binary_file, max_bytes)
+    next(reader, None)
+    rows = sum(1 for _ in _limit_rows(reader, max_rows))
+    binary_file.seek(0)
+    return rows
+
+
+def iter_feedback_rows(
+    binary_file: BinaryIO,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield feedback texts from a CSV file object without loading it whole.
+
+    The feedback column is picked once from the header. Without a known
+    column, or when that column holds no usable value, the first
+    sufficiently long value of each row is used instead; the fallback
+    re-reads the file from the start, so ``binary_file`` must be seekable.
+    """
+    reader = _csv_reader(binary_file, max_bytes)
+    header = next(reader, None)
+    if header is None:
+        return
+    column = detect_feedback_column(header)
+
+    if column is not None:
+        found = False
+        for row in _limit_rows(reader, max_rows):
+            text = row[column].strip() if column < len(row) else ""
+            if text and len(text) > 10:
+                found = True
+                yield text
+        if found:
+            return
+        binary_file.seek(0)
+        reader = _csv_reader(binary_file, max_bytes)
+        next(reader, None)
+
+    for row in _limit_rows(reader, max_rows):
+        for value in row:
+            if len(value) > 20:
+                yield value.strip()
+                break
+
+
+def take(rows: Iterator[str], size: int) -> List[str]:
+    return list(islice(rows, size))
+
+
+async def spool_upload(
+    upload: UploadFile,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = 1024 * 1024,
+) -> str:
+    """Copy an upload to a file that outlives the request, in bounded chunks."""
+    directory = directory or os.path.join(tempfile.gettempdir(), "feedback-jobs")
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".csv")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise CsvBudgetExceeded(
+                        f"CSV exceeds the {max_bytes} byte limit"
+                    )
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
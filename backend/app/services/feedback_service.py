@@ -58,7 +58,7 @@ class FeedbackService:
         conversation_id: str,
         history: List[Dict[str, str]],
     ) -> Dict[str, Any]:
-        analysis: FeedbackAnalysis = self.ai_service.analyze_feedback(
+        analysis: FeedbackAnalysis = await self.ai_service.analyze_feedback(
             reviews=[feedback_text], history=history
         )
         self.feedback_repo.create_feedback(
@@ -93,7 +93,7 @@ class FeedbackService:
                 "chat_response": "No feedback data available. Submit feedback to start.",
                 "analysis": None,
             }
-        analysis: FeedbackAnalysis = self.ai_service.analyze_feedback(
+        analysis: FeedbackAnalysis = await self.ai_service.analyze_feedback(
             reviews=[f["content"] for f in feedbacks],
             history=history,
             user_question=question,
@@ -103,13 +103,13 @@ class FeedbackService:
             "analysis": self._analysis_to_dict(analysis),
         }
 
-    def analyze_reviews(
+    async def analyze_reviews(
         self,
         reviews: List[str],
         history: List[Dict[str, str]] = None,
         user_id: str = None,
     ) -> FeedbackAnalysis:
-        analysis = self.ai_service.analyze_feedback(
+        analysis = await self.ai_service.analyze_feedback(
             reviews=reviews, history=history or []
         )
         if user_id:
@@ -127,14 +127,7 @@ class FeedbackService:
         return analysis
 
     def get_user_stats(self, user_id: str) -> Dict[str, Any]:
-        return {
-            "sentiment_distribution": self.feedback_repo.get_sentiment_stats(user_id),
-            "top_themes": self.feedback_repo.get_theme_stats(user_id),
-            "total_feedbacks": self.feedback_repo.get_feedback_count(user_id),
-            "average_satisfaction": self.feedback_repo.get_average_satisfaction(
-                user_id
-            ),
-        }
+        return self.feedback_repo.get_user_stats(user_id)
 
     def _analysis_to_dict(self, analysis: FeedbackAnalysis) -> Dict[str, Any]:
         return (
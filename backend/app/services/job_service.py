@@ -0,0 +1,241 @@
+"""In-process background job queue.
+
+Jobs are persisted through a pluggable repository (``JobRepository`` for the
+durable ``jobs`` collection, ``InMemoryJobRepository`` for tests) and run by
+a small pool of asyncio workers. While a handler runs, its job's lease is
+renewed in the background, and handlers receive a ``JobContext`` to report
+stage and progress. Every ``reclaim_interval`` seconds the queue picks up
+jobs whose lease expired (their process died), so they do not wait for a
+restart.
+
+Each job records the ``host`` that submitted it, since handlers may depend
+on local files. Queued jobs are only taken over from another host once they
+have waited a full lease; handlers must fail clearly when such a file is
+missing.
+"""
+import asyncio
+import logging
+import os
+import socket
+import traceback
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.repositories.job_repository import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any], "JobContext"], Awaitable[Any]]
+
+
+class JobContext:
+    def __init__(self, queue: "JobQueue", job: Dict[str, Any]):
+        self.queue = queue
+        self.job = job
+        self.job_id = str(job["_id"])
+        self.progress: Dict[str, Any] = dict(job.get("progress") or {})
+
+    async def update(self, stage: Optional[str] = None, **progress: Any) -> None:
+        self.progress.update(progress)
+        fields: Dict[str, Any] = {
+            "progress": self.progress,
+            "heartbeat_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+        if stage:
+            fields["stage"] = stage
+        await self.queue.repository.update_job(self.job_id, fields)
+        self.queue.notify(self.job_id)
+
+
+class JobQueue:
+    def __init__(
+        self,
+        repository: Any,
+        workers: int = 2,
+        lease_seconds: int = 300,
+        reclaim_interval: Optional[float] = None,
+    ):
+        self.repository = repository
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.reclaim_interval = reclaim_interval or lease_seconds / 2
+        self.host = socket.gethostname()
+        self.worker_id = f"{self.host}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._enqueued: Set[str] = set()
+        self._updates: Dict[str, asyncio.Event] = {}
+        self._waiting: Counter = Counter()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._reclaim_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def resume(self) -> int:
+        """Enqueue jobs left queued, or running with an expired lease.
+
+        Returns how many were not already waiting in this process's queue.
+        """
+        jobs = await self.repository.list_resumable_jobs(
+            self.lease_seconds, self.host
+        )
+        return sum(self._enqueue(str(job["_id"])) for job in jobs)
+
+    def _enqueue(self, job_id: str) -> bool:
+        if job_id in self._enqueued:
+            return False
+        self._enqueued.add(job_id)
+        self._queue.put_nowait(job_id)
+        return True
+
+    async def submit(
+        self, kind: str, user_id: str, payload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        now = datetime.utcnow()
+        job = await self.repository.create_job(
+            {
+                "kind": kind,
+                "user_id": user_id,
+                "status": "queued",
+                "stage": "queued",
+                "progress": {},
+                "payload": payload,
+                "result": None,
+                "error": None,
+                "attempts": 0,
+                "host": self.host,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        if self._queue is None:
+            await self.start()
+        self._enqueue(str(job["_id"]))
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.repository.get_job(job_id)
+
+    def notify(self, job_id: str) -> None:
+        event = self._updates.pop(job_id, None)
+        if event:
+            event.set()
+
+    async def wait_for_update(self, job_id: str, timeout: float) -> None:
+        """Wait until this process updates the job, or ``timeout`` seconds pass.
+
+        Updates made by other processes are only seen by re-reading the job, so
+        callers should always re-read after this returns.
+        """
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        self._waiting[job_id] += 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # The last waiter to leave drops the event, unless notify did
+            self._waiting[job_id] -= 1
+            if not self._waiting[job_id]:
+                del self._waiting[job_id]
+                if self._updates.get(job_id) is event:
+                    del self._updates[job_id]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._enqueued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.error(f"Job worker {index} crashed:\n{traceback.format_exc()}")
+            finally:
+                self._queue.task_done()
+
+    async def _reclaim_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reclaim_interval)
+            try:
+                reclaimed = await self.resume()
+                if reclaimed:
+                    logger.info(f"Reclaimed {reclaimed} job(s) with expired leases")
+            except Exception:
+                logger.error(f"Job reclaim failed:\n{traceback.format_exc()}")
+
+    async def _keep_alive(self, job_id: str) -> None:
+        # Renew well within the lease so a long stage without progress
+        # updates is not mistaken for a dead worker.
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.repository.update_job(
+                    job_id, {"heartbeat_at": datetime.utcnow()}
+                )
+            except Exception:
+                logger.error(
+                    f"Job {job_id} heartbeat failed:\n{traceback.format_exc()}"
+                )
+
+    async def _run(self, job_id: str) -> None:
+        job = await self.repository.claim_job(
+            job_id, self.worker_id, self.lease_seconds
+        )
+        if not job:
+            return
+        self.notify(job_id)
+        handler = self._handlers.get(job["kind"])
+        context = JobContext(self, job)
+        keep_alive = asyncio.create_task(self._keep_alive(job_id))
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job['kind']}'")
+            result = await handler(job, context)
+            fields = {"status": "completed", "stage": "completed", "result": result}
+        except Exception as e:
+            logger.error(f"Job {job_id} failed:\n{traceback.format_exc()}")
+            detail = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+            fields = {"status": "failed", "stage": "failed", "error": detail}
+        finally:
+            keep_alive.cancel()
+            await asyncio.gather(keep_alive, return_exceptions=True)
+        fields["updated_at"] = datetime.utcnow()
+        await self.repository.update_job(job_id, fields)
+        self.notify(job_id)
+
+
+def is_finished(job: Dict[str, Any]) -> bool:
+    return job.get("status") in TERMINAL_STATUSES
+
+
+def serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job.get("kind"),
+        "status": job.get("status"),
+        "stage": job.get("stage"),
+        "progress": job.get("progress") or {},
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "updated_at": job["updated_at"].isoformat() if job.get("updated_at") else None,
+    }
@@ -0,0 +1,115 @@
+"""Incremental parsing of JSON-array and NDJSON request bodies.
+
+Both parsers consume the body as an async stream of byte chunks and yield
+items as soon as they are complete, so a large upload is never held in
+memory at once; only the item currently being parsed is buffered.
+"""
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+MAX_ITEM_BYTES = 1024 * 1024
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+async def _decoded(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_item_bytes: int = MAX_ITEM_BYTES
+) -> AsyncIterator[Any]:
+    """Yield one parsed value per non-blank line."""
+    buffer = ""
+    line_number = 0
+    async for text in _decoded(chunks):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _parse(line, line_number)
+        if len(buffer) > max_item_bytes:
+            raise JsonStreamError(f"Line {line_number + 1} exceeds {max_item_bytes} bytes")
+    if buffer.strip():
+        yield _parse(buffer, line_number + 1)
+
+
+async def iter_json_array(
+    chunks: AsyncIterator[bytes], max_item_bytes: int = MAX_ITEM_BYTES
+) -> AsyncIterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = finished = need_comma = False
+    index = 0
+    async for text in _decoded(chunks):
+        buffer += text
+        position = 0
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position >= len(buffer):
+                break
+            if finished:
+                raise JsonStreamError("Unexpected data after the closing ']'")
+            char = buffer[position]
+            if not started:
+                if char != "[":
+                    raise JsonStreamError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if char == "]":
+                if index and not need_comma:
+                    raise JsonStreamError("Trailing ',' before ']'")
+                finished = True
+                position += 1
+                continue
+            if char == ",":
+                if not need_comma:
+                    raise JsonStreamError(f"Unexpected ',' after element {index}")
+                need_comma = False
+                position += 1
+                continue
+            if need_comma:
+                raise JsonStreamError(f"Expected ',' after element {index}")
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Incomplete element; wait for more data.
+                break
+            if end == len(buffer) and isinstance(value, (int, float)):
+                # A number at the end of the buffer may still be growing.
+                break
+            index += 1
+            position = end
+            need_comma = True
+            yield value
+        buffer = buffer[position:]
+        if len(buffer) > max_item_bytes:
+            raise JsonStreamError(f"Element {index} exceeds {max_item_bytes} bytes")
+    if not started or not finished:
+        raise JsonStreamError("Request body is not a complete JSON array")
+
+
+def _skip_whitespace(buffer: str, position: int) -> int:
+    while position < len(buffer) and buffer[position] in " \t\r\n":
+        position += 1
+    return position
+
+
+def _parse(line: str, line_number: int) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        raise JsonStreamError(f"Invalid JSON on line {line_number}: {e.msg}")
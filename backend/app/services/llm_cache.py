@@ -0,0 +1,174 @@
+"""Content-addressed cache for LLM results.
+
+Keys hash everything that determines a response: model, temperature, the
+fully rendered prompt and the version of the schema the output is parsed
+into. Entries live in an in-memory LRU with a TTL and, when ``path`` is set,
+in a SQLite file that survives restarts. Parsed ``FeedbackAnalysis`` objects
+are stored as-is, so a hit skips both the provider call and output parsing.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.models.feedback import FeedbackAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Types that may be revived from the disk tier, by name.
+CACHEABLE_MODELS: Dict[str, Type[BaseModel]] = {
+    "FeedbackAnalysis": FeedbackAnalysis,
+}
+
+
+def schema_version(model: Type[BaseModel]) -> str:
+    """Changes whenever the parser's target schema changes."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:12]
+
+
+def cache_key(model: str, temperature: float, prompt: str, schema: str) -> str:
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "prompt": prompt, "schema": schema},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _copy(value: Any) -> Any:
+    # Callers post-process results in place; never hand out the cached object.
+    if isinstance(value, BaseModel):
+        return value.model_copy(deep=True)
+    return value
+
+
+def _dump(value: Any) -> str:
+    if isinstance(value, BaseModel):
+        return json.dumps(
+            {"type": type(value).__name__, "data": value.model_dump(mode="json")}
+        )
+    return json.dumps({"type": "text", "data": value})
+
+
+def _load(raw: str) -> Any:
+    entry = json.loads(raw)
+    model = CACHEABLE_MODELS.get(entry["type"])
+    return model.model_validate(entry["data"]) if model else entry["data"]
+
+
+class LLMCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400,
+        path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str, call_site: str = "default") -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count(self.hits, call_site)
+                return _copy(entry[1])
+            if entry:
+                del self._entries[key]
+            value, expires_at = self._disk_get(key, now)
+            if value is not None:
+                self._remember(key, value, expires_at)
+                self._count(self.hits, call_site)
+                return _copy(value)
+            self._count(self.misses, call_site)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, _copy(value), now + self.ttl_seconds)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)",
+                        (key, _dump(value), now + self.ttl_seconds),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache write failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "by_call_site": {
+                site: {"hits": self.hits.get(site, 0), "misses": self.misses.get(site, 0)}
+                for site in set(self.hits) | set(self.misses)
+            },
+        }
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Tuple[Optional[Any], float]:
+        if self._db is None:
+            return None, now
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None, now
+            if row[1] <= now:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None, now
+            return _load(row[0]), row[1]
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None, now
+
+    @staticmethod
+    def _count(counter: Dict[str, int], call_site: str) -> None:
+        counter[call_site] = counter.get(call_site, 0) + 1
+
+
+llm_cache = LLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    path=settings.LLM_CACHE_PATH or None,
+)
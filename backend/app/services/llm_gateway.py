@@ -0,0 +1,226 @@
+"""Single entry point for chat model calls.
+
+Every LLM call in the app goes through ``llm_gateway`` so that the provider's
+requests-per-minute and tokens-per-minute limits are respected process-wide,
+in-flight calls are bounded, and HTTP connections are pooled and reused
+instead of every model instance opening its own.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, MutableMapping, Optional, Tuple
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from app.core.config import settings
+from app.core.metrics import LLM_CALL_DURATION, LLMUsageCallback
+from app.services.llm_providers import build_chat_model
+from app.services.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units evenly over a minute, bursting up to that."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, amount: float) -> float:
+        """Take ``amount`` if available; otherwise return seconds to wait."""
+        # A request larger than the whole bucket would never fit; let it
+        # through once the bucket is full rather than blocking forever.
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.available = min(
+                self.capacity, self.available + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            if self.available >= amount:
+                self.available -= amount
+                return 0.0
+            return (amount - self.available) / self.rate
+
+    def acquire(self, amount: float = 1.0) -> None:
+        while True:
+            wait = self._take(amount)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1.0) -> None:
+        while True:
+            wait = self._take(amount)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class RequestRateLimiter(BaseRateLimiter):
+    """Charges one request per model call, including each step of an agent run."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return not self.bucket._take(1)
+        self.bucket.acquire(1)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return not self.bucket._take(1)
+        await self.bucket.aacquire(1)
+        return True
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        model: str,
+        provider: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        completion_tokens: int = 1000,
+    ):
+        self.model = model
+        self.provider = provider
+        self.completion_tokens = completion_tokens
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.rate_limiter = RequestRateLimiter(self.requests)
+        self.max_concurrency = max_concurrency
+        self._semaphores: MutableMapping[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self.http_client = httpx.Client(timeout=settings.LLM_TIMEOUT_SECONDS)
+        self.http_async_client = httpx.AsyncClient(
+            timeout=settings.LLM_TIMEOUT_SECONDS
+        )
+        self._models: Dict[Tuple[float, int], BaseChatModel] = {}
+
+    def chat_model(self, temperature: float, max_tokens: int) -> BaseChatModel:
+        """Shared model instance for a temperature/max_tokens pair."""
+        key = (temperature, max_tokens)
+        if key not in self._models:
+            self._models[key] = build_chat_model(
+                self.provider,
+                model=self.model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                rate_limiter=self.rate_limiter,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+            )
+        return self._models[key]
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores bind to the running loop; keep one per loop so scripts
+        # that call asyncio.run repeatedly still work. A semaphore that ever
+        # made a caller wait references its loop, which keeps the weak key
+        # alive, so entries for closed loops are also dropped here.
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            for other in [other for other in self._semaphores if other.is_closed()]:
+                del self._semaphores[other]
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def estimate(self, inputs: Any) -> int:
+        if isinstance(inputs, dict):
+            text = "".join(str(v) for v in inputs.values())
+        else:
+            text = str(inputs)
+        return estimate_tokens(text) + self.completion_tokens
+
+    async def ainvoke(
+        self,
+        runnable: Runnable,
+        inputs: Any,
+        call_site: str = "default",
+        estimated_tokens: Optional[int] = None,
+        config: Optional[RunnableConfig] = None,
+    ) -> Any:
+        """Run ``runnable`` once the token budget and a concurrency slot allow it.
+
+        Request-per-minute accounting happens per model call inside the
+        runnable (see ``RequestRateLimiter``), so multi-step agents are
+        charged for every step.
+        """
+        tokens = estimated_tokens or self.estimate(inputs)
+        await self.tokens.aacquire(tokens)
+        config = self._instrument(config, call_site)
+        async with self._semaphore():
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await runnable.ainvoke(inputs, config=config)
+                outcome = "ok"
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                LLM_CALL_DURATION.labels(call_site, outcome).observe(elapsed)
+                logger.debug(
+                    f"LLM call {call_site} took {elapsed:.2f}s (~{tokens} tokens)"
+                )
+
+    async def astream(
+        self,
+        runnable: Runnable,
+        inputs: Any,
+        call_site: str = "default",
+        estimated_tokens: Optional[int] = None,
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """Streaming counterpart of ``ainvoke``; the slot is held until exhausted."""
+        tokens = estimated_tokens or self.estimate(inputs)
+        await self.tokens.aacquire(tokens)
+        config = self._instrument(config, call_site)
+        async with self._semaphore():
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                async for chunk in runnable.astream(inputs, config=config, **kwargs):
+                    yield chunk
+                outcome = "ok"
+            finally:
+                elapsed = time.perf_counter() - started
+                LLM_CALL_DURATION.labels(call_site, outcome).observe(elapsed)
+                logger.debug(
+                    f"LLM stream {call_site} took {elapsed:.2f}s (~{tokens} tokens)"
+                )
+
+    def _instrument(
+        self, config: Optional[RunnableConfig], call_site: str
+    ) -> RunnableConfig:
+        # Token usage is reported per model call, so agent steps each count
+        return merge_configs(config, {"callbacks": [LLMUsageCallback(call_site)]})
+
+    async def aclose(self) -> None:
+        await self.http_async_client.aclose()
+        self.http_client.close()
+
+
+llm_gateway = LLMGateway(
+    model=settings.LLM_MODEL,
+    provider=settings.LLM_PROVIDER,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+)
@@ -0,0 +1,560 @@
+"""Chat model providers behind ``llm_gateway.chat_model``.
+
+``LLM_PROVIDER`` selects one:
+
+- ``groq``: the real model (default);
+- ``record``: the real model, appending every request/response pair,
+  tool calls included, to the JSONL cassette at ``LLM_CASSETTE_PATH``;
+- ``replay``: answers only from that cassette and raises ``CassetteMiss``
+  for anything else, so a run never reaches the network;
+- ``fake``: deterministic answers derived from the prompt alone (see
+  ``FakeChatModel``), for load tests without a cassette.
+
+``replay`` and ``fake`` sleep ``LLM_SIMULATED_LATENCY_SECONDS`` plus
+``LLM_SIMULATED_SECONDS_PER_TOKEN`` per completion token before answering;
+set both to 0 to profile the CPU-side work around the model call. Streamed,
+they yield the same reply a word at a time; ``record`` streams the real
+model and records the combined reply.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    message_chunk_to_message,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_groq import ChatGroq
+
+from app.core.config import settings
+from app.services import sentiment
+from app.services.themes import STOPWORDS
+from app.services.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("groq", "record", "replay", "fake")
+
+REVIEW_LINE = re.compile(r'^(?:\d+\. )?"(.*)"$')
+ROW_LINE = re.compile(r"^(\d+): (.*)$")
+TOTAL = re.compile(r"\((\d+) total")
+WORD = re.compile(r"[a-z]{5,}")
+STREAM_PIECE = re.compile(r"\s*\S+")
+
+TOOL_KEYWORDS = [
+    ("get_negative_feedbacks", ("complain", "negative", "issue", "problem", "bad")),
+    ("get_positive_feedbacks", ("praise", "positive", "like", "love", "good")),
+    ("get_analytics_summary", ("how many", "score", "satisfaction", "summary")),
+]
+
+
+def _reviews(prompt: str) -> List[str]:
+    reviews = []
+    for line in prompt.splitlines():
+        match = REVIEW_LINE.match(line.strip())
+        if match:
+            reviews.append(match.group(1))
+    return reviews
+
+
+def _top_terms(texts: Sequence[str], count: int) -> List[str]:
+    terms = Counter(
+        word
+        for text in texts
+        for word in WORD.findall(text.lower())
+        if word not in STOPWORDS
+    )
+    return [term for term, _ in terms.most_common(count)]
+
+
+def analysis_json(prompt: str) -> str:
+    reviews = _reviews(prompt)
+    match = TOTAL.search(prompt)
+    total = int(match.group(1)) if match else len(reviews)
+    counts = Counter(sentiment.label_batch(reviews)) if reviews else Counter()
+    shown = sum(counts.values())
+    # Scale sample counts up to the full population, remainder to neutral
+    dist = {
+        label: counts[label] * total // shown if shown else 0
+        for label in ("positive", "negative", "mixed")
+    }
+    dist["neutral"] = total - sum(dist.values())
+    satisfaction = (
+        (dist["positive"] + 0.5 * (dist["neutral"] + dist["mixed"])) / total
+        if total
+        else 0.5
+    )
+    overall = "positive" if dist["positive"] >= dist["negative"] else "negative"
+    themes = [
+        {
+            "theme": term.title(),
+            "count": sum(term in review.lower() for review in reviews) or 1,
+            "sentiment": overall,
+            "examples": [r for r in reviews if term in r.lower()][:2],
+        }
+        for term in _top_terms(reviews, 3)
+    ]
+    suggestions = [
+        {
+            "feature": f"Improve {theme['theme'].lower()}",
+            "priority": "high" if i == 0 else "medium",
+            "reasoning": f"Mentioned in {theme['count']} reviews",
+            "affected_users": theme["count"],
+            "impact_score": 7.0 - i,
+        }
+        for i, theme in enumerate(themes)
+    ]
+    return json.dumps(
+        {
+            "total_feedbacks_analyzed": total,
+            "overall_sentiment": overall,
+            "satisfaction_index": round(satisfaction, 2),
+            "sentiment_distribution": dist,
+            "total_themes_detected": len(themes),
+            "themes": themes,
+            "key_features_count": len(suggestions),
+            "feature_suggestions": suggestions,
+            "chat_response": markdown_report(prompt),
+        }
+    )
+
+
+def classification_json(prompt: str) -> str:
+    rows = []
+    for line in prompt.splitlines():
+        match = ROW_LINE.match(line.strip())
+        if match:
+            rows.append((int(match.group(1)), match.group(2)))
+    scores = sentiment.score_batch([text for _, text in rows]) if rows else None
+    items = []
+    for i, (row_id, text) in enumerate(rows):
+        items.append(
+            {
+                "id": row_id,
+                "s": str(scores.labels[i]),
+                "p": round(float(scores.scores[i]), 2),
+                "t": [term.title() for term in _top_terms([text], 1)],
+            }
+        )
+    return json.dumps(items)
+
+
+def markdown_report(prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    quotes = _reviews(prompt)[:3] or ["No quotes available"]
+    lines = [
+        f"Report {digest[:8]}.",
+        "",
+        "**Key Insights:**",
+        *(f'- ✅ "{quote}"' for quote in quotes),
+        "",
+        "**Priority Actions:**",
+        "🔴 **CRITICAL:** Address the most frequent complaint",
+        "🟢 **MAINTAIN:** Keep what customers praise",
+    ]
+    return "\n".join(lines)
+
+
+class CassetteMiss(LookupError):
+    """A replayed request that was never recorded."""
+
+
+def request_key(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Sequence[BaseMessage],
+    tools: Optional[Sequence[Dict]] = None,
+) -> str:
+    # Message ids are left out: LangGraph gives agent messages fresh ones
+    # on every run.
+    canonical = [
+        {
+            "type": m.type,
+            "content": m.content,
+            "tool_calls": [
+                {"name": call["name"], "args": call["args"]}
+                for call in getattr(m, "tool_calls", None) or []
+            ],
+            "tool_call_id": getattr(m, "tool_call_id", None),
+        }
+        for m in messages
+    ]
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "tools": sorted(t["function"]["name"] for t in tools or []),
+            "messages": canonical,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Append-only JSONL file of ``{"key", "call", "response"}`` entries.
+
+    The first response recorded for a key is the one replayed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._responses: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses.setdefault(entry["key"], entry["response"])
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        response = self._responses.get(key)
+        return messages_from_dict([response])[0] if response else None
+
+    def record(self, key: str, call: Dict[str, Any], message: AIMessage) -> None:
+        response = messages_to_dict([message])[0]
+        line = json.dumps({"key": key, "call": call, "response": response}, default=str)
+        with self._lock:
+            self._responses.setdefault(key, response)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class SimulatedChatModel(BaseChatModel, ABC):
+    """Answers without a provider, after a latency proportional to the reply."""
+
+    model: str = "simulated"
+    temperature: float = 0.0
+    max_tokens: int = 4000
+    latency_seconds: float = 0.0
+    seconds_per_token: float = 0.0
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    @abstractmethod
+    def respond(
+        self, messages: List[BaseMessage], tools: Optional[List[Dict]] = None
+    ) -> AIMessage:
+        """The reply to ``messages``, with tool calls if ``tools`` are bound."""
+
+    def _delay(self, message: AIMessage) -> float:
+        usage = message.usage_metadata or {}
+        output_tokens = usage.get("output_tokens") or estimate_tokens(
+            str(message.content)
+        )
+        return self.latency_seconds + self.seconds_per_token * output_tokens
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self.respond(messages, kwargs.get("tools"))
+        time.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self.respond(messages, kwargs.get("tools"))
+        await asyncio.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """``respond()`` a word at a time, then its tool calls and usage.
+
+        ``latency_seconds`` passes before the first chunk and the per-token
+        delay is spread over the chunks, so the total matches ``_agenerate``.
+        """
+        message = self.respond(messages, kwargs.get("tools"))
+        pieces = [
+            AIMessageChunk(content=piece)
+            for piece in STREAM_PIECE.findall(str(message.content))
+        ]
+        pieces.append(
+            AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": call["name"],
+                        "args": json.dumps(call["args"]),
+                        "id": call["id"],
+                        "index": i,
+                    }
+                    for i, call in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            )
+        )
+        per_piece = (self._delay(message) - self.latency_seconds) / len(pieces)
+        await asyncio.sleep(self.latency_seconds)
+        for piece in pieces:
+            await asyncio.sleep(per_piece)
+            chunk = ChatGenerationChunk(message=piece)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeChatModel(SimulatedChatModel):
+    """Deterministic replies, in a shape every parser in the app accepts:
+
+    - analysis and chunk prompts get a ``FeedbackAnalysis`` JSON document
+      whose sentiment counts come from the keyword scorer;
+    - row classification prompts get the compact JSON array, one object per row;
+    - the ReAct agent first calls one feedback tool chosen from the question,
+      then answers by quoting the tool output;
+    - anything else (questions, narratives) gets a short markdown report.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-feedback"
+
+    def respond(
+        self, messages: List[BaseMessage], tools: Optional[List[Dict]] = None
+    ) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        if tools:
+            message = self._agent_step(messages, tools)
+        elif "one per line as <id>: <text>" in prompt:
+            message = AIMessage(content=classification_json(prompt))
+        elif '"properties"' in prompt:
+            message = AIMessage(content=analysis_json(prompt))
+        else:
+            message = AIMessage(content=markdown_report(prompt))
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(str(message.content)) + 10 * len(
+            message.tool_calls
+        )
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return message
+
+    def _agent_step(self, messages: List[BaseMessage], tools: List[Dict]) -> AIMessage:
+        last_human = max(
+            i for i, m in enumerate(messages) if isinstance(m, HumanMessage)
+        )
+        results = [m for m in messages[last_human:] if isinstance(m, ToolMessage)]
+        if results:
+            quoted = str(results[-1].content)[:300].replace("\n", " ")
+            return AIMessage(
+                content=f'**Answer**\n- From {results[-1].name}: "{quoted}"'
+            )
+        question = str(messages[last_human].content).lower()
+        names = {tool["function"]["name"] for tool in tools}
+        name = next(
+            (
+                tool
+                for tool, keywords in TOOL_KEYWORDS
+                if tool in names and any(k in question for k in keywords)
+            ),
+            "get_all_feedbacks",
+        )
+        call_id = "call_" + hashlib.sha1(question.encode("utf-8")).hexdigest()[:12]
+        return AIMessage(
+            content="", tool_calls=[{"name": name, "args": {}, "id": call_id}]
+        )
+
+
+class ReplayChatModel(SimulatedChatModel):
+    cassette: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def respond(
+        self, messages: List[BaseMessage], tools: Optional[List[Dict]] = None
+    ) -> AIMessage:
+        key = request_key(
+            self.model, self.temperature, self.max_tokens, messages, tools
+        )
+        message = self.cassette.get(key)
+        if message is None:
+            raise CassetteMiss(
+                f"No recorded response for request {key[:12]} in "
+                f"{self.cassette.path}; record it with LLM_PROVIDER=record"
+            )
+        return message
+
+
+class RecordingChatModel(BaseChatModel):
+    """Delegates to ``inner`` and appends each exchange to ``cassette``."""
+
+    inner: Any
+    cassette: Any
+    model: str
+    temperature: float
+    max_tokens: int
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{self.inner._llm_type}"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        # Bind exactly what the provider would, so recording does not change
+        # the request
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def _record(
+        self, messages: List[BaseMessage], kwargs: Dict, result: ChatResult
+    ) -> None:
+        message = result.generations[0].message
+        tools = kwargs.get("tools")
+        key = request_key(
+            self.model, self.temperature, self.max_tokens, messages, tools
+        )
+        call = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "tools": [t["function"]["name"] for t in tools or []],
+            "messages": messages_to_dict(messages),
+        }
+        try:
+            self.cassette.record(key, call, message)
+        except Exception as e:
+            logger.warning(f"Could not record LLM response: {e}")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        self._record(messages, kwargs, result)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        self._record(messages, kwargs, result)
+        return result
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Streams ``inner``, recording the chunks combined once it ends."""
+        combined = None
+        async for chunk in self.inner._astream(messages, stop=stop, **kwargs):
+            combined = chunk if combined is None else combined + chunk
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if combined is not None:
+            message = message_chunk_to_message(combined.message)
+            self._record(
+                messages,
+                kwargs,
+                ChatResult(generations=[ChatGeneration(message=message)]),
+            )
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def _cassette() -> Cassette:
+    path = settings.LLM_CASSETTE_PATH
+    if path not in _cassettes:
+        _cassettes[path] = Cassette(path)
+    return _cassettes[path]
+
+
+def build_chat_model(
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    rate_limiter: BaseRateLimiter,
+    http_client: httpx.Client,
+    http_async_client: httpx.AsyncClient,
+) -> BaseChatModel:
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER {provider!r}; expected one of {PROVIDERS}")
+    if provider in ("replay", "fake"):
+        cls = ReplayChatModel if provider == "replay" else FakeChatModel
+        extra = {"cassette": _cassette()} if provider == "replay" else {}
+        return cls(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            latency_seconds=settings.LLM_SIMULATED_LATENCY_SECONDS,
+            seconds_per_token=settings.LLM_SIMULATED_SECONDS_PER_TOKEN,
+            **extra,
+        )
+
+    # When recording, the wrapper is what the app invokes, so it carries the
+    # rate limiter instead
+    groq = ChatGroq(
+        model=model,
+        api_key=settings.GROQ_API_KEY,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        rate_limiter=rate_limiter if provider == "groq" else None,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+    if provider == "groq":
+        return groq
+    return RecordingChatModel(
+        inner=groq,
+        cassette=_cassette(),
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        rate_limiter=rate_limiter,
+    )
@@ -0,0 +1,79 @@
+"""Fit reviews into an LLM input budget measured in tokens, not review counts.
+
+Reviews are drawn from each stratum in proportion to its weight, so the
+stratified mix survives whatever the review lengths are. When the input is
+over budget, reviews longer than ``max_review_tokens`` are truncated rather
+than dropped or allowed to crowd everything else out.
+"""
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from app.services.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+TRUNCATION_MARK = " [...]"
+# Numbering and quotes around each review in the prompt list.
+ITEM_OVERHEAD_TOKENS = 4
+
+
+class PackedReviews(NamedTuple):
+    reviews: List[str]
+    available: int
+    truncated: int
+    tokens: int
+    by_stratum: Dict[str, int]
+
+    @property
+    def coverage(self) -> float:
+        return len(self.reviews) / self.available if self.available else 1.0
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARK))
+    cut = text[:limit]
+    # Prefer ending on a word boundary when one is reasonably close.
+    space = cut.rfind(" ")
+    if space > limit * 0.8:
+        cut = cut[:space]
+    return cut + TRUNCATION_MARK, True
+
+
+def pack_reviews(
+    strata: Sequence[Tuple[str, Sequence[str], int]],
+    budget_tokens: int,
+    max_review_tokens: int,
+    overhead_per_item: int = ITEM_OVERHEAD_TOKENS,
+) -> PackedReviews:
+    """Round-robin over ``(name, reviews, weight)`` strata until the budget is full.
+
+    Each round takes up to ``weight`` reviews from every stratum that still
+    has some; exhausted strata simply stop contributing, so the others fill
+    the space. A review that does not fit the remaining budget is skipped in
+    favour of shorter ones further down.
+    """
+    packed: List[str] = []
+    by_stratum = {name: 0 for name, _, _ in strata}
+    positions = {name: 0 for name, _, _ in strata}
+    available = sum(len(reviews) for _, reviews, _ in strata)
+    used = truncated = 0
+    active = [s for s in strata if s[1]]
+
+    while active and budget_tokens - used > overhead_per_item:
+        for stratum in list(active):
+            name, reviews, weight = stratum
+            for _ in range(weight):
+                index = positions[name]
+                if index >= len(reviews):
+                    active.remove(stratum)
+                    break
+                positions[name] += 1
+                text, was_cut = truncate_to_tokens(reviews[index], max_review_tokens)
+                cost = estimate_tokens(text) + overhead_per_item
+                if used + cost > budget_tokens:
+                    continue
+                packed.append(text)
+                by_stratum[name] += 1
+                used += cost
+                truncated += was_cut
+
+    return PackedReviews(packed, available, truncated, used, by_stratum)
@@ -0,0 +1,36 @@
+import random
+from typing import Dict, Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class StratifiedReservoirSampler(Generic[T]):
+    """One reservoir per stratum, filled in a single pass over a stream.
+
+    Memory is bounded by the sum of the stratum sizes however long the stream
+    is. All strata draw from one seeded generator, so the same items in the
+    same order always produce the same sample.
+    """
+
+    def __init__(self, sizes: Dict[str, int], seed: int = 42):
+        self.sizes = dict(sizes)
+        self.seen = 0
+        self.counts: Dict[str, int] = {name: 0 for name in sizes}
+        self.strata: Dict[str, List[T]] = {name: [] for name in sizes}
+        self._random = random.Random(seed)
+
+    def add(self, stratum: str, item: T) -> None:
+        self.seen += 1
+        self.counts[stratum] += 1
+        reservoir = self.strata[stratum]
+        size = self.sizes[stratum]
+        if len(reservoir) < size:
+            reservoir.append(item)
+            return
+        index = self._random.randrange(self.counts[stratum])
+        if index < size:
+            reservoir[index] = item
+
+    @property
+    def items(self) -> List[T]:
+        return [item for reservoir in self.strata.values() for item in reservoir]
@@ -0,0 +1,359 @@
+"""Keyword sentiment scoring shared by every non-LLM sentiment path.
+
+The lexicons are compiled once into a single word -> class table.
+``score_batch`` tokenizes a whole batch with one regex pass (texts joined with
+a NUL separator), maps the token array through the table in C, and
+aggregates per-text counts with NumPy, instead of looping over every word
+list for every text in Python.
+"""
+
+import re
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+POSITIVE_WORDS = {
+    "good",
+    "great",
+    "excellent",
+    "love",
+    "amazing",
+    "best",
+    "smooth",
+    "smoothly",
+    "perfect",
+    "fantastic",
+    "outstanding",
+    "wonderful",
+    "brilliant",
+    "fast",
+    "quick",
+    "easy",
+    "helpful",
+    "useful",
+    "nice",
+    "pleased",
+    "happy",
+    "satisfied",
+    "beautiful",
+    "clean",
+    "intuitive",
+    "reliable",
+    "effective",
+    "efficient",
+    "improved",
+    "better",
+    "awesome",
+    "like",
+    "enjoy",
+    "enjoyed",
+    "enjoying",
+    "superb",
+    "neat",
+    "clear",
+    "stable",
+    "works",
+    "working",
+    "joy",
+    "delight",
+    "delightful",
+    "fluid",
+    "simple",
+}
+NEGATIVE_WORDS = {
+    "bad",
+    "terrible",
+    "slow",
+    "worst",
+    "hate",
+    "poor",
+    "broken",
+    "crash",
+    "crashes",
+    "crashing",
+    "crashed",
+    "bug",
+    "bugs",
+    "error",
+    "errors",
+    "problem",
+    "problems",
+    "issue",
+    "issues",
+    "fail",
+    "fails",
+    "failing",
+    "failed",
+    "failure",
+    "useless",
+    "awful",
+    "horrible",
+    "frustrating",
+    "frustration",
+    "annoying",
+    "difficult",
+    "confusing",
+    "delayed",
+    "delay",
+    "missing",
+    "lost",
+    "laggy",
+    "lag",
+    "freeze",
+    "freezing",
+    "frozen",
+    "unusable",
+    "disappointing",
+    "disappointed",
+    "complaint",
+    "complain",
+    "expensive",
+}
+# A negator flips the next polar word within NEGATION_WINDOW tokens ("not
+# bad", "never had an issue"); with none in reach it is a negative hit itself
+# ("it doesn't load"). "doesn"/"didn"/"isn" catch typographic apostrophes.
+NEGATORS = {
+    "not",
+    "no",
+    "never",
+    "cant",
+    "can't",
+    "cannot",
+    "doesn",
+    "doesn't",
+    "didn",
+    "didn't",
+    "isn",
+    "isn't",
+    "won't",
+    "wont",
+}
+NEGATION_WINDOW = 3
+# Words signalling contrast: with any polar word present the text is "mixed".
+MIXED_CONNECTORS = {
+    "but",
+    "however",
+    "although",
+    "though",
+    "yet",
+    "while",
+    "except",
+    "unfortunately",
+    "despite",
+}
+# Chat routing treats a short message containing one of these as new
+# feedback. Deliberately narrower than the scoring lexicons: words like
+# "like", "not" or "works" are as common in questions as in opinions.
+OPINION_MARKERS = frozenset(
+    {
+        # positive
+        "good",
+        "great",
+        "excellent",
+        "best",
+        "amazing",
+        "awesome",
+        "love",
+        "perfect",
+        "fantastic",
+        "outstanding",
+        "wonderful",
+        "brilliant",
+        "smooth",
+        "fast",
+        "quick",
+        "efficient",
+        "effective",
+        "reliable",
+        "easy",
+        "helpful",
+        "useful",
+        "intuitive",
+        "clean",
+        "beautiful",
+        "simple",
+        "nice",
+        "pleased",
+        "happy",
+        "satisfied",
+        # negative
+        "bad",
+        "terrible",
+        "awful",
+        "worst",
+        "hate",
+        "issue",
+        "broken",
+        "slow",
+        "crash",
+        "crashes",
+        "bug",
+        "error",
+        "problem",
+        "fail",
+        "fails",
+        "failing",
+        "poor",
+        "useless",
+        "difficult",
+        "confusing",
+        "frustrating",
+        "annoying",
+        "disappointing",
+        "laggy",
+        "freeze",
+        "freezing",
+        "unusable",
+        "lost",
+        # lukewarm
+        "okay",
+        "ok",
+        "decent",
+        "average",
+        "mediocre",
+        "acceptable",
+    }
+)
+
+_SEPARATOR = "\x00"
+OTHER, SEPARATOR, POSITIVE, NEGATIVE, CONNECTOR, NEGATOR = range(6)
+
+_CODES: Dict[str, int] = {_SEPARATOR: SEPARATOR}
+for _words, _code in (
+    (NEGATORS, NEGATOR),
+    (MIXED_CONNECTORS, CONNECTOR),
+    (NEGATIVE_WORDS, NEGATIVE),
+    (POSITIVE_WORDS, POSITIVE),
+):
+    _CODES.update(dict.fromkeys(_words, _code))
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|" + _SEPARATOR)
+
+LABELS = np.array(["neutral", "positive", "negative", "mixed"])
+STRATA = np.array(["neutral", "positive", "negative"])
+
+
+class SentimentScore(NamedTuple):
+    label: str
+    score: float
+    positive: int
+    negative: int
+
+
+@dataclass(frozen=True)
+class BatchScores:
+    labels: np.ndarray
+    scores: np.ndarray
+    positive: np.ndarray
+    negative: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getitem__(self, index: int) -> SentimentScore:
+        return SentimentScore(
+            str(self.labels[index]),
+            float(self.scores[index]),
+            int(self.positive[index]),
+            int(self.negative[index]),
+        )
+
+
+def score_batch(texts: Sequence[str]) -> BatchScores:
+    """Label and score many texts with one regex pass over the batch.
+
+    Labels follow the stored-feedback convention: positive and negative hits
+    together, or a contrast word next to either, make a text "mixed". Scores
+    are in [0, 1], 0.5 being neutral.
+    """
+    n = len(texts)
+    combined = _SEPARATOR.join(
+        t.replace(_SEPARATOR, " ") if t else "" for t in texts
+    ).lower()
+    tokens = _TOKEN.findall(combined)
+    codes = np.fromiter(
+        map(_CODES.get, tokens, repeat(OTHER)), dtype=np.int8, count=len(tokens)
+    )
+    doc = np.cumsum(codes == SEPARATOR)
+    _apply_negation(codes, doc)
+    # Only lexicon hits matter from here on; count them per (text, class).
+    hit = (codes > SEPARATOR) & (codes <= CONNECTOR)
+    classes = CONNECTOR - SEPARATOR
+    counts = np.bincount(
+        doc[hit] * classes + (codes[hit] - POSITIVE), minlength=n * classes
+    ).reshape(n, classes)
+
+    pos = counts[:, POSITIVE - POSITIVE]
+    neg = counts[:, NEGATIVE - POSITIVE]
+    connector = counts[:, CONNECTOR - POSITIVE] > 0
+    polar = (pos > 0) | (neg > 0)
+
+    label_index = np.zeros(n, dtype=np.int8)
+    label_index[pos > 0] = 1
+    label_index[neg > 0] = 2
+    label_index[((pos > 0) & (neg > 0)) | (connector & polar)] = 3
+
+    total = pos + neg
+    balance = np.divide(pos - neg, total, out=np.zeros(n), where=total > 0)
+    return BatchScores(
+        labels=LABELS[label_index],
+        scores=0.5 + 0.5 * balance,
+        positive=pos,
+        negative=neg,
+    )
+
+
+def _apply_negation(codes: np.ndarray, doc: np.ndarray) -> None:
+    """Resolve NEGATOR codes in place: flip the polar word each one reaches,
+    or turn the negator itself into a negative hit."""
+    negators = np.flatnonzero(codes == NEGATOR)
+    polar = np.flatnonzero((codes == POSITIVE) | (codes == NEGATIVE))
+    if not len(negators) or not len(polar):
+        codes[negators] = NEGATIVE
+        return
+    # The first polar word after each negator, if it is in the same text
+    # and within the window
+    index = np.searchsorted(polar, negators)
+    target = polar[np.minimum(index, len(polar) - 1)]
+    reachable = (
+        (index < len(polar))
+        & (target - negators <= NEGATION_WINDOW)
+        & (doc[target] == doc[negators])
+    )
+
+    flipped = np.unique(target[reachable])
+    codes[flipped] = POSITIVE + NEGATIVE - codes[flipped]
+    codes[negators[reachable]] = OTHER
+    codes[negators[~reachable]] = NEGATIVE
+
+
+def score(text: str) -> SentimentScore:
+    return score_batch([text])[0]
+
+
+def confidence(positive: int, negative: int) -> float:
+    """Heuristic confidence: 0.5 with no polar hits, +0.1 per hit up to 0.9."""
+    polarity = max(positive, negative)
+    return min(0.9, 0.5 + polarity * 0.1) if polarity else 0.5
+
+
+def stratum_batch(scores: BatchScores) -> np.ndarray:
+    """Disjoint sampling strata: mixed texts go to whichever side dominates,
+    ties to negative."""
+    index = np.where(
+        (scores.negative > 0) & (scores.negative >= scores.positive),
+        2,
+        (scores.positive > 0).astype(np.int8),
+    )
+    return STRATA[index]
+
+
+def label_batch(texts: Sequence[str]) -> List[str]:
+    return score_batch(texts).labels.tolist()
+
+
+def has_opinion(text: str) -> bool:
+    """True when any whitespace-separated word is an opinion marker."""
+    return any(word in OPINION_MARKERS for word in text.lower().split())
@@ -0,0 +1,331 @@
+"""CPU-only theme tagging for bulk-ingested feedback.
+
+``ThemeTagger`` follows one upload batch by batch. The first batch fixes a
+vocabulary of content words and seeds spherical k-means over TF-IDF vectors.
+Every later batch is tagged against the current centroids and then folded in
+with a mini-batch update (Sculley, "Web-scale k-means clustering"). Document
+frequencies, and therefore IDF weights, accumulate over the whole upload.
+Each cluster is named once, from its heaviest terms, so a theme keeps the
+same name from the first row to the last.
+
+Tokenizing and counting follow ``sentiment.score_batch``: one regex pass over
+the joined batch, a C-level dict lookup per token and a single ``bincount``.
+"""
+
+import re
+from collections import Counter
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.sentiment import (
+    MIXED_CONNECTORS,
+    NEGATIVE_WORDS,
+    NEGATORS,
+    OPINION_MARKERS,
+    POSITIVE_WORDS,
+)
+
+STOPWORDS = {
+    "the",
+    "and",
+    "for",
+    "are",
+    "was",
+    "were",
+    "has",
+    "have",
+    "had",
+    "this",
+    "that",
+    "these",
+    "those",
+    "with",
+    "from",
+    "into",
+    "onto",
+    "about",
+    "your",
+    "you",
+    "our",
+    "their",
+    "they",
+    "them",
+    "its",
+    "it's",
+    "i'm",
+    "i've",
+    "i'd",
+    "we",
+    "she",
+    "his",
+    "her",
+    "him",
+    "who",
+    "what",
+    "which",
+    "when",
+    "where",
+    "why",
+    "how",
+    "all",
+    "any",
+    "some",
+    "more",
+    "most",
+    "much",
+    "many",
+    "very",
+    "really",
+    "just",
+    "also",
+    "too",
+    "than",
+    "then",
+    "there",
+    "here",
+    "can",
+    "could",
+    "would",
+    "should",
+    "will",
+    "did",
+    "does",
+    "doing",
+    "done",
+    "been",
+    "being",
+    "get",
+    "got",
+    "gets",
+    "getting",
+    "one",
+    "two",
+    "out",
+    "off",
+    "over",
+    "only",
+    "even",
+    "still",
+    "again",
+    "every",
+    "each",
+    "other",
+    "such",
+    "same",
+    "own",
+    "because",
+    "after",
+    "before",
+    "since",
+    "until",
+    "way",
+    "thing",
+    "things",
+    "lot",
+    "lots",
+    "bit",
+    "use",
+    "used",
+    "using",
+    "make",
+    "made",
+    "app",
+    "product",
+    "company",
+    "times",
+    "day",
+    "days",
+    "now",
+    "well",
+    "don't",
+    "didn't",
+    "isn't",
+    "wasn't",
+    "it'll",
+    "ive",
+    "im",
+    "dont",
+    "didnt",
+    "isnt",
+    "wasnt",
+    "per",
+    "via",
+    "etc",
+    "yes",
+    "see",
+    "say",
+    "said",
+    "want",
+    "need",
+}
+# Verdict words say how a customer feels, not what about; they never name a theme.
+_IGNORED = (
+    STOPWORDS
+    | POSITIVE_WORDS
+    | NEGATIVE_WORDS
+    | NEGATORS
+    | MIXED_CONNECTORS
+    | OPINION_MARKERS
+)
+
+_SEPARATOR = "\x00"
+_TOKEN = re.compile(r"[a-z]{3,}(?:'[a-z]+)?|" + _SEPARATOR)
+_SEPARATOR_ID = -2
+_UNKNOWN_ID = -1
+
+
+class ThemeTagger:
+    def __init__(
+        self,
+        clusters: int = 12,
+        vocabulary_size: int = 2000,
+        min_similarity: float = 0.2,
+        terms_per_name: int = 2,
+        seed: int = 42,
+    ):
+        self.clusters = clusters
+        self.vocabulary_size = vocabulary_size
+        self.min_similarity = min_similarity
+        self.terms_per_name = terms_per_name
+        self._random = np.random.default_rng(seed)
+        self.vocabulary: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._ids: Dict[str, int] = {_SEPARATOR: _SEPARATOR_ID}
+        self._doc_freq: Optional[np.ndarray] = None
+        self._docs = 0
+        self.centroids: Optional[np.ndarray] = None
+        self._center_counts: Optional[np.ndarray] = None
+        self.names: List[str] = []
+
+    def tag_batch(self, texts: Sequence[str]) -> List[List[str]]:
+        """Themes for each text, in order; texts without a clear theme get []."""
+        if not texts:
+            return []
+        tokens = _TOKEN.findall(
+            _SEPARATOR.join(t.replace(_SEPARATOR, " ") for t in texts).lower()
+        )
+        if not self.vocabulary:
+            self._build_vocabulary(tokens, len(texts))
+            if not self.vocabulary:
+                return [[] for _ in texts]
+
+        vectors = self._vectorize(tokens, len(texts))
+        if self.centroids is None:
+            self._seed_clusters(vectors)
+            if self.centroids is None:
+                return self._top_terms(vectors)
+
+        similarity = vectors @ self.centroids.T
+        nearest = similarity.argmax(axis=1)
+        matched = similarity[np.arange(len(texts)), nearest] >= self.min_similarity
+        self._update_centroids(vectors[matched], nearest[matched])
+        return [
+            [self.names[cluster]] if ok else []
+            for cluster, ok in zip(nearest.tolist(), matched.tolist())
+        ]
+
+    def _build_vocabulary(self, tokens: List[str], docs: int) -> None:
+        doc_terms: Counter = Counter()
+        seen: set = set()
+        for token in tokens:
+            if token == _SEPARATOR:
+                seen = set()
+            elif token not in seen and token not in _IGNORED:
+                seen.add(token)
+                doc_terms[token] += 1
+        # Terms in a single row cannot group rows; terms in most rows cannot
+        # tell them apart.
+        max_df = max(2, int(docs * 0.5))
+        terms = [
+            term
+            for term, df in doc_terms.most_common()
+            if 2 <= df <= max_df
+        ][: self.vocabulary_size]
+        self._terms = terms
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self._ids.update(self.vocabulary)
+        self._doc_freq = np.zeros(len(terms))
+
+    def _vectorize(self, tokens: List[str], docs: int) -> np.ndarray:
+        """L2-normalized TF-IDF rows; updates the running document frequencies."""
+        ids = np.fromiter(
+            map(self._ids.get, tokens, repeat(_UNKNOWN_ID)),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+        doc = np.cumsum(ids == _SEPARATOR_ID)
+        known = ids >= 0
+        size = len(self._terms)
+        counts = np.bincount(
+            doc[known] * size + ids[known], minlength=docs * size
+        ).reshape(docs, size)
+
+        self._doc_freq += (counts > 0).sum(axis=0)
+        self._docs += docs
+        idf = np.log((1 + self._docs) / (1 + self._doc_freq)) + 1.0
+        vectors = np.log1p(counts, dtype=np.float32) * idf.astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _seed_clusters(self, vectors: np.ndarray, iterations: int = 10) -> None:
+        """k-means++ seeding and a few full Lloyd passes over the first batch."""
+        rows = vectors[vectors.any(axis=1)]
+        # Below ~10 rows per cluster the centroids are noise; fall back to
+        # per-row key terms until an upload is large enough to cluster.
+        k = min(self.clusters, len(rows) // 10)
+        if k < 2:
+            return
+
+        centers = [rows[self._random.integers(len(rows))]]
+        distance = 1.0 - rows @ centers[0]
+        for _ in range(1, k):
+            weights = np.clip(distance, 0.0, None)
+            total = weights.sum()
+            if total <= 0:
+                break
+            pick = self._random.choice(len(rows), p=weights / total)
+            centers.append(rows[pick])
+            distance = np.minimum(distance, 1.0 - rows @ rows[pick])
+        centroids = np.array(centers, dtype=np.float32)
+
+        for _ in range(iterations):
+            nearest = (rows @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, rows)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        self.centroids = centroids
+        self._center_counts = np.bincount(nearest, minlength=len(centroids)).astype(
+            np.float64
+        )
+        self.names = [self._name(center) for center in centroids]
+
+    def _update_centroids(self, vectors: np.ndarray, nearest: np.ndarray) -> None:
+        if not len(vectors):
+            return
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, nearest, vectors)
+        batch_counts = np.bincount(nearest, minlength=len(self.centroids))
+        self._center_counts += batch_counts
+        # Per-center learning rate 1/count, applied to the whole batch at once.
+        rate = (batch_counts / np.maximum(self._center_counts, 1))[:, None]
+        means = sums / np.maximum(batch_counts, 1)[:, None]
+        updated = (1 - rate) * self.centroids + rate * means
+        norms = np.linalg.norm(updated, axis=1, keepdims=True)
+        self.centroids = (updated / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def _name(self, center: np.ndarray) -> str:
+        top = np.argsort(center)[::-1][: self.terms_per_name]
+        terms = [self._terms[i] for i in top if center[i] > 0]
+        return " / ".join(term.title() for term in terms) or "General"
+
+    def _top_terms(self, vectors: np.ndarray) -> List[List[str]]:
+        best = vectors.argmax(axis=1)
+        return [
+            [self._terms[term].title()] if row.any() else []
+            for term, row in zip(best.tolist(), vectors)
+        ]
@@ -0,0 +1,38 @@
+from typing import List, Optional
+
+# Llama-family tokenizers average roughly four characters per token on English
+# review text; close enough for budgeting without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+class TokenChunker:
+    """Accumulates texts into chunks whose estimated size fits max_tokens.
+
+    A single text larger than the budget becomes a chunk of its own.
+    """
+
+    def __init__(self, max_tokens: int, overhead_per_item: int = 4):
+        self.max_tokens = max_tokens
+        self.overhead_per_item = overhead_per_item
+        self._chunk: List[str] = []
+        self._used = 0
+
+    def add(self, text: str) -> Optional[List[str]]:
+        """Add a text; returns the previous chunk if this text started a new one."""
+        cost = estimate_tokens(text) + self.overhead_per_item
+        completed = None
+        if self._chunk and self._used + cost > self.max_tokens:
+            completed = self.flush()
+        self._chunk.append(text)
+        self._used += cost
+        return completed
+
+    def flush(self) -> Optional[List[str]]:
+        chunk = self._chunk or None
+        self._chunk, self._used = [], 0
+        return chunk
+
@@ -0,0 +1,100 @@
+"""Memory growth of per-user agent caching under many distinct users.
+
+Run from the backend directory:
+
+    python -m benchmarks.agent_pool_memory --users 100000
+
+Simulates ``--users`` distinct users each asking a question (with a
+configurable share of repeat visitors) and compares the old unbounded
+``dict`` cache against ``AgentPool``. Agents are stand-ins that hold
+``--agent-kb`` of state, roughly a FeedbackAgent's model client and compiled
+graph, so the run needs neither the LLM provider nor MongoDB. Exits non-zero
+if the pool ever holds more than its size limit.
+"""
+import argparse
+import random
+import sys
+import tracemalloc
+from typing import Callable, Dict
+
+from app.agents.agent_pool import AgentPool
+
+
+class StandInAgent:
+    def __init__(self, user_id: str, size_kb: int):
+        self.user_id = user_id
+        self.state = bytearray(size_kb * 1024)
+        self.graph = {"nodes": [object() for _ in range(20)]}
+
+
+def simulate(get_agent: Callable[[str], StandInAgent], users: int, repeat: float):
+    rng = random.Random(42)
+    seen = []
+    for i in range(users):
+        if seen and rng.random() < repeat:
+            get_agent(rng.choice(seen[-5000:]))
+        user_id = f"user-{i}"
+        seen.append(user_id)
+        get_agent(user_id)
+
+
+def measure(label: str, run: Callable[[], None]) -> int:
+    tracemalloc.start()
+    run()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} current {current / 2**20:8.1f} MiB   peak {peak / 2**20:8.1f} MiB")
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--pool-size", type=int, default=1000)
+    parser.add_argument("--agent-kb", type=int, default=16)
+    parser.add_argument(
+        "--repeat", type=float, default=0.3, help="share of requests from recent users"
+    )
+    args = parser.parse_args()
+
+    def build(user_id: str) -> StandInAgent:
+        return StandInAgent(user_id, args.agent_kb)
+
+    unbounded: Dict[str, StandInAgent] = {}
+
+    def dict_get(user_id: str) -> StandInAgent:
+        if user_id not in unbounded:
+            unbounded[user_id] = build(user_id)
+        return unbounded[user_id]
+
+    pool = AgentPool(build, max_size=args.pool_size, idle_seconds=3600)
+    max_live = 0
+
+    def pool_get(user_id: str) -> StandInAgent:
+        nonlocal max_live
+        agent = pool.get(user_id)
+        max_live = max(max_live, len(pool))
+        return agent
+
+    print(f"{args.users:,} users, {args.agent_kb} KiB per agent")
+    dict_bytes = measure("dict", lambda: simulate(dict_get, args.users, args.repeat))
+    print(f"           live agents {len(unbounded):,}")
+    unbounded.clear()
+
+    pool_bytes = measure("pool", lambda: simulate(pool_get, args.users, args.repeat))
+    stats = pool.stats()
+    print(f"           live agents {stats['live']:,} (max seen {max_live:,})")
+    print(
+        f"           hits {stats['hits']:,}  misses {stats['misses']:,}  "
+        f"evictions {stats['evictions']}  "
+        f"build avg {stats['build_seconds_avg'] * 1e6:.1f} us"
+    )
+    print(f"retained memory ratio pool/dict: {pool_bytes / dict_bytes:.3f}")
+
+    if max_live > args.pool_size:
+        print(f"FAIL: pool grew to {max_live} agents (limit {args.pool_size})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Per-question agent setup cost: recompiling the graph vs. the shared graph.
+
+Run from the backend directory:
+
+    python -m benchmarks.agent_setup --questions 200
+
+Before, every question rebuilt the tool set and recompiled the ReAct graph
+(``create_react_agent``). Now the graph is compiled once and each question
+only builds a RunnableConfig carrying the user/conversation scope. No model
+or database call is made; placeholder settings are used if none are set.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langgraph.prebuilt import create_react_agent  # noqa: E402
+
+from app.agents.feedback_agent import (  # noqa: E402
+    SYSTEM_PROMPT,
+    FeedbackAgent,
+    get_feedback_graph,
+)
+from app.agents.tools.feedback_tools import FEEDBACK_TOOLS  # noqa: E402
+from app.services.llm_gateway import llm_gateway  # noqa: E402
+
+
+def per_question_compile(questions: int) -> float:
+    model = llm_gateway.chat_model(temperature=0.0, max_tokens=4000)
+    started = time.perf_counter()
+    for i in range(questions):
+        create_react_agent(model=model, tools=list(FEEDBACK_TOOLS), prompt=SYSTEM_PROMPT)
+    return time.perf_counter() - started
+
+
+def shared_graph(questions: int) -> float:
+    started = time.perf_counter()
+    get_feedback_graph()
+    agent = FeedbackAgent(user_id="user-0")
+    for i in range(questions):
+        agent._config(f"conversation-{i}")
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200)
+    args = parser.parse_args()
+
+    before = per_question_compile(args.questions)
+    after = shared_graph(args.questions)
+    print(f"{args.questions} questions")
+    print(
+        f"recompile per question: {before:.3f}s total, "
+        f"{before / args.questions * 1000:.2f} ms/question"
+    )
+    print(
+        f"shared graph:           {after:.3f}s total (incl. one compile), "
+        f"{after / args.questions * 1000:.3f} ms/question"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""CPU-side cost of one analysis call, with the model answered locally.
+
+Run from the backend directory:
+
+    python -m benchmarks.analysis_profile --reviews 500 --calls 50
+    LLM_PROVIDER=record python -m benchmarks.analysis_profile --calls 1
+    python -m benchmarks.analysis_profile --provider replay --calls 50
+
+The model is the ``fake`` provider or a cassette recorded earlier with
+``LLM_PROVIDER=record``, with no simulated latency, no rate limits and the
+LLM cache off. What remains is sampling, prompt building, output parsing
+and ``_validate_and_enhance``. The run reports the time per call and the
+functions with the most cumulative time under cProfile.
+"""
+import argparse
+import asyncio
+import cProfile
+import csv
+import os
+import pstats
+import time
+from pathlib import Path
+
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "feedback.csv"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", default=os.environ.get("LLM_PROVIDER", "fake"))
+    parser.add_argument("--reviews", type=int, default=500)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["LLM_PROVIDER"] = args.provider
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    # The gateway's rate limits would otherwise be all there is to measure
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(10**9)
+    os.environ["LLM_TOKENS_PER_MINUTE"] = str(10**12)
+    os.environ["LLM_SIMULATED_LATENCY_SECONDS"] = "0"
+    os.environ["LLM_SIMULATED_SECONDS_PER_TOKEN"] = "0"
+
+    from app.services.ai_service import ai_service
+
+    with open(SAMPLE_CSV, newline="", encoding="utf-8") as f:
+        sample = [row["feedback"] for row in csv.DictReader(f)]
+    reviews = [sample[i % len(sample)] for i in range(args.reviews)]
+
+    async def run() -> None:
+        for _ in range(args.calls):
+            await ai_service.analyze_feedback(reviews=reviews, history=[])
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    asyncio.run(run())
+    profiler.disable()
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.calls} analyses of {args.reviews} reviews ({args.provider}): "
+        f"{elapsed / args.calls * 1000:.1f} ms/call"
+    )
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Per-request authentication overhead: users lookup vs. principal cache.
+
+Run from the backend directory:
+
+    python -m benchmarks.auth_overhead --requests 20000 --db-latency-ms 0.5
+
+Every authenticated request used to decode the JWT, fetch the user document
+and validate it into ``UserInDB``. This times the ``get_current_user``
+dependency with the principal cache bypassed and enabled, and the claims-only
+``get_read_principal`` path. The users collection is replaced by an in-memory
+repository that sleeps ``--db-latency-ms`` per lookup to stand in for the
+Mongo round trip; placeholder settings are used if none are set.
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from bson import ObjectId  # noqa: E402
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.principal_cache import principal_cache  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.dependencies.auth import get_current_user, get_read_principal  # noqa: E402
+from app.models.user import UserInDB  # noqa: E402
+
+
+class InMemoryUsers:
+    def __init__(self, users: int, latency: float):
+        self.latency = latency
+        self.lookups = 0
+        self.docs = {
+            str(oid): {
+                "_id": oid,
+                "first_name": "Bench",
+                "last_name": f"User {i}",
+                "email": f"user{i}@example.com",
+                "hashed_password": "x" * 60,
+                "created_at": datetime.utcnow(),
+            }
+            for i, oid in enumerate(ObjectId() for _ in range(users))
+        }
+
+    async def find_by_id(self, user_id: str):
+        self.lookups += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        doc = self.docs.get(user_id)
+        return UserInDB(**doc) if doc else None
+
+
+async def run(dependency, credentials, repo: InMemoryUsers, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await dependency(credentials[i % len(credentials)], repo)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--db-latency-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    repo = InMemoryUsers(args.users, args.db_latency_ms / 1000)
+    credentials = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=create_access_token(
+                {"sub": doc["email"], "user_id": user_id}
+            ),
+        )
+        for user_id, doc in repo.docs.items()
+    ]
+
+    modes = [
+        ("users lookup (before)", get_current_user, 0, False),
+        ("principal cache", get_current_user, settings.AUTH_CACHE_TTL_SECONDS, False),
+        ("claims only", get_read_principal, 0, True),
+    ]
+    for name, dependency, ttl, trust_claims in modes:
+        principal_cache.clear()
+        principal_cache.ttl_seconds = ttl
+        settings.AUTH_TRUST_TOKEN_CLAIMS = trust_claims
+        repo.lookups = 0
+        elapsed = asyncio.run(run(dependency, credentials, repo, args.requests))
+        print(
+            f"{name:<22} {elapsed / args.requests * 1e6:8.1f} us/request"
+            f"  {repo.lookups:>7,} lookups"
+        )
+
+
+if __name__ == "__main__":
+    main()
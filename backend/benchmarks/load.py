@@ -0,0 +1,432 @@
+"""End-to-end load benchmark: the whole app in process, no network.
+
+Run from the backend directory:
+
+    pip install mongomock mongomock-motor   # or point --mongo at a local mongod
+    python -m benchmarks.load --duration 30 --concurrency 16 --output load.json
+    python -m benchmarks.load --mongo mongodb://localhost:27017 --csv-rows 50000
+
+``main:app`` is driven through httpx's ASGI transport, with its startup and
+shutdown hooks run as in production. Mongo is mongomock (sync and Motor
+clients share one in-memory store) unless ``--mongo`` names a server, in
+which case a throwaway database is used and dropped afterwards. Model calls
+go to the ``fake`` provider, or to a recorded cassette with
+``--llm-provider replay`` (see ``app.services.llm_providers``), after
+``--llm-latency-ms`` of latency, so results measure the app rather than the
+provider.
+
+Closed-loop clients pick requests from a weighted mix of ``/analyze/chat``
+(feedback and questions), ``/analyze/upload`` (``feedback.csv`` scaled up to
+``--csv-rows``) and the ``/analytics/*`` routes, the latter revalidating with
+the ETag they were last given, like a browser. Before the run, each question
+is also asked through ``/analyze/chat/stream`` and its final answer compared
+with ``/analyze/chat``'s. The report is JSON: per-route throughput and
+p50/p95/p99 latency, CSV job completion times, the streaming parity check,
+and peak RSS.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "feedback.csv"
+ANALYTICS_ROUTES = [
+    "/analytics/summary",
+    "/analytics/themes",
+    "/analytics/history",
+    "/analytics/recommendations",
+    "/analytics/stats",
+]
+QUESTIONS = [
+    "What are the main complaints?",
+    "How many positive reviews are there?",
+    "What do customers praise the most?",
+    "Show me the satisfaction score",
+]
+JOB_POLL_SECONDS = 0.2
+
+
+def configure(args: argparse.Namespace) -> None:
+    """Settings are read once at import, so this runs before any app import."""
+    os.environ["MONGODB_URL"] = (
+        args.mongo if args.mongo != "mongomock" else "mongodb://localhost:27017"
+    )
+    os.environ["DATABASE_NAME"] = f"feedback_bench_{os.getpid()}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["JOB_SPOOL_DIR"] = tempfile.mkdtemp(prefix="feedback-bench-")
+    # The provider's rate limits would dominate otherwise
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(10**9)
+    os.environ["LLM_TOKENS_PER_MINUTE"] = str(10**12)
+    os.environ["LLM_CACHE_PATH"] = ""
+    os.environ["LLM_PROVIDER"] = args.llm_provider
+    os.environ["LLM_SIMULATED_LATENCY_SECONDS"] = str(args.llm_latency_ms / 1000)
+    os.environ["LLM_SIMULATED_SECONDS_PER_TOKEN"] = str(args.llm_ms_per_token / 1000)
+
+    if args.mongo == "mongomock":
+        # mongomock has no query planner to index for, and rejects the
+        # repositories' create_index once migrations created the same index
+        os.environ["RUN_MIGRATIONS_ON_STARTUP"] = "false"
+
+        import mongomock
+        from mongomock_motor import AsyncMongoMockClient
+
+        from app.core import database
+
+        _patch_mongomock_bulk()
+        _patch_mongomock_lookup()
+        client = mongomock.MongoClient()
+        database.client = client
+        database.database = client[os.environ["DATABASE_NAME"]]
+        database.async_client = AsyncMongoMockClient(mock_mongo_client=client)
+        database.async_database = database.async_client[os.environ["DATABASE_NAME"]]
+
+
+def _patch_mongomock_bulk() -> None:
+    """pymongo >= 4.9 passes ``sort`` to bulk updates; mongomock predates it."""
+    from mongomock.collection import BulkOperationBuilder
+
+    def without_sort(add):
+        def add_without_sort(self, *args, sort=None, **kwargs):
+            return add(self, *args, **kwargs)
+
+        return add_without_sort
+
+    for name in ("add_update", "add_replace"):
+        add = getattr(BulkOperationBuilder, name)
+        if "sort" not in add.__code__.co_varnames:
+            setattr(BulkOperationBuilder, name, without_sort(add))
+
+
+def _patch_mongomock_lookup() -> None:
+    """mongomock's ``$lookup`` lacks ``let``/``pipeline``; run the sub-pipeline
+    per document with the ``let`` variables substituted as literals. Only
+    plain field paths are supported as ``let`` values."""
+    from mongomock import aggregate, helpers
+
+    lookup = aggregate._PIPELINE_HANDLERS["$lookup"]
+    if getattr(lookup, "supports_let", False):
+        return
+
+    def bind(value, variables):
+        if isinstance(value, str) and value.startswith("$$"):
+            return {"$literal": variables[value[2:]]}
+        if isinstance(value, dict):
+            return {k: bind(v, variables) for k, v in value.items()}
+        if isinstance(value, list):
+            return [bind(v, variables) for v in value]
+        return value
+
+    def lookup_with_let(in_collection, database, options):
+        if "pipeline" not in options:
+            return lookup(in_collection, database, options)
+        foreign = database.get_collection(options["from"])
+        for doc in in_collection:
+            variables = {}
+            for name, path in options.get("let", {}).items():
+                try:
+                    variables[name] = helpers.get_value_by_dot(doc, path[1:])
+                except KeyError:
+                    variables[name] = None
+            doc[options["as"]] = list(
+                foreign.aggregate(bind(options["pipeline"], variables))
+            )
+        return in_collection
+
+    lookup_with_let.supports_let = True
+    aggregate._PIPELINE_HANDLERS["$lookup"] = lookup_with_let
+
+
+def scaled_csv(rows: int) -> bytes:
+    with open(SAMPLE_CSV, newline="", encoding="utf-8") as f:
+        reviews = [row["feedback"] for row in csv.DictReader(f)]
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["id", "feedback"])
+    for i in range(rows):
+        writer.writerow([i + 1, reviews[i % len(reviews)]])
+    return out.getvalue().encode("utf-8")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.not_modified: Dict[str, int] = defaultdict(int)
+        self.jobs: List[float] = []
+        self.failed_jobs = 0
+
+    def add(self, route: str, seconds: float, status: int) -> None:
+        self.latencies[route].append(seconds)
+        if status == 304:
+            self.not_modified[route] += 1
+        elif status >= 400:
+            self.errors[route] += 1
+
+
+class Client:
+    """One simulated user: a token, a conversation and cached ETags."""
+
+    def __init__(self, http, token: str, rng: random.Random, reviews: List[str]):
+        self.http = http
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rng = rng
+        self.reviews = reviews
+        self.conversation_id: Optional[str] = None
+        self.etags: Dict[str, str] = {}
+
+    async def timed(
+        self, recorder: Recorder, route: str, method: str, url: str, **kwargs: Any
+    ):
+        started = time.perf_counter()
+        response = await self.http.request(method, url, **kwargs)
+        recorder.add(route, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def chat(self, recorder: Recorder) -> None:
+        if self.rng.random() < 0.5:
+            message = self.rng.choice(self.reviews)
+        else:
+            message = self.rng.choice(QUESTIONS)
+        response = await self.timed(
+            recorder,
+            "POST /analyze/chat",
+            "POST",
+            "/analyze/chat",
+            json={"message": message, "conversation_id": self.conversation_id},
+            headers=self.headers,
+        )
+        if response.status_code == 200:
+            conversation_id = response.json().get("conversation_id")
+            if conversation_id and conversation_id != "error":
+                self.conversation_id = conversation_id
+
+    async def analytics(self, recorder: Recorder) -> None:
+        url = self.rng.choice(ANALYTICS_ROUTES)
+        headers = dict(self.headers)
+        if url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        response = await self.timed(recorder, f"GET {url}", "GET", url, headers=headers)
+        if "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+
+    async def upload(self, recorder: Recorder, body: bytes) -> None:
+        started = time.perf_counter()
+        response = await self.timed(
+            recorder,
+            "POST /analyze/upload",
+            "POST",
+            "/analyze/upload",
+            files={"file": ("feedback.csv", body, "text/csv")},
+            headers=self.headers,
+        )
+        if response.status_code != 202:
+            recorder.failed_jobs += 1
+            return
+        job_id = response.json()["job_id"]
+        while True:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            job = await self.http.get(f"/analyze/jobs/{job_id}", headers=self.headers)
+            status = job.json().get("status")
+            if status == "completed":
+                recorder.jobs.append(time.perf_counter() - started)
+                return
+            if status not in ("queued", "running"):
+                recorder.failed_jobs += 1
+                return
+
+
+async def sign_in(http, index: int) -> str:
+    email = f"bench{index}@example.com"
+    password = "benchmark-password"
+    await http.post(
+        "/auth/signup",
+        json={
+            "first_name": "Bench",
+            "last_name": str(index),
+            "email": email,
+            "password": password,
+        },
+    )
+    response = await http.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    # Start from a user with data, so every analytics route has a rollup
+    # to read (mongomock cannot run the aggregation used without one)
+    response = await http.post(
+        "/analyze/chat",
+        json={"message": "The checkout was quick and the staff were helpful"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    response.raise_for_status()
+    return token
+
+
+async def stream_parity(http, token: str) -> Dict[str, Any]:
+    """Ask each question through /analyze/chat and /analyze/chat/stream.
+
+    Questions go to the agent without storing feedback, so both routes see
+    the same data and must give the same answer.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    mismatched = []
+    for question in QUESTIONS:
+        response = await http.post(
+            "/analyze/chat", json={"message": question}, headers=headers
+        )
+        expected = response.json()["response"]
+        response = await http.post(
+            "/analyze/chat/stream", json={"message": question}, headers=headers
+        )
+        streamed = None
+        for event in response.text.split("\n\n"):
+            if event.startswith("event: done\n"):
+                streamed = json.loads(event.split("data: ", 1)[1])["response"]
+        if not expected or streamed != expected:
+            mismatched.append(
+                {"question": question, "chat": expected, "stream": streamed}
+            )
+    return {"checked": len(QUESTIONS), "mismatched": mismatched}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if samples else (0, 0, 0)
+    return {
+        "p50_ms": round(float(p50) * 1000, 2),
+        "p95_ms": round(float(p95) * 1000, 2),
+        "p99_ms": round(float(p99) * 1000, 2),
+        "mean_ms": round(float(np.mean(samples)) * 1000, 2) if samples else 0.0,
+    }
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    from main import app
+
+    mix: List[Tuple[str, float]] = [
+        ("chat", args.chat_weight),
+        ("upload", args.upload_weight),
+        ("analytics", args.analytics_weight),
+    ]
+    kinds = [kind for kind, weight in mix if weight > 0]
+    weights = [weight for _, weight in mix if weight > 0]
+    body = scaled_csv(args.csv_rows)
+    with open(SAMPLE_CSV, newline="", encoding="utf-8") as f:
+        reviews = [row["feedback"] for row in csv.DictReader(f)]
+
+    recorder = Recorder()
+    # Server errors are counted, not raised into the client
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as http:
+            tokens = [await sign_in(http, i) for i in range(args.users)]
+            parity = await stream_parity(http, tokens[0])
+            clients = [
+                Client(http, tokens[i % len(tokens)], random.Random(args.seed + i), reviews)
+                for i in range(args.concurrency)
+            ]
+
+            deadline = time.perf_counter() + args.duration
+
+            async def worker(client: Client) -> None:
+                while time.perf_counter() < deadline:
+                    kind = client.rng.choices(kinds, weights)[0]
+                    if kind == "chat":
+                        await client.chat(recorder)
+                    elif kind == "upload":
+                        await client.upload(recorder, body)
+                    else:
+                        await client.analytics(recorder)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for client in clients))
+            elapsed = time.perf_counter() - started
+
+        if args.mongo != "mongomock":
+            from app.core.database import client, settings
+
+            client.drop_database(settings.DATABASE_NAME)
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "errors": sum(recorder.errors.values()),
+        "routes": {
+            route: {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "errors": recorder.errors[route],
+                "not_modified": recorder.not_modified[route],
+                **percentiles(samples),
+            }
+            for route, samples in sorted(recorder.latencies.items())
+        },
+        "csv_jobs": {
+            "completed": len(recorder.jobs),
+            "failed": recorder.failed_jobs,
+            "rows_per_job": args.csv_rows,
+            **{
+                key.replace("_ms", "_s"): round(value / 1000, 3)
+                for key, value in percentiles(recorder.jobs).items()
+            },
+        },
+        "chat_stream_parity": parity,
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mongo", default="mongomock", help='"mongomock" or a mongodb:// URL'
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--csv-rows", type=int, default=5000)
+    parser.add_argument("--chat-weight", type=float, default=3)
+    parser.add_argument("--upload-weight", type=float, default=0.2)
+    parser.add_argument("--analytics-weight", type=float, default=6)
+    parser.add_argument("--llm-provider", choices=["fake", "replay"], default="fake")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="also write the report here")
+    args = parser.parse_args()
+
+    configure(args)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
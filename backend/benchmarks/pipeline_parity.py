@@ -0,0 +1,235 @@
+"""Parity of the ``$facet`` pipelines with the queries and rollups they replace.
+
+Run from the backend directory:
+
+    python -m benchmarks.pipeline_parity
+    python -m benchmarks.pipeline_parity --mongo mongodb://localhost:27017
+
+Seeds a few users with random feedback through ``FeedbackRepository`` (so the
+incremental rollups are maintained as in production), then checks that:
+
+- ``get_user_stats`` (one ``$facet``) equals the four separate
+  ``get_sentiment_stats`` / ``get_theme_stats`` / ``get_feedback_count`` /
+  ``get_average_satisfaction`` queries it replaced;
+- ``aggregate_rollup`` (the fallback pipeline) equals the stored rollup, per
+  user and per conversation, both as maintained on write and after
+  ``rebuild_rollups``;
+- ``AnalyticsService`` returns the same summary and theme breakdown whether it
+  reads the stored rollup or falls back to the pipeline.
+
+Mongo is mongomock unless ``--mongo`` names a server, in which case a
+throwaway database is used and dropped afterwards. Exits non-zero on any
+mismatch.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from bson import ObjectId  # noqa: E402
+
+from app.repositories.data_versions import (  # noqa: E402
+    DATA_VERSION_COLLECTION,
+    parse_version,
+    version_filter,
+)
+from app.repositories.feedback_repository import FeedbackRepository  # noqa: E402
+from app.repositories.rollups import (  # noqa: E402
+    ROLLUP_COLLECTION,
+    SENTIMENTS,
+    rebuild_rollups,
+)
+from app.services.analytics_service import AnalyticsService  # noqa: E402
+
+# Fewer themes than get_theme_stats' limit of 10, so ties cannot change
+# which themes make the cut.
+THEMES = ["price", "delivery", "support", "checkout", "app", "quality", "refund"]
+SENTIMENT_CHOICES = ["positive", "neutral", "negative", "mixed", "unknown"]
+WORDS = "great slow broken love order screen price refund the it was and".split()
+
+
+def seed(repo: FeedbackRepository, users: int, rows: int, rng: random.Random):
+    """Insert ``rows`` feedbacks per user, oldest first, in small batches."""
+    user_ids = [ObjectId() for _ in range(users)]
+    conversations = {u: [ObjectId() for _ in range(3)] for u in user_ids}
+    clock = count()
+    start = datetime(2024, 1, 1)
+    for user_id in user_ids:
+        batch: List[Dict[str, Any]] = []
+        for _ in range(rows):
+            content = " ".join(rng.choices(WORDS, k=rng.randint(3, 40)))
+            if rng.random() < 0.1:
+                content = "what " + content + "?"
+            batch.append(
+                {
+                    "user_id": user_id,
+                    "conversation_id": rng.choice(conversations[user_id] + [None]),
+                    "content": content,
+                    "sentiment": rng.choice(SENTIMENT_CHOICES),
+                    "sentiment_score": round(rng.random(), 3),
+                    "themes": rng.sample(THEMES, rng.randint(0, 3)),
+                    "created_at": start + timedelta(seconds=next(clock)),
+                }
+            )
+            if len(batch) >= rng.randint(1, 50):
+                repo.bulk_create_feedbacks(batch)
+                batch = []
+        if batch:
+            repo.bulk_create_feedbacks(batch)
+    return user_ids, conversations
+
+
+def normalize_rollup(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    """The comparable part of a rollup: missing counters read as zero."""
+    counts = rollup.get("counts", {})
+    themes = {}
+    for key, theme in rollup.get("themes", {}).items():
+        theme_counts = {s: theme.get("counts", {}).get(s, 0) for s in SENTIMENTS}
+        if any(theme_counts.values()):
+            themes[key] = {
+                "name": theme["name"],
+                "counts": theme_counts,
+                "examples": theme.get("examples", []),
+            }
+    return {
+        "total": rollup.get("total", 0),
+        "score_sum": round(rollup.get("score_sum", 0.0), 6),
+        "counts": {s: counts.get(s, 0) for s in SENTIMENTS + ("other",)},
+        "themes": themes,
+    }
+
+
+def old_user_stats(repo: FeedbackRepository, user_id: Any) -> Dict[str, Any]:
+    return {
+        "sentiment_distribution": repo.get_sentiment_stats(user_id),
+        "top_themes": repo.get_theme_stats(user_id),
+        "total_feedbacks": repo.get_feedback_count(user_id),
+        "average_satisfaction": repo.get_average_satisfaction(user_id),
+    }
+
+
+def comparable_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **stats,
+        "top_themes": sorted((t["_id"], t["count"]) for t in stats["top_themes"]),
+        "average_satisfaction": round(stats["average_satisfaction"], 6),
+    }
+
+
+class Checker:
+    def __init__(self):
+        self.checks = 0
+        self.failures: List[str] = []
+
+    def same(self, name: str, expected: Any, actual: Any) -> None:
+        self.checks += 1
+        if expected != actual:
+            self.failures.append(name)
+            print(f"MISMATCH {name}\n  expected: {expected}\n  actual:   {actual}")
+
+
+def check_rollups(
+    checker: Checker, repo: FeedbackRepository, user_ids, conversations, label: str
+) -> None:
+    for user_id in user_ids:
+        for conversation_id in [None] + conversations[user_id]:
+            name = f"{label} rollup {user_id}/{conversation_id}"
+            checker.same(
+                name,
+                normalize_rollup(repo.get_rollup(user_id, conversation_id) or {}),
+                normalize_rollup(repo.aggregate_rollup(user_id, conversation_id)),
+            )
+
+
+def versions(repo: FeedbackRepository, user_ids) -> List[int]:
+    collection = repo.db[DATA_VERSION_COLLECTION]
+    return [parse_version(collection.find_one(version_filter(u))) for u in user_ids]
+
+
+def check_service(
+    checker: Checker, repo: FeedbackRepository, user_ids, version: count
+) -> None:
+    service = AnalyticsService(repo)
+    stored = {}
+    for user_id in user_ids:
+        uid = str(user_id)
+        stored[uid] = (
+            service._build_analytics_summary(uid, next(version)),
+            service._build_theme_breakdown(uid, next(version)),
+        )
+    repo.db[ROLLUP_COLLECTION].delete_many({})
+    for user_id in user_ids:
+        uid = str(user_id)
+        summary = service._build_analytics_summary(uid, next(version))
+        themes = service._build_theme_breakdown(uid, next(version))
+        for result in (summary, stored[uid][0]):
+            result.pop("last_updated", None)
+        checker.same(f"summary {uid}", stored[uid][0], summary)
+        checker.same(f"theme breakdown {uid}", stored[uid][1], themes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mongo", default="mongomock", help='"mongomock" or a mongodb:// URL'
+    )
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.mongo == "mongomock":
+        import mongomock
+
+        from benchmarks.load import _patch_mongomock_bulk, _patch_mongomock_lookup
+
+        _patch_mongomock_bulk()
+        _patch_mongomock_lookup()
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+
+        client = MongoClient(args.mongo)
+    db_name = f"feedback_parity_{os.getpid()}"
+    db = client[db_name]
+    try:
+        repo = FeedbackRepository(db)
+        rng = random.Random(args.seed)
+        user_ids, conversations = seed(repo, args.users, args.rows, rng)
+
+        checker = Checker()
+        for user_id in user_ids:
+            checker.same(
+                f"user stats {user_id}",
+                comparable_stats(old_user_stats(repo, user_id)),
+                comparable_stats(repo.get_user_stats(user_id)),
+            )
+        check_rollups(checker, repo, user_ids, conversations, "incremental")
+        before = versions(repo, user_ids)
+        rebuild_rollups(db)
+        check_rollups(checker, repo, user_ids, conversations, "rebuilt")
+        checker.same(
+            "versions bumped by rebuild",
+            [True] * len(user_ids),
+            [a > b for a, b in zip(versions(repo, user_ids), before)],
+        )
+        check_service(checker, repo, user_ids, count())
+    finally:
+        client.drop_database(db_name)
+
+    print(
+        f"{checker.checks - len(checker.failures)}/{checker.checks} checks match "
+        f"({args.users} users x {args.rows} rows, {args.mongo})"
+    )
+    sys.exit(1 if checker.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
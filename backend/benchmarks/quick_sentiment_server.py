@@ -0,0 +1,117 @@
+"""``POST /analyze/quick-sentiment/batch`` through a real uvicorn server.
+
+Run from the backend directory:
+
+    python -m benchmarks.quick_sentiment_server
+    python -m benchmarks.quick_sentiment_server --items 200000
+
+``main:app`` is served by ``uvicorn.Server`` on a loopback port (Mongo set up
+as in ``benchmarks.load``), so the request body arrives over a socket with
+the server's own disconnect handling, which the in-process ASGI transport
+used by the load benchmark skips. A JSON array and an NDJSON body of
+``--items`` texts, plus a small array and a truncated one, are posted; each
+must come back with one scored line per item (the truncated body ends in an
+error line). Prints the wall time per body and exits non-zero on a mismatch.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from typing import List, Tuple
+
+from benchmarks.load import configure, sign_in
+
+TEXTS = [
+    "Great app, love the clean interface",
+    "Crashes every time I open the camera",
+    "Support was helpful but the update made everything slow",
+    "Delivery arrived on Tuesday",
+]
+
+
+def bodies(items: int) -> List[Tuple[str, str, bytes, int, bool]]:
+    """(name, content type, body, expected scored lines, expect an error line)"""
+    texts = [TEXTS[i % len(TEXTS)] for i in range(items)]
+    array = json.dumps(texts).encode()
+    ndjson = "".join(
+        json.dumps({"id": i, "text": text}) + "\n" for i, text in enumerate(texts)
+    ).encode()
+    return [
+        ("small array", "application/json", json.dumps(TEXTS).encode(), len(TEXTS), False),
+        ("array", "application/json", array, items, False),
+        ("ndjson", "application/x-ndjson", ndjson, items, False),
+        ("truncated array", "application/json", array[: len(array) // 2], -1, True),
+    ]
+
+
+async def run(args: argparse.Namespace) -> bool:
+    import httpx
+    import uvicorn
+
+    from main import app
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    ok = True
+    try:
+        # A body the handler never finishes reading hangs rather than errors
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=args.timeout
+        ) as http:
+            headers = {"Authorization": f"Bearer {await sign_in(http, 0)}"}
+            for name, content_type, body, expected, expect_error in bodies(args.items):
+                started = time.perf_counter()
+                response = await http.post(
+                    "/analyze/quick-sentiment/batch",
+                    content=body,
+                    headers={**headers, "Content-Type": content_type},
+                )
+                elapsed = time.perf_counter() - started
+                lines = [json.loads(line) for line in response.text.splitlines()]
+                scored = [line for line in lines if "sentiment" in line]
+                errors = [line for line in lines if "items_read" in line]
+                passed = (
+                    response.status_code == 200
+                    and bool(errors) == expect_error
+                    and (expected < 0 or len(scored) == expected)
+                    and [line["index"] for line in scored] == list(range(len(scored)))
+                )
+                ok = ok and passed
+                print(
+                    f"{'ok' if passed else 'FAIL':4} {name:16} {len(body):>10} bytes "
+                    f"{len(scored):>8} scored {elapsed * 1000:>9.1f} ms"
+                    + (f"  {errors[0]}" if errors else "")
+                )
+    finally:
+        server.should_exit = True
+        await serving
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mongo", default="mongomock", help='"mongomock" or a mongodb:// URL'
+    )
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+    # Only the sign-in touches the model
+    args.llm_provider = "fake"
+    args.llm_latency_ms = 0.0
+    args.llm_ms_per_token = 0.0
+
+    configure(args)
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
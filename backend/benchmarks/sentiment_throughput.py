@@ -0,0 +1,102 @@
+"""Throughput of the keyword sentiment engine.
+
+Run from the backend directory:
+
+    python -m benchmarks.sentiment_throughput --rows 1000000
+
+Rows are drawn from the sample feedback CSV at the repo root (or a small
+built-in corpus) and scored in batches with ``score_batch``. For comparison,
+a per-text baseline in the style of the scorers it replaced (rebuild the word
+sets, regex-tokenize, intersect) runs on ``--baseline-rows`` rows.
+"""
+import argparse
+import csv
+import os
+import random
+import re
+import time
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from app.services.sentiment import (
+    MIXED_CONNECTORS,
+    NEGATIVE_WORDS,
+    POSITIVE_WORDS,
+    score_batch,
+)
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "feedback.csv")
+FALLBACK_CORPUS = [
+    "Great app, love the clean interface and fast sync.",
+    "Crashes every time I open the camera. Unusable.",
+    "Support was helpful but the update made everything slow.",
+    "Delivery arrived on Tuesday.",
+    "It's okay, nothing special.",
+]
+
+
+def load_corpus() -> List[str]:
+    try:
+        with open(SAMPLE_CSV, newline="", encoding="utf-8") as f:
+            rows = [row["feedback"] for row in csv.DictReader(f) if row.get("feedback")]
+        return rows or FALLBACK_CORPUS
+    except OSError:
+        return FALLBACK_CORPUS
+
+
+def baseline_label(text: str) -> str:
+    words = set(re.findall(r"\b\w+\b", text.lower()))
+    positive, negative = set(POSITIVE_WORDS), set(NEGATIVE_WORDS)
+    pos = len(words & positive)
+    neg = len(words & negative)
+    connector = bool(words & set(MIXED_CONNECTORS))
+    if (pos and neg) or (connector and (pos or neg)):
+        return "mixed"
+    if pos:
+        return "positive"
+    if neg:
+        return "negative"
+    return "neutral"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--baseline-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    rng = random.Random(42)
+    texts = [rng.choice(corpus) for _ in range(args.rows)]
+
+    started = time.perf_counter()
+    labels = Counter()
+    for i in range(0, len(texts), args.batch_size):
+        batch = score_batch(texts[i : i + args.batch_size])
+        names, counts = np.unique(batch.labels, return_counts=True)
+        labels.update(dict(zip(names.tolist(), counts.tolist())))
+    engine_seconds = time.perf_counter() - started
+
+    baseline_texts = texts[: args.baseline_rows]
+    started = time.perf_counter()
+    for text in baseline_texts:
+        baseline_label(text)
+    baseline_seconds = time.perf_counter() - started
+
+    engine_rate = len(texts) / engine_seconds
+    baseline_rate = len(baseline_texts) / baseline_seconds
+    print(f"corpus: {len(corpus)} distinct texts, {len(texts):,} rows")
+    print(f"score_batch: {engine_seconds:.2f}s  {engine_rate:,.0f} rows/s")
+    print(
+        f"baseline ({len(baseline_texts):,} rows): {baseline_seconds:.2f}s  "
+        f"{baseline_rate:,.0f} rows/s"
+    )
+    print(f"speedup: {engine_rate / baseline_rate:.1f}x")
+    print(f"labels: {dict(labels)}")
+
+
+if __name__ == "__main__":
+    main()
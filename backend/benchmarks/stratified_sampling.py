@@ -0,0 +1,101 @@
+"""Scaling of the single-pass stratified sampler from 1k to 10M reviews.
+
+Run from the backend directory:
+
+    python -m benchmarks.stratified_sampling --max-rows 10000000
+
+Reviews are generated lazily and fed to ``AIService._stratified_sample`` as
+an iterator, the way a CSV reader or database cursor would supply them, so
+the input is never materialized. For each size the run reports throughput
+and the process's peak RSS so far, which should stay flat once the
+reservoirs are full. Up to ``--legacy-max-rows`` the old list-based
+stratifier, whose neutral bucket used list membership tests, is timed for
+comparison. No model or database call is made.
+"""
+import argparse
+import os
+import random
+import resource
+import time
+from typing import Callable, Iterator, List
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from app.services.ai_service import ai_service  # noqa: E402
+
+WORDS = (
+    "great love fast easy terrible broken slow refund app delivery order "
+    "price support checkout screen update account the it was and but"
+).split()
+LEGACY_NEGATIVE = ["bad", "terrible", "broken", "slow", "refund"]
+LEGACY_POSITIVE = ["great", "love", "fast", "easy"]
+
+
+def reviews(rows: int, seed: int = 7) -> Iterator[str]:
+    rng = random.Random(seed)
+    for _ in range(rows):
+        yield " ".join(rng.choices(WORDS, k=rng.randint(4, 30)))
+
+
+def legacy_stratify(rows: int) -> List[str]:
+    items = list(reviews(rows))
+    random.seed(42)
+    negatives = [r for r in items if any(w in r.lower() for w in LEGACY_NEGATIVE)]
+    positives = [r for r in items if any(w in r.lower() for w in LEGACY_POSITIVE)]
+    neutrals = [r for r in items if r not in negatives and r not in positives]
+    n_neg = min(len(negatives), 30)
+    n_pos = min(len(positives), 30)
+    n_neu = min(max(0, 80 - n_neg - n_pos), len(neutrals))
+    return (
+        random.sample(negatives, n_neg)
+        + random.sample(positives, n_pos)
+        + random.sample(neutrals, n_neu)
+    )
+
+
+def measure(run: Callable[[], object]) -> tuple:
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=10_000_000)
+    parser.add_argument("--legacy-max-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    sizes = [
+        n
+        for n in (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+        if n <= args.max_rows
+    ]
+    print(f"{'rows':>11} {'variant':<10} {'seconds':>9} {'rows/s':>10} {'max RSS MiB':>11}")
+    for rows in sizes:
+        if rows <= args.legacy_max_rows:
+            elapsed, peak = measure(lambda: legacy_stratify(rows))
+            print(
+                f"{rows:>11,} {'legacy':<10} {elapsed:>9.2f} "
+                f"{rows / elapsed:>10,.0f} {peak / 2**20:>11.1f}"
+            )
+        result = {}
+
+        def streaming() -> None:
+            result["sampler"], _ = ai_service._stratified_sample(reviews(rows))
+
+        elapsed, peak = measure(streaming)
+        sampler = result["sampler"]
+        kept = {name: len(items) for name, items in sampler.strata.items()}
+        print(
+            f"{rows:>11,} {'streaming':<10} {elapsed:>9.2f} "
+            f"{rows / elapsed:>10,.0f} {peak / 2**20:>11.1f}   kept {kept}"
+        )
+
+
+if __name__ == "__main__":
+    main()
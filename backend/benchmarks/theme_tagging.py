@@ -0,0 +1,94 @@
+"""Throughput and cluster purity of the ingest-time theme tagger.
+
+Run from the backend directory:
+
+    python -m benchmarks.theme_tagging --rows 200000
+
+Synthetic reviews are drawn from a few known topics and tagged in
+ingestion-sized batches. The run reports rows per second and, for each theme
+the tagger invented, which share of its rows came from its dominant topic.
+"""
+
+import argparse
+import random
+import time
+from collections import Counter, defaultdict
+from typing import List, Tuple
+
+from app.services.themes import ThemeTagger
+
+TOPICS = {
+    "delivery": [
+        "delivery was late",
+        "package arrived damaged",
+        "courier lost my parcel",
+        "shipping took two weeks",
+        "delivery driver left it outside",
+    ],
+    "support": [
+        "customer support never answered",
+        "support agent was helpful",
+        "waited hours on the phone with support",
+        "support chat closed on me",
+    ],
+    "billing": [
+        "charged twice on my card",
+        "subscription price went up",
+        "billing page shows the wrong amount",
+        "refund to my card took a month",
+    ],
+    "login": [
+        "cannot login after the update",
+        "password reset email never arrives",
+        "login screen freezes",
+        "two factor code fails at login",
+    ],
+}
+FILLER = ["honestly", "overall", "again", "for me", "this week", "my order", ""]
+
+
+def reviews(rows: int, seed: int = 3) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    names = list(TOPICS)
+    result = []
+    for _ in range(rows):
+        topic = rng.choice(names)
+        parts = [rng.choice(FILLER), rng.choice(TOPICS[topic])]
+        if rng.random() < 0.5:
+            parts += [rng.choice(FILLER), rng.choice(TOPICS[topic])]
+        result.append((topic, " ".join(p for p in parts if p)))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    data = reviews(args.rows)
+    texts = [text for _, text in data]
+    tagger = ThemeTagger()
+    started = time.perf_counter()
+    tagged: List[List[str]] = []
+    for i in range(0, len(texts), args.batch_size):
+        tagged.extend(tagger.tag_batch(texts[i : i + args.batch_size]))
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.rows:,} rows in {elapsed:.2f}s: {args.rows / elapsed:,.0f} rows/s")
+    by_theme = defaultdict(Counter)
+    untagged = 0
+    for (topic, _), themes in zip(data, tagged):
+        if not themes:
+            untagged += 1
+        for theme in themes:
+            by_theme[theme][topic] += 1
+    print(f"untagged rows: {untagged:,}")
+    for theme, topics in sorted(by_theme.items(), key=lambda t: -sum(t[1].values())):
+        total = sum(topics.values())
+        topic, count = topics.most_common(1)[0]
+        print(f"  {theme:<24} {total:>8,} rows  {count / total:6.1%} {topic}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 import traceback
 from app.controllers import auth_controller, feedback_controller, analytics_controller
 from app.core.config import settings
+from app.core.database import get_database
+from app.core.metrics import MetricsMiddleware, register_cache, render
+from app.core.migrations import run_migrations
+from app.core.principal_cache import principal_cache
+from app.dependencies.services import get_chat_service, get_job_queue
+from app.services.analytics_cache import analytics_cache
+from app.services.llm_cache import llm_cache
+from app.services.llm_gateway import llm_gateway
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,7 +34,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(MetricsMiddleware)
+
+register_cache("llm", llm_cache.stats)
+register_cache("analytics", analytics_cache.stats)
+register_cache("principal", principal_cache.stats)
+register_cache("agent_pool", lambda: get_chat_service().agent_pool.stats())
+
+
+@app.on_event("startup")
+async def apply_migrations():
+    if not settings.RUN_MIGRATIONS_ON_STARTUP:
+        return
+    try:
+        applied = await run_in_threadpool(run_migrations, get_database())
+        if applied:
+            logger.info(f"Applied migrations: {applied}")
+    except Exception:
+        # The repositories rely on these indexes (unique rollup and data
+        # version keys among them); refuse to serve without them.
+        logger.error(f"Migrations failed:\n{traceback.format_exc()}")
+        raise
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    queue = get_job_queue()
+    await queue.start()
+    resumed = await queue.resume()
+    if resumed:
+        logger.info(f"Resumed {resumed} background job(s)")
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await get_job_queue().stop()
+
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    await llm_gateway.aclose()
 
 
 @app.exception_handler(Exception)
@@ -68,6 +118,12 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,5 +1,6 @@
 import { useState, useCallback } from "react";
 import { API_ENDPOINTS } from "@/lib/api-config";
+import { waitForJob } from "@/lib/jobs";
 import { FeedbackAnalysis, AnalyticsSummary, ChatMessage, ChatResponse } from "@/types/analysis";
 interface UseAnalysisReturn {
     analyzeText: (reviews: string[], history?: ChatMessage[]) => Promise<FeedbackAnalysis>;
@@ -62,7 +63,8 @@ export function useAnalysis(): UseAnalysisReturn {
                 const errorData = await response.json();
                 throw new Error(errorData.detail || "Upload failed");
             }
-            return await response.json();
+            const job = await response.json();
+            return await waitForJob<ChatResponse>(job.job_id, getHeaders());
         } catch (err) {
             const msg = err instanceof Error ? err.message : "An error occurred";
             setError(msg);
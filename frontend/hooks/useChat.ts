@@ -2,6 +2,7 @@
 
 import { useState, useRef, useEffect, useCallback } from 'react';
 import { API_ENDPOINTS } from '@/lib/api-config';
+import { waitForJob } from '@/lib/jobs';
 
 export interface Message {
     id: string;
@@ -17,8 +18,24 @@ function getAuthHeaders(): Record<string, string> {
     return token ? { Authorization: `Bearer ${token}` } : {};
 }
 
-async function sendChatMessage(message: string, conversationId?: string) {
-    const response = await fetch(API_ENDPOINTS.ANALYZE.CHAT, {
+interface ChatResult {
+    conversation_id: string;
+    response: string;
+    is_question: boolean;
+}
+
+/**
+ * Streams a chat turn from the SSE endpoint. `onStart` fires as soon as the
+ * turn is recorded and `onToken` for each text delta; the resolved value is
+ * the authoritative final response.
+ */
+async function streamChatMessage(
+    message: string,
+    conversationId: string | undefined,
+    onStart: (data: { conversation_id: string; is_question: boolean }) => void,
+    onToken: (text: string) => void,
+): Promise<ChatResult> {
+    const response = await fetch(API_ENDPOINTS.ANALYZE.CHAT_STREAM, {
         method: 'POST',
         headers: {
             ...getAuthHeaders(),
@@ -26,11 +43,32 @@ async function sendChatMessage(message: string, conversationId?: string) {
         },
         body: JSON.stringify({ message, conversation_id: conversationId ?? null }),
     });
-    if (!response.ok) {
+    if (!response.ok || !response.body) {
         const err = await response.json().catch(() => ({}));
         throw new Error(err.detail || 'Chat request failed');
     }
-    return response.json();
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const events = buffered.split('\n\n');
+        buffered = events.pop() ?? '';
+        for (const raw of events) {
+            const event = raw.match(/^event: (.*)$/m)?.[1];
+            const data = raw.match(/^data: (.*)$/m)?.[1];
+            if (!event || !data) continue;
+            const payload = JSON.parse(data);
+            if (event === 'start') onStart(payload);
+            else if (event === 'token') onToken(payload.text);
+            else if (event === 'done') return payload as ChatResult;
+            else if (event === 'error') throw new Error(payload.detail || 'Chat request failed');
+        }
+    }
+    throw new Error('Chat stream ended unexpectedly');
 }
 
 async function uploadCsvFile(file: File, conversationId?: string) {
@@ -48,7 +86,8 @@ async function uploadCsvFile(file: File, conversationId?: string) {
         const err = await response.json().catch(() => ({}));
         throw new Error(err.detail || 'CSV upload failed');
     }
-    return response.json();
+    const job = await response.json();
+    return waitForJob<{ conversation_id: string; response: string }>(job.job_id, getAuthHeaders());
 }
 
 const WELCOME_MESSAGES: Message[] = [
@@ -109,16 +148,42 @@ export function useChat() {
         setInputValue('');
         setLoading(true);
 
-        try {
-            const result = await sendChatMessage(trimmed, conversationId);
+        const streamingId = (Date.now() + 1).toString();
+        let started = false;
+        const updateStreaming = (update: Partial<Message>) =>
+            setMessages(prev => prev.map(m => (m.id === streamingId ? { ...m, ...update } : m)));
 
-            if (result.conversation_id && result.conversation_id !== 'error') {
-                setConversationId(result.conversation_id);
-            }
+        try {
+            let streamed = '';
+            const result = await streamChatMessage(
+                trimmed,
+                conversationId,
+                data => {
+                    started = true;
+                    setConversationId(data.conversation_id);
+                    setMessages(prev => [
+                        ...prev,
+                        {
+                            id: streamingId,
+                            text: '',
+                            sender: 'agent',
+                            timestamp: new Date(),
+                            type: data.is_question ? 'question' : 'feedback',
+                        },
+                    ]);
+                },
+                text => {
+                    streamed += text;
+                    updateStreaming({ text: streamed });
+                },
+            );
 
             const responseText = result.response || 'I encountered an issue. Please try again.';
-            addAgentMessage(responseText, result.is_question ? 'question' : 'feedback');
+            updateStreaming({ text: responseText, hasActions: true });
         } catch (err) {
+            if (started) {
+                setMessages(prev => prev.filter(m => m.id !== streamingId));
+            }
             const errorMsg = err instanceof Error ? err.message : 'An unexpected error occurred.';
             addAgentMessage(
                 `Warning: **Error:** ${errorMsg}\n\nPlease check your connection and try again.`,
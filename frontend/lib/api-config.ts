@@ -10,7 +10,10 @@ export const API_ENDPOINTS = {
         TEXT: `${API_BASE_URL}/analyze/text`,
         UPLOAD: `${API_BASE_URL}/analyze/upload`,
         CHAT: `${API_BASE_URL}/analyze/chat`,
+        CHAT_STREAM: `${API_BASE_URL}/analyze/chat/stream`,
         QUICK_SENTIMENT: `${API_BASE_URL}/analyze/quick-sentiment`,
+        QUICK_SENTIMENT_BATCH: `${API_BASE_URL}/analyze/quick-sentiment/batch`,
+        JOBS: `${API_BASE_URL}/analyze/jobs`,
     },
     ANALYTICS: {
         SUMMARY: `${API_BASE_URL}/analytics/summary`,
@@ -0,0 +1,36 @@
+import { API_ENDPOINTS } from '@/lib/api-config';
+
+export interface JobStatus<T = unknown> {
+    job_id: string;
+    kind: string;
+    status: 'queued' | 'running' | 'completed' | 'failed';
+    stage: string;
+    progress: Record<string, unknown>;
+    result: T | null;
+    error: string | null;
+}
+
+const POLL_INTERVAL_MS = 1500;
+
+export async function waitForJob<T>(
+    jobId: string,
+    headers: Record<string, string>,
+    onProgress?: (job: JobStatus<T>) => void,
+): Promise<T> {
+    while (true) {
+        const response = await fetch(`${API_ENDPOINTS.ANALYZE.JOBS}/${jobId}`, { headers });
+        if (!response.ok) {
+            const err = await response.json().catch(() => ({}));
+            throw new Error(err.detail || 'Failed to fetch job status');
+        }
+        const job: JobStatus<T> = await response.json();
+        onProgress?.(job);
+        if (job.status === 'completed') {
+            return job.result as T;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Processing failed');
+        }
+        await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+}
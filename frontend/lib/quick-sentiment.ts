@@ -0,0 +1,70 @@
+import { API_ENDPOINTS } from '@/lib/api-config';
+
+export interface QuickSentimentResult {
+    index: number;
+    sentiment?: 'positive' | 'negative' | 'mixed' | 'neutral';
+    score?: number;
+    confidence?: number;
+    error?: string;
+}
+
+/**
+ * Scores each non-empty line of `text`. A single line uses the GET endpoint;
+ * multi-line input is sent as NDJSON to the batch endpoint and results are
+ * reported through `onResult` as they stream back.
+ */
+export async function quickSentiment(
+    text: string,
+    headers: Record<string, string>,
+    onResult?: (result: QuickSentimentResult) => void,
+): Promise<QuickSentimentResult[]> {
+    const lines = text.split('\n').map(line => line.trim()).filter(Boolean);
+
+    if (lines.length <= 1) {
+        const params = new URLSearchParams({ text: lines[0] ?? text });
+        const response = await fetch(`${API_ENDPOINTS.ANALYZE.QUICK_SENTIMENT}?${params}`, { headers });
+        if (!response.ok) {
+            const err = await response.json().catch(() => ({}));
+            throw new Error(err.detail || 'Sentiment check failed');
+        }
+        const data = await response.json();
+        const result: QuickSentimentResult = { index: 0, ...data };
+        onResult?.(result);
+        return [result];
+    }
+
+    const response = await fetch(API_ENDPOINTS.ANALYZE.QUICK_SENTIMENT_BATCH, {
+        method: 'POST',
+        headers: { ...headers, 'Content-Type': 'application/x-ndjson' },
+        body: lines.map(line => JSON.stringify(line)).join('\n'),
+    });
+    if (!response.ok || !response.body) {
+        const err = await response.json().catch(() => ({}));
+        throw new Error(err.detail || 'Sentiment check failed');
+    }
+
+    const results: QuickSentimentResult[] = [];
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    const emit = (line: string) => {
+        if (!line.trim()) return;
+        const result: QuickSentimentResult = JSON.parse(line);
+        if (result.index === undefined) {
+            throw new Error(result.error || 'Sentiment check failed');
+        }
+        results.push(result);
+        onResult?.(result);
+    };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const parts = buffered.split('\n');
+        buffered = parts.pop() ?? '';
+        parts.forEach(emit);
+    }
+    emit(buffered + decoder.decode());
+    return results;
+}